@@ -1,26 +1,41 @@
 """Minimal token-based authentication utilities."""
 from __future__ import annotations
 
+from typing import Optional
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
-from backend.app.data import user_store
+from backend.app.data import session_store, user_store
 from backend.app.schemas.auth import UserProfile
 
 auth_scheme = HTTPBearer(auto_error=False)
 
 
+def resolve_user_id(credentials: Optional[HTTPAuthorizationCredentials]) -> Optional[str]:
+    """Return the user id of a live bearer token, or ``None`` without raising."""
+    if credentials is None or not credentials.credentials:
+        return None
+    return session_store.get_user_id(credentials.credentials)
+
+
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(auth_scheme)) -> dict:
     """Resolve the current user from the Authorization header."""
     if credentials is None or not credentials.credentials:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Authorization token required")
-    token = credentials.credentials
-    user = user_store.get_user_by_token(token)
+    user_id = resolve_user_id(credentials)
+    user = user_store.get_user_by_id(user_id) if user_id else None
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
     return user
 
 
+def get_current_token(credentials: HTTPAuthorizationCredentials = Depends(auth_scheme)) -> str:
+    """Return the bearer token of an authenticated request."""
+    get_current_user(credentials)
+    return credentials.credentials
+
+
 def to_user_profile(user: dict) -> UserProfile:
     """Map an internal user dict to the public schema."""
     return UserProfile(**user_store.public_user_dict(user))
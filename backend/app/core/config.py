@@ -3,7 +3,7 @@ from __future__ import annotations
 
 from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -29,9 +29,66 @@ class Settings(BaseSettings):
     timeline_log_path: Path = Field(
         default_factory=lambda: Path(__file__).resolve().parents[1] / "data" / "timeline_log.json"
     )
+    timeline_retention_days: int = 30
+    timeline_compaction_interval_hours: float = 24.0
+    timeline_import_batch_size: int = 5000
+    timeline_import_max_line_bytes: int = 64 * 1024
+    runtime_data_path: Path = Field(
+        default_factory=lambda: Path(__file__).resolve().parents[1] / "models" / "runtime_data.json"
+    )
     user_store_path: Path = Field(
         default_factory=lambda: Path(__file__).resolve().parents[1] / "data" / "users.json"
     )
+    session_store_path: Path = Field(
+        default_factory=lambda: Path(__file__).resolve().parents[1] / "data" / "sessions.log"
+    )
+    session_ttl_hours: float = 168.0
+    session_sweep_interval_minutes: float = 60.0
+    metadata_cache_max_age: int = 86400
+    fast_predict_serialization: bool = True
+    rate_limit_enabled: bool = True
+    rate_limit_standard_per_minute: float = 300.0
+    rate_limit_standard_burst: int = 60
+    rate_limit_expensive_per_minute: float = 10.0
+    rate_limit_expensive_burst: int = 5
+    rate_limit_max_keys: int = 100000
+    rate_limit_trust_forwarded_for: bool = False
+    rate_limit_token: Optional[str] = None
+    profiling_enabled: bool = False
+    profiling_token: Optional[str] = None
+    profiling_sample_rate: float = 0.0
+    profiling_dir: Path = Field(
+        default_factory=lambda: Path(__file__).resolve().parents[1] / "data" / "profiles"
+    )
+    profiling_max_profiles: int = 50
+    shadow_model_path: Optional[Path] = None
+    shadow_sample_rate: float = 0.1
+    shadow_queue_size: int = 1000
+    shadow_latency_window: int = 10000
+    shadow_token: Optional[str] = None
+    analytics_enabled: bool = True
+    analytics_dir: Path = Field(
+        default_factory=lambda: Path(__file__).resolve().parents[1] / "data" / "analytics"
+    )
+    analytics_chunk_size: int = 65536
+    analytics_chunk_cache_bytes: int = 256 * 1024 * 1024
+    analytics_flush_interval_seconds: float = 60.0
+    analytics_retention_days: float = 90.0
+    analytics_token: Optional[str] = None
+    case_index_path: Path = Field(
+        default_factory=lambda: Path(__file__).resolve().parents[1] / "models" / "case_index.npz"
+    )
+    similar_cases_max_candidates: int = 2000
+    feedback_log_path: Path = Field(
+        default_factory=lambda: Path(__file__).resolve().parents[1] / "data" / "feedback.log"
+    )
+    feedback_token: Optional[str] = None
+    diagnosis_reload_interval_seconds: float = 30.0
+    symptom_synonyms_path: Optional[Path] = None
+    diagnosis_session_ttl_minutes: float = 30.0
+    diagnosis_session_max: int = 10000
+    spelling_max_edit_distance: int = 2
+    spelling_min_confidence: float = 0.75
 
     @property
     def dataset_path(self) -> Path:
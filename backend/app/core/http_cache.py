@@ -0,0 +1,84 @@
+"""Precompressed, ETag-validated response bodies for rarely changing payloads.
+
+A :class:`CachedBody` is serialized once and kept in memory in identity, gzip and (when the
+optional ``brotli`` package is installed) brotli encodings. Each encoding has its own strong
+ETag derived from the content version, so conditional requests are answered with ``304`` and
+full requests only pick the pre-encoded bytes that match ``Accept-Encoding``.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response
+
+try:  # pragma: no cover - optional dependency
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional; gzip is always available
+    brotli = None  # type: ignore[assignment]
+
+IMMUTABLE_MAX_AGE = 31_536_000
+
+
+def content_version(data: Any) -> str:
+    """Return a short, stable hash of the JSON form of ``data``."""
+    encoded = json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+class CachedBody:
+    def __init__(self, payload: Dict[str, Any], version: str) -> None:
+        self.version = version
+        identity = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.encodings: Dict[str, bytes] = {
+            "identity": identity,
+            "gzip": gzip.compress(identity, compresslevel=9, mtime=0),
+        }
+        if brotli is not None:
+            self.encodings["br"] = brotli.compress(identity, quality=11)
+        self.etags = {encoding: f'"{version}-{encoding}"' for encoding in self.encodings}
+
+    def _negotiate(self, accept_encoding: str) -> str:
+        accepted = set()
+        for part in accept_encoding.split(","):
+            coding, *params = part.split(";")
+            quality = 1.0
+            for param in params:
+                name, _, value = param.strip().partition("=")
+                if name == "q":
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+            if quality > 0:
+                accepted.add(coding.strip().lower())
+        for encoding in ("br", "gzip"):
+            if encoding in self.encodings and (encoding in accepted or "*" in accepted):
+                return encoding
+        return "identity"
+
+    def response(self, request: Request, max_age: int, version: Optional[str] = None) -> Response:
+        """Build the response for ``request``.
+
+        ``version`` is the client-supplied version query parameter; when it matches, the URL is
+        immutable and may be cached for a year.
+        """
+        encoding = self._negotiate(request.headers.get("accept-encoding", ""))
+        cache_control = f"public, max-age={max_age}, must-revalidate"
+        if version == self.version:
+            cache_control = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+        headers = {
+            "ETag": self.etags[encoding],
+            "Cache-Control": cache_control,
+            "Vary": "Accept-Encoding",
+            "X-Content-Version": self.version,
+        }
+        if_none_match = request.headers.get("if-none-match", "")
+        client_tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if "*" in client_tags or client_tags & set(self.etags.values()):
+            return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=self.encodings[encoding], media_type="application/json", headers=headers)
@@ -0,0 +1,225 @@
+"""Opt-in per-request profiling.
+
+When ``PROFILING_ENABLED`` is set, ``main.py`` installs :class:`ProfilingMiddleware` and wraps
+every route's endpoint and dependency callables with :func:`instrument_routes`. A request is
+profiled when it carries ``X-Profile: <PROFILING_TOKEN>`` or is picked by
+``PROFILING_SAMPLE_RATE``. The middleware stores a ``cProfile.Profile`` in a context variable;
+the wrapped callables enable it around their own execution, which covers sync handlers running
+in the threadpool (context variables are copied into worker threads). Async callables are
+profiled on the event loop thread, so their profiles can include other coroutines that ran
+while they were suspended.
+
+A process has one profiling hook (``sys.setprofile`` per thread, and process-wide
+``sys.monitoring`` on Python 3.12+), so at most one request per worker process is profiled at a
+time: a request selected while another one is being profiled runs unprofiled. If the profiler
+cannot be enabled at all (e.g. another profiler is active), the call runs unprofiled as well.
+Profiles are saved in the threadpool, off the event loop.
+
+Profiles are written as ``pstats`` dumps with a JSON metadata sidecar to ``PROFILING_DIR``,
+which is trimmed to the newest ``PROFILING_MAX_PROFILES`` captures. The profile ID is returned
+in the ``X-Profile-Id`` response header. When profiling is disabled nothing is installed.
+"""
+from __future__ import annotations
+
+import cProfile
+import functools
+import inspect
+import json
+import logging
+import random
+import secrets
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from fastapi.dependencies.models import Dependant
+from fastapi.routing import APIRoute
+
+from backend.app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+_ACTIVE: ContextVar[Optional["_RequestProfile"]] = ContextVar("active_request_profile", default=None)
+# Held by the one request being profiled in this process; released by whichever thread finishes it.
+_PROFILING_SLOT = Lock()
+
+
+class _RequestProfile:
+    def __init__(self) -> None:
+        self.profile = cProfile.Profile()
+        # A request's callables run one after another, but possibly on different threads.
+        self.lock = Lock()
+
+
+def _enable(profile: cProfile.Profile) -> bool:
+    try:
+        profile.enable()
+    except ValueError:  # Python 3.12+: another profiler already holds sys.monitoring
+        logger.warning("Profiler unavailable; running the call unprofiled")
+        return False
+    return True
+
+
+def _run_profiled(call: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    active = _ACTIVE.get()
+    if active is None:
+        return call(*args, **kwargs)
+    with active.lock:
+        if not _enable(active.profile):
+            return call(*args, **kwargs)
+        try:
+            return call(*args, **kwargs)
+        finally:
+            active.profile.disable()
+
+
+def _wrap(call: Callable[..., Any]) -> Callable[..., Any]:
+    if getattr(call, "__profiled__", False) or inspect.isgeneratorfunction(call) or inspect.isasyncgenfunction(call):
+        return call
+    if inspect.iscoroutinefunction(call):
+
+        @functools.wraps(call)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            active = _ACTIVE.get()
+            if active is None or not _enable(active.profile):
+                return await call(*args, **kwargs)
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                active.profile.disable()
+
+        async_wrapper.__profiled__ = True  # type: ignore[attr-defined]
+        return async_wrapper
+
+    @functools.wraps(call)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        return _run_profiled(call, *args, **kwargs)
+
+    wrapper.__profiled__ = True  # type: ignore[attr-defined]
+    return wrapper
+
+
+def _instrument_dependant(dependant: Dependant) -> None:
+    if dependant.call is not None and inspect.isfunction(dependant.call):
+        dependant.call = _wrap(dependant.call)
+    for sub_dependant in dependant.dependencies:
+        _instrument_dependant(sub_dependant)
+
+
+def instrument_routes(app: FastAPI) -> None:
+    """Wrap endpoint and dependency callables so they report into the active request profile."""
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            _instrument_dependant(route.dependant)
+
+
+def _should_profile(headers: List[tuple[bytes, bytes]]) -> bool:
+    settings = get_settings()
+    token = settings.profiling_token
+    if token:
+        for name, value in headers:
+            if name == PROFILE_HEADER.encode("latin-1"):
+                return secrets.compare_digest(value.decode("latin-1"), token)
+    return settings.profiling_sample_rate > 0 and random.random() < settings.profiling_sample_rate
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles selected requests and stores the result."""
+
+    def __init__(self, app: Callable[..., Any]) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable[..., Any], send: Callable[..., Any]) -> None:
+        if scope["type"] != "http" or not _should_profile(scope.get("headers", [])):
+            await self.app(scope, receive, send)
+            return
+        if not _PROFILING_SLOT.acquire(blocking=False):  # another request is being profiled
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self._profile(scope, receive, send)
+        finally:
+            _PROFILING_SLOT.release()
+
+    async def _profile(self, scope: Dict[str, Any], receive: Callable[..., Any], send: Callable[..., Any]) -> None:
+        profile_id = uuid.uuid4().hex
+        active = _RequestProfile()
+        token = _ACTIVE.set(active)
+        status_code = 500
+
+        async def send_with_id(message: Dict[str, Any]) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _ACTIVE.reset(token)
+            metadata = {
+                "id": profile_id,
+                "method": scope.get("method"),
+                "path": scope.get("path"),
+                "status_code": status_code,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                "captured_at": datetime.now(timezone.utc).isoformat(),
+            }
+            try:
+                await run_in_threadpool(save_profile, active.profile, metadata)
+            except OSError:
+                logger.exception("Failed to store request profile %s", profile_id)
+
+
+def _profile_dir() -> Path:
+    return get_settings().profiling_dir
+
+
+def save_profile(profile: cProfile.Profile, metadata: Dict[str, Any]) -> None:
+    directory = _profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    profile.dump_stats(str(directory / f"{metadata['id']}.prof"))
+    (directory / f"{metadata['id']}.json").write_text(json.dumps(metadata), encoding="utf-8")
+    _trim(directory, get_settings().profiling_max_profiles)
+
+
+def _trim(directory: Path, keep: int) -> None:
+    captures = sorted(directory.glob("*.json"), key=lambda path: path.stat().st_mtime_ns, reverse=True)
+    for stale in captures[max(keep, 0) :]:
+        for path in (stale, stale.with_suffix(".prof")):
+            try:
+                path.unlink()
+            except FileNotFoundError:  # another worker trimmed it first
+                pass
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """Return metadata for the stored profiles, newest first."""
+    directory = _profile_dir()
+    if not directory.exists():
+        return []
+    profiles: List[Dict[str, Any]] = []
+    for path in directory.glob("*.json"):
+        try:
+            profiles.append(json.loads(path.read_text(encoding="utf-8")))
+        except (FileNotFoundError, ValueError):
+            continue
+    return sorted(profiles, key=lambda item: item["captured_at"], reverse=True)
+
+
+def profile_path(profile_id: str) -> Optional[Path]:
+    if not profile_id.isalnum():
+        return None
+    path = _profile_dir() / f"{profile_id}.prof"
+    return path if path.exists() else None
@@ -0,0 +1,152 @@
+"""In-process admission control with per-client token buckets.
+
+Each budget (``standard`` for ordinary API calls, ``expensive`` for password hashing on
+``/auth/login`` and ``/auth/signup``) holds one bucket per client. Clients are keyed by the user
+behind a live bearer token, or by IP address when the request is anonymous or the token is
+invalid. A bucket refills at ``RATE_LIMIT_<BUDGET>_PER_MINUTE`` and holds at most
+``RATE_LIMIT_<BUDGET>_BURST`` requests. Rejected requests get ``429`` with ``Retry-After``, and
+the budgets already charged for a rejected request are refunded, so a login refused by the
+``expensive`` budget does not also cost a ``standard`` request.
+
+Buckets use the GCRA formulation: a bucket is a single float, the time at which it will be full
+again, so admitting a request is one dict read and one dict write with no lock. Two threads
+racing on the same key can both be admitted, which over-admits by at most one request per race.
+Buckets live in an LRU-ordered dict capped at ``RATE_LIMIT_MAX_KEYS``. The least recently seen
+key is evicted first; such a key has usually refilled completely, so evicting it changes nothing.
+
+Budgets are per worker process, so with N workers a client can get up to N times the budget.
+"""
+from __future__ import annotations
+
+import math
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from threading import Lock
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import HTTPAuthorizationCredentials
+
+from backend.app.core import auth
+from backend.app.core.config import get_settings
+
+
+class RateLimiter:
+    def __init__(self, name: str, per_minute: float, burst: int, max_keys: int) -> None:
+        self.name = name
+        self.per_minute = per_minute
+        self.burst = max(burst, 1)
+        self.max_keys = max(max_keys, 1)
+        self._interval = 60.0 / per_minute
+        self._tolerance = self._interval * self.burst
+        self._buckets: OrderedDict[str, float] = OrderedDict()
+        # Only rejections and evictions take this lock; admitted requests never do.
+        self._counter_lock = Lock()
+        self._throttled = 0
+        self._evicted = 0
+
+    def acquire(self, key: str, now: Optional[float] = None) -> float:
+        """Consume one request from ``key``'s bucket.
+
+        Returns ``0.0`` when the request is admitted, otherwise the seconds until it would be.
+        """
+        now = time.monotonic() if now is None else now
+        buckets = self._buckets
+        full_at = max(buckets.get(key, now), now) + self._interval
+        wait = full_at - self._tolerance - now
+        if wait > 0:
+            with self._counter_lock:
+                self._throttled += 1
+            return wait
+        buckets[key] = full_at
+        try:
+            buckets.move_to_end(key)
+        except KeyError:  # evicted by another thread in between
+            pass
+        if len(buckets) > self.max_keys:
+            self._evict()
+        return 0.0
+
+    def refund(self, key: str) -> None:
+        """Give back one request admitted by ``acquire``, e.g. when another budget rejected it."""
+        full_at = self._buckets.get(key)
+        if full_at is not None:
+            self._buckets[key] = full_at - self._interval
+
+    def _evict(self) -> None:
+        evicted = 0
+        while len(self._buckets) > self.max_keys:
+            try:
+                self._buckets.popitem(last=False)
+            except KeyError:  # another thread emptied it
+                break
+            evicted += 1
+        with self._counter_lock:
+            self._evicted += evicted
+
+    def stats(self) -> Dict[str, Any]:
+        with self._counter_lock:
+            throttled, evicted = self._throttled, self._evicted
+        return {
+            "per_minute": self.per_minute,
+            "burst": self.burst,
+            "tracked_clients": len(self._buckets),
+            "max_clients": self.max_keys,
+            "throttled": throttled,
+            "evicted": evicted,
+        }
+
+
+@lru_cache
+def get_limiters() -> Dict[str, RateLimiter]:
+    """Return the configured budgets; empty when rate limiting is disabled."""
+    settings = get_settings()
+    if not settings.rate_limit_enabled:
+        return {}
+    return {
+        "standard": RateLimiter(
+            "standard", settings.rate_limit_standard_per_minute, settings.rate_limit_standard_burst, settings.rate_limit_max_keys
+        ),
+        "expensive": RateLimiter(
+            "expensive", settings.rate_limit_expensive_per_minute, settings.rate_limit_expensive_burst, settings.rate_limit_max_keys
+        ),
+    }
+
+
+def client_key(request: Request, credentials: Optional[HTTPAuthorizationCredentials]) -> str:
+    user_id = auth.resolve_user_id(credentials)
+    if user_id is not None:
+        return f"user:{user_id}"
+    if get_settings().rate_limit_trust_forwarded_for:
+        forwarded = request.headers.get("x-forwarded-for", "").split(",")[0].strip()
+        if forwarded:
+            return f"ip:{forwarded}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def rate_limited(budget: str) -> Callable[..., None]:
+    """Return a dependency that charges one request to ``budget``."""
+
+    def dependency(request: Request, credentials: Optional[HTTPAuthorizationCredentials] = Depends(auth.auth_scheme)) -> None:
+        limiter = get_limiters().get(budget)
+        if limiter is None:
+            return
+        key = client_key(request, credentials)
+        charged = getattr(request.state, "rate_limit_charged", [])
+        wait = limiter.acquire(key)
+        if wait > 0:
+            for earlier in charged:  # budgets charged by earlier dependencies of this request
+                earlier.refund(key)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+        request.state.rate_limit_charged = [*charged, limiter]
+
+    return dependency
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    return {name: limiter.stats() for name, limiter in get_limiters().items()}
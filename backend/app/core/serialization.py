@@ -0,0 +1,58 @@
+"""Single-pass JSON serialization for the ``/predict`` hot path.
+
+The standard path builds dicts, validates them into ``PredictionResponse`` and lets FastAPI
+validate and serialize the model again. The fast path writes the response bytes directly: the
+static part of every disease result (name, triage level, precautions, description) is encoded
+once per disease and cached as a JSON fragment, and only the per-request values are encoded on
+each call, with ``orjson`` when it is installed. ``tests/test_predict_serialization.py`` and
+``benchmark_predict_serialization.py`` check that both paths produce the same document and that
+it validates against ``PredictionResponse``.
+"""
+from __future__ import annotations
+
+import json
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+from pydantic import BaseModel
+
+try:  # pragma: no cover - optional dependency
+    import orjson
+except ImportError:  # pragma: no cover - fall back to the stdlib encoder
+    orjson = None  # type: ignore[assignment]
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, default=_default)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+@lru_cache(maxsize=None)
+def disease_fragments(disease: str, triage_level: str, description: str, precautions: Tuple[str, ...]) -> Tuple[bytes, bytes]:
+    """Return the encoded fields before and after the per-request values of a disease result."""
+    head = b'{"disease":' + dumps(disease) + b',"probability":'
+    tail = dumps({"triage_level": triage_level, "precautions": list(precautions), "description": description})
+    return head, b"," + tail[1:]
+
+
+def _result(result: Mapping[str, Any]) -> bytes:
+    head, tail = disease_fragments(
+        result["disease"], result["triage_level"], result["description"], tuple(result["precautions"])
+    )
+    return head + dumps(result["probability"]) + b',"severity_score":' + dumps(result["severity_score"]) + tail
+
+
+def prediction_body(results: Sequence[Mapping[str, Any]], fields: Dict[str, List[Any]]) -> bytes:
+    """Encode a ``PredictionResponse`` document from ``predict_diseases`` results and list fields."""
+    parts = [b'{"results":[', b",".join(_result(result) for result in results), b"]"]
+    for name, value in fields.items():
+        parts.append(b',"' + name.encode("utf-8") + b'":' + dumps(value))
+    parts.append(b"}")
+    return b"".join(parts)
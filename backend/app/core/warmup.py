@@ -0,0 +1,128 @@
+"""Startup warm-up that primes every cache used by the request path."""
+from __future__ import annotations
+
+import logging
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Any, Callable, Dict
+
+from backend.app.data.runtime_data import get_runtime_data
+from backend.app.ml import forest, inference, recommender, similar_cases, spelling, symptom_extraction
+from backend.app.ml.preprocess import encode_symptoms
+
+logger = logging.getLogger(__name__)
+
+_SYNTHETIC: ContextVar[bool] = ContextVar("synthetic_request", default=False)
+_LOCK = Lock()
+_STATE: Dict[str, Any] = {
+    "status": "pending",
+    "started_at": None,
+    "completed_at": None,
+    "total_ms": None,
+    "steps": {},
+    "error": None,
+}
+
+
+def get_status() -> Dict[str, Any]:
+    """Return a snapshot of the warm-up state."""
+    with _LOCK:
+        return {**_STATE, "steps": dict(_STATE["steps"])}
+
+
+def is_ready() -> bool:
+    with _LOCK:
+        return _STATE["status"] == "ready"
+
+
+def is_synthetic_request() -> bool:
+    """Whether the current call is a warm-up request that must not be recorded as traffic."""
+    return _SYNTHETIC.get()
+
+
+def _timed(name: str, func: Callable[[], Any]) -> Any:
+    start = time.perf_counter()
+    result = func()
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+    with _LOCK:
+        _STATE["steps"][name] = elapsed_ms
+    return result
+
+
+def _synthetic_symptoms(vocabulary: list[str], severity_map: Dict[str, float], count: int = 4) -> list[str]:
+    # Deterministic sample of high-weight symptoms so every synthetic request maps and scores.
+    ranked = sorted(vocabulary, key=lambda symptom: severity_map.get(symptom, 1.0), reverse=True)
+    return ranked[:count]
+
+
+def _exercise_request_paths() -> None:
+    # Imported lazily: the healthcheck router imports this module while the routes package loads.
+    from backend.app.routes import predict, symptoms
+    from backend.app.schemas.request import (
+        DiagnosisSessionRequest,
+        PredictionRequest,
+        SensitivityRequest,
+        SessionSymptomRequest,
+        SymptomDetail,
+        TextBatchPredictionRequest,
+        TextPredictionRequest,
+    )
+
+    _SYNTHETIC.set(True)  # the warm-up thread runs in its own context
+    bundle = inference.get_diagnosis_bundle()
+    vocabulary = inference.get_symptom_vocabulary()
+    sample = _synthetic_symptoms(vocabulary, bundle["severity_map"])
+    misspelled = sample[0][:-1]
+    phrases = [symptom.replace("_", " ") for symptom in sample]
+
+    symptoms.symptoms_body()
+    symptoms.diseases_body()
+    predict.predict(
+        PredictionRequest(
+            symptoms=[*sample, misspelled],
+            symptom_details=[SymptomDetail(name=sample[0], severity=7)],
+            include_similar=True,
+        )
+    )
+    # Repeated predictions are answered from the probability cache, so the extra rounds that let
+    # sklearn/joblib allocate their worker pools and buffers call the model directly.
+    vector = encode_symptoms(sample, bundle["symptom_to_index"], bundle["severity_map"]).reshape(1, -1)
+    for _ in range(2):
+        bundle["model"].predict_proba(vector)
+    predict.predict_from_text(TextPredictionRequest(text=f"{phrases[0]} and {phrases[1]} since yesterday"))
+    predict.predict_from_text_batch(TextBatchPredictionRequest(notes=[" and ".join(phrases), "nothing relevant"]))
+    predict.predict_sensitivity(SensitivityRequest(symptoms=sample))
+    session = predict.create_diagnosis_session(DiagnosisSessionRequest(symptoms=sample[:2]))
+    predict.add_session_symptom(session.session_id, SessionSymptomRequest(name=sample[2], severity=5))
+    predict.remove_session_symptom(session.session_id, sample[0])
+    predict.close_diagnosis_session(session.session_id)
+
+
+def run_warmup() -> None:
+    """Load models and data, build lookup indexes and run synthetic predictions."""
+    with _LOCK:
+        _STATE.update(status="warming", started_at=datetime.now(timezone.utc).isoformat(), steps={}, error=None)
+    start = time.perf_counter()
+    try:
+        _timed("diagnosis_model", inference.get_diagnosis_bundle)
+        _timed("triage_model", inference.get_triage_model)
+        _timed("runtime_data", get_runtime_data)
+        _timed("disease_metadata", inference.get_disease_metadata)
+        _timed("symptom_vocabulary", inference.get_symptom_vocabulary)
+        _timed("flat_forest", forest.get_flat_forest)
+        _timed("symptom_statistics", recommender.get_symptom_statistics)
+        _timed("symptom_matcher", symptom_extraction.get_symptom_matcher)
+        _timed("spell_checker", spelling.get_spell_checker)
+        _timed("case_index", similar_cases.get_case_index)
+        _timed("synthetic_requests", _exercise_request_paths)
+    except Exception as exc:
+        with _LOCK:
+            _STATE.update(status="failed", error=str(exc))
+        raise
+    total_ms = round((time.perf_counter() - start) * 1000, 2)
+    with _LOCK:
+        _STATE.update(status="ready", completed_at=datetime.now(timezone.utc).isoformat(), total_ms=total_ms)
+    logger.info("Warm-up completed in %.1f ms.", total_ms)
+
@@ -0,0 +1,333 @@
+"""Columnar, append-only log of prediction outcomes for population analytics.
+
+Every prediction served by the diagnosis model is recorded as one event: timestamp, top
+disease, triage level, severity score and the mapped symptoms. Events carry no user data.
+They are buffered in memory and written to ``ANALYTICS_DIR`` by the flush job every
+``ANALYTICS_FLUSH_INTERVAL_SECONDS``. A buffer that reaches ``ANALYTICS_CHUNK_SIZE`` events is
+handed to the flush job, which :func:`wait_for_pending` wakes early, so requests normally do
+not write chunks. Only when ``_MAX_PENDING`` full buffers are already waiting (the flush job is
+behind or not running) does ``record`` write the oldest one on the calling thread, and callers
+must treat its errors as non-fatal. Each chunk is an uncompressed ``.npz`` file of NumPy columns:
+
+* ``timestamp`` (int64 epoch seconds, sorted), ``disease`` (uint16), ``triage`` (uint8) and
+  ``severity`` (float32), one value per event;
+* ``symptom_offsets`` (uint32, CSR-style, ``events + 1`` values) and ``symptom_ids`` (uint16);
+* ``disease_names``, ``triage_names`` and ``symptom_names``, the chunk's own dictionaries.
+
+Chunks carry their own dictionaries, so worker processes write independent files
+(``events-<first>-<last>-<pid>-<id>.npz``, named by their time range) and need no coordination.
+On first read a chunk's codes are remapped to process-wide codes and the chunk is cached; the
+cache keeps the most recently used chunks up to ``ANALYTICS_CHUNK_CACHE_BYTES``. Queries skip chunks outside the requested window by file name, find the window's rows in the
+rest with ``np.searchsorted`` and aggregate them with ``np.bincount``. Chunks older than ``ANALYTICS_RETENTION_DAYS`` are deleted by :func:`prune`.
+"""
+from __future__ import annotations
+
+import io
+import os
+import re
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from threading import Event, Lock
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.app.core.config import get_settings
+from backend.app.data import json_store
+
+_CHUNK_NAME = re.compile(r"^events-(\d+)-(\d+)-\d+-[0-9a-f]+\.npz$")
+
+_LOCK = Lock()
+_BUFFER: Dict[str, list] = {"timestamp": [], "disease": [], "triage": [], "severity": [], "symptoms": []}
+_PENDING: List[Dict[str, list]] = []  # full buffers waiting for the flush job
+_PENDING_READY = Event()
+_MAX_PENDING = 4
+_CACHE_LOCK = Lock()
+_CHUNKS: "OrderedDict[str, Chunk]" = OrderedDict()  # least recently used first
+_CACHE_BYTES = 0
+
+
+class _Dictionary:
+    """Process-wide name -> code mapping shared by all loaded chunks."""
+
+    def __init__(self) -> None:
+        self.names: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def lookup(self, names: Iterable[str]) -> np.ndarray:
+        """Return the global codes of ``names`` (a chunk dictionary), adding unseen names."""
+        codes = []
+        for name in names:
+            code = self._codes.get(name)
+            if code is None:
+                code = self._codes[name] = len(self.names)
+                self.names.append(name)
+            codes.append(code)
+        return np.asarray(codes, dtype=np.int32)
+
+
+_DISEASES = _Dictionary()
+_TRIAGE_LEVELS = _Dictionary()
+_SYMPTOMS = _Dictionary()
+
+
+class Chunk(NamedTuple):
+    timestamp: np.ndarray
+    disease: np.ndarray
+    triage: np.ndarray
+    severity: np.ndarray
+    symptom_offsets: np.ndarray
+    symptom_ids: np.ndarray
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self)
+
+
+def record(
+    disease: str,
+    triage_level: str,
+    severity_score: float,
+    symptoms: Sequence[str],
+    timestamp: Optional[float] = None,
+) -> None:
+    """Append one prediction outcome; a full buffer is handed to the flush job."""
+    settings = get_settings()
+    with _LOCK:
+        _BUFFER["timestamp"].append(int(time.time() if timestamp is None else timestamp))
+        _BUFFER["disease"].append(disease)
+        _BUFFER["triage"].append(triage_level)
+        _BUFFER["severity"].append(severity_score)
+        _BUFFER["symptoms"].append(tuple(symptoms))
+        if len(_BUFFER["timestamp"]) < settings.analytics_chunk_size:
+            return
+        _PENDING.append(_take_buffer())
+        _PENDING_READY.set()
+        if len(_PENDING) <= _MAX_PENDING:
+            return
+        events = _PENDING.pop(0)  # the flush job is not keeping up or not running
+    write_chunk(settings.analytics_dir, encode_events(**events))
+
+
+def _take_buffer() -> Dict[str, list]:
+    """Detach the buffered events. Requires ``_LOCK``."""
+    events = dict(_BUFFER)
+    for column in _BUFFER:
+        _BUFFER[column] = []
+    return events
+
+
+def wait_for_pending(timeout: float) -> bool:
+    """Block until a full buffer is handed over or ``timeout`` passes; returns whether one was."""
+    handed_over = _PENDING_READY.wait(timeout)
+    _PENDING_READY.clear()
+    return handed_over
+
+
+def flush() -> int:
+    """Write the pending and buffered events as chunks. Returns the number of events written."""
+    with _LOCK:
+        batches = [*_PENDING, _take_buffer()]
+        _PENDING.clear()
+    written = 0
+    for events in batches:
+        if events["timestamp"]:
+            write_chunk(get_settings().analytics_dir, encode_events(**events))
+            written += len(events["timestamp"])
+    return written
+
+
+def _local_codes(values: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    names, codes = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    return names, codes
+
+
+def encode_events(
+    timestamp: Sequence[int],
+    disease: Sequence[str],
+    triage: Sequence[str],
+    severity: Sequence[float],
+    symptoms: Sequence[Sequence[str]],
+) -> Dict[str, np.ndarray]:
+    """Encode row-wise events into the chunk column layout, sorted by timestamp."""
+    order = np.argsort(np.asarray(timestamp, dtype=np.int64), kind="stable")
+    timestamp, severity = np.asarray(timestamp, dtype=np.int64)[order], np.asarray(severity, dtype=np.float32)[order]
+    disease, triage = [disease[index] for index in order], [triage[index] for index in order]
+    symptoms = [symptoms[index] for index in order]
+    disease_names, disease_codes = _local_codes(disease)
+    triage_names, triage_codes = _local_codes(triage)
+    flat = [symptom for event in symptoms for symptom in event]
+    symptom_names, symptom_codes = _local_codes(flat) if flat else (np.asarray([], dtype=str), np.asarray([], dtype=np.intp))
+    offsets = np.zeros(len(symptoms) + 1, dtype=np.uint32)
+    np.cumsum([len(event) for event in symptoms], out=offsets[1:])
+    return {
+        "timestamp": timestamp,
+        "disease": disease_codes.astype(np.uint16),
+        "triage": triage_codes.astype(np.uint8),
+        "severity": severity,
+        "symptom_offsets": offsets,
+        "symptom_ids": symptom_codes.astype(np.uint16),
+        "disease_names": disease_names,
+        "triage_names": triage_names,
+        "symptom_names": symptom_names,
+    }
+
+
+def write_chunk(directory: Path, columns: Dict[str, np.ndarray]) -> Path:
+    """Atomically write one chunk file and return its path."""
+    timestamps = columns["timestamp"]
+    name = f"events-{int(timestamps.min())}-{int(timestamps.max())}-{os.getpid()}-{uuid.uuid4().hex[:12]}.npz"
+    buffer = io.BytesIO()
+    np.savez(buffer, **columns)
+    path = directory / name
+    json_store.write_bytes(path, buffer.getvalue())
+    return path
+
+
+def _remap(columns: Mapping[str, np.ndarray]) -> Chunk:
+    """Build a chunk with process-wide codes from a chunk's columns. Requires ``_CACHE_LOCK``."""
+    return Chunk(
+        timestamp=columns["timestamp"],
+        disease=_DISEASES.lookup(columns["disease_names"])[columns["disease"]],
+        triage=_TRIAGE_LEVELS.lookup(columns["triage_names"])[columns["triage"]],
+        severity=columns["severity"],
+        symptom_offsets=columns["symptom_offsets"].astype(np.int64),
+        symptom_ids=_SYMPTOMS.lookup(columns["symptom_names"])[columns["symptom_ids"]],
+    )
+
+
+def _load_chunk(path: Path) -> Chunk:
+    with np.load(path, allow_pickle=False) as data:
+        return _remap(data)
+
+
+def _buffered_chunk() -> Optional[Chunk]:
+    """Return this process's unflushed events as a chunk. Requires ``_CACHE_LOCK``."""
+    with _LOCK:
+        batches = [*_PENDING, _BUFFER]
+        events = {column: [value for batch in batches for value in batch[column]] for column in _BUFFER}
+    if not events["timestamp"]:
+        return None
+    return _remap(encode_events(**events))
+
+
+def _chunk_files(directory: Path) -> List[Tuple[Path, int, int]]:
+    if not directory.exists():
+        return []
+    files = []
+    for path in directory.iterdir():
+        match = _CHUNK_NAME.match(path.name)
+        if match:
+            files.append((path, int(match.group(1)), int(match.group(2))))
+    return files
+
+
+def _uncache(name: str) -> None:
+    """Drop one chunk from the cache. Requires ``_CACHE_LOCK``."""
+    global _CACHE_BYTES
+    _CACHE_BYTES -= _CHUNKS.pop(name).nbytes
+
+
+def _cache(name: str, chunk: Chunk, max_bytes: int) -> None:
+    """Cache a loaded chunk, evicting the least recently used ones. Requires ``_CACHE_LOCK``."""
+    global _CACHE_BYTES
+    _CHUNKS[name] = chunk
+    _CACHE_BYTES += chunk.nbytes
+    while _CACHE_BYTES > max_bytes and len(_CHUNKS) > 1:
+        _uncache(next(iter(_CHUNKS)))
+
+
+def clear_cache() -> None:
+    """Drop every cached chunk, so the next query reads them from disk."""
+    global _CACHE_BYTES
+    with _CACHE_LOCK:
+        _CHUNKS.clear()
+        _CACHE_BYTES = 0
+
+
+def chunks(start: int, end: int) -> List[Chunk]:
+    """Return the chunks, including unflushed events, that may hold events in ``[start, end)``."""
+    settings = get_settings()
+    files = _chunk_files(settings.analytics_dir)
+    selected: List[Chunk] = []
+    with _CACHE_LOCK:
+        present = {path.name for path, _, _ in files}
+        for name in [name for name in _CHUNKS if name not in present]:
+            _uncache(name)  # pruned or removed
+        for path, first, last in files:
+            if last < start or first >= end:
+                continue
+            chunk = _CHUNKS.get(path.name)
+            if chunk is None:
+                try:
+                    chunk = _load_chunk(path)
+                except FileNotFoundError:  # pruned by another process
+                    continue
+                _cache(path.name, chunk, settings.analytics_chunk_cache_bytes)
+            else:
+                _CHUNKS.move_to_end(path.name)
+            selected.append(chunk)
+        buffered = _buffered_chunk()
+    if buffered is not None:
+        selected.append(buffered)
+    return selected
+
+
+def _rows(chunk: Chunk, start: int, end: int) -> Tuple[int, int]:
+    lo, hi = np.searchsorted(chunk.timestamp, [start, end])
+    return int(lo), int(hi)
+
+
+def triage_counts(start: int, end: int, bucket_seconds: int) -> Tuple[List[str], np.ndarray]:
+    """Count events per ``bucket_seconds`` bucket and triage level in ``[start, end)``.
+
+    Returns the triage level names and a ``(buckets, levels)`` count matrix; bucket ``i`` starts
+    at ``start + i * bucket_seconds``.
+    """
+    selected = chunks(start, end)
+    n_buckets = max(-(-(end - start) // bucket_seconds), 0)
+    n_levels = len(_TRIAGE_LEVELS.names)
+    counts = np.zeros(n_buckets * n_levels, dtype=np.int64)
+    for chunk in selected:
+        lo, hi = _rows(chunk, start, end)
+        if lo == hi:
+            continue
+        keys = (chunk.timestamp[lo:hi] - start) // bucket_seconds * n_levels + chunk.triage[lo:hi]
+        counts += np.bincount(keys, minlength=counts.size)
+    return list(_TRIAGE_LEVELS.names[:n_levels]), counts.reshape(n_buckets, n_levels)
+
+
+def symptom_counts(windows: Sequence[Tuple[int, int]]) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """Count events and per-symptom occurrences in each ``[start, end)`` window.
+
+    Returns the symptom names, the event count per window and a ``(windows, symptoms)`` matrix.
+    """
+    start, end = min(window[0] for window in windows), max(window[1] for window in windows)
+    selected = chunks(start, end)
+    n_symptoms = len(_SYMPTOMS.names)
+    events = np.zeros(len(windows), dtype=np.int64)
+    counts = np.zeros((len(windows), n_symptoms), dtype=np.int64)
+    for chunk in selected:
+        for row, (window_start, window_end) in enumerate(windows):
+            lo, hi = _rows(chunk, window_start, window_end)
+            events[row] += hi - lo
+            symptom_ids = chunk.symptom_ids[chunk.symptom_offsets[lo] : chunk.symptom_offsets[hi]]
+            counts[row] += np.bincount(symptom_ids, minlength=n_symptoms)
+    return list(_SYMPTOMS.names[:n_symptoms]), events, counts
+
+
+def prune(retention_days: float, now: Optional[float] = None) -> int:
+    """Delete chunks whose newest event is older than the retention window."""
+    cutoff = (time.time() if now is None else now) - retention_days * 86400
+    removed = 0
+    for path, _, last in _chunk_files(get_settings().analytics_dir):
+        if last < cutoff:
+            try:
+                path.unlink()
+                removed += 1
+            except FileNotFoundError:  # another worker pruned it first
+                pass
+    return removed
+
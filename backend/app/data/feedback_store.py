@@ -0,0 +1,53 @@
+"""Append-only log of clinician-confirmed diagnoses.
+
+Each record is one JSON line ``{"id", "created_at", "symptoms", "confirmed_disease",
+"predicted_disease"}`` with normalized symptom names and no user data. Records are appended
+under the file lock and fsynced, so a confirmed label survives a crash as soon as the request
+returns. ``update_diagnosis_model.py`` reads them to add trees to the diagnosis forest.
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from backend.app.core.config import get_settings
+from backend.app.data import json_store
+
+
+def append(symptoms: List[str], confirmed_disease: str, predicted_disease: Optional[str] = None) -> Dict[str, Any]:
+    """Durably append a confirmed diagnosis and return the stored record."""
+    record = {
+        "id": uuid.uuid4().hex,
+        "created_at": time.time(),
+        "symptoms": symptoms,
+        "confirmed_disease": confirmed_disease,
+        "predicted_disease": predicted_disease,
+    }
+    path = get_settings().feedback_log_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with json_store.locked(path):
+        with open(path, "ab") as file:
+            file.write(json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n")
+            file.flush()
+            os.fsync(file.fileno())
+    return record
+
+
+def iter_records(since: Optional[float] = None, path: Optional[Path] = None) -> Iterator[Dict[str, Any]]:
+    """Yield records created at or after ``since`` (epoch seconds), oldest first."""
+    path = path or get_settings().feedback_log_path
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+    except FileNotFoundError:
+        return
+    complete = data.rfind(b"\n") + 1  # a concurrent writer may still be appending the last line
+    for line in data[:complete].splitlines():
+        if line.strip():
+            record = json.loads(line)
+            if since is None or record["created_at"] >= since:
+                yield record
@@ -0,0 +1,106 @@
+"""Process-safe helpers for the JSON files backing the stores.
+
+Writers serialize on an exclusive ``fcntl`` lock held on a sidecar ``.lock`` file, so
+read-modify-write cycles are safe across uvicorn worker processes. Commits go to a temporary
+file that is fsynced and atomically renamed over the target, so readers never observe a
+partially written file and do not need to lock at all. Parsed contents are cached per path and
+keyed on the file's inode, mtime and size, so unchanged files are not re-read.
+"""
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Tuple
+
+try:  # pragma: no cover - platform dependent
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no fcntl; fall back to in-process locking
+    fcntl = None  # type: ignore[assignment]
+
+_THREAD_LOCKS: Dict[Path, Lock] = {}
+_THREAD_LOCKS_GUARD = Lock()
+_CACHE: Dict[Path, Tuple[Tuple[int, int, int], List[Dict[str, Any]]]] = {}
+_CACHE_LOCK = Lock()
+
+
+def _thread_lock(path: Path) -> Lock:
+    with _THREAD_LOCKS_GUARD:
+        return _THREAD_LOCKS.setdefault(path, Lock())
+
+
+@contextmanager
+def locked(path: Path) -> Iterator[None]:
+    """Hold an exclusive lock for ``path`` across threads and processes."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _thread_lock(path):
+        if fcntl is None:
+            yield
+            return
+        with open(f"{path}.lock", "a+") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _stat_key(stat: os.stat_result) -> Tuple[int, int, int]:
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def read_list(path: Path) -> List[Dict[str, Any]]:
+    """Return the JSON list stored at ``path``.
+
+    The returned list is shared with the cache and must be treated as read-only; writers should
+    build a new list (and new dicts for changed records) and pass it to :func:`write_list`.
+    """
+    try:
+        file = open(path, "rb")
+    except FileNotFoundError:
+        return []
+    with file:
+        key = _stat_key(os.fstat(file.fileno()))
+        with _CACHE_LOCK:
+            cached = _CACHE.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        data = json.loads(file.read() or b"[]")
+    if not isinstance(data, list):
+        data = []
+    with _CACHE_LOCK:
+        _CACHE[path] = (key, data)
+    return data
+
+
+def write_bytes(path: Path, payload: bytes) -> None:
+    """Atomically replace ``path`` with ``payload`` via an fsynced temp file and rename."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o644
+    fd, temp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as temp_file:
+            temp_file.write(payload)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.chmod(temp_name, mode)
+        os.replace(temp_name, path)
+    except BaseException:
+        try:
+            os.unlink(temp_name)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def write_list(path: Path, data: List[Dict[str, Any]]) -> None:
+    """Atomically replace the contents of ``path``. Callers must hold :func:`locked`."""
+    write_bytes(path, json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8"))
+    with _CACHE_LOCK:
+        _CACHE[path] = (_stat_key(os.stat(path)), data)
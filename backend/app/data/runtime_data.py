@@ -0,0 +1,113 @@
+"""Precompiled runtime data used by the serving process.
+
+The API only needs the symptom vocabulary, the severity weights and the per-disease
+descriptions/precautions. ``build_runtime_data.py`` compiles them from the CSV files into a
+single JSON artifact so that startup neither imports pandas nor parses the raw datasets.
+"""
+from __future__ import annotations
+
+import csv
+import json
+import logging
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from backend.app.core.config import get_settings
+from backend.app.ml.preprocess import normalize_symptom
+
+logger = logging.getLogger(__name__)
+
+RUNTIME_DATA_VERSION = 1
+
+
+def _read_rows(path: Path) -> List[Dict[str, str]]:
+    if not path.exists():
+        raise FileNotFoundError(f"Required data file not found: {path}")
+    with path.open(newline="", encoding="utf-8") as file:
+        reader = csv.DictReader(file)
+        reader.fieldnames = [name.strip() for name in reader.fieldnames or []]
+        return list(reader)
+
+
+def _present(value: Optional[str]) -> bool:
+    return bool(value and value.strip() and value.strip().lower() != "nan")
+
+
+def _dataset_vocabulary(rows: Iterable[Dict[str, str]]) -> List[str]:
+    symptoms: set[str] = set()
+    for row in rows:
+        for column, value in row.items():
+            if column.lower().startswith("symptom") and _present(value):
+                normalized = normalize_symptom(value)
+                if normalized:
+                    symptoms.add(normalized)
+    return sorted(symptoms)
+
+
+def iter_dataset_cases() -> Iterator[Tuple[str, List[str]]]:
+    """Yield ``(disease, normalized symptoms)`` for every row of ``dataset.csv``."""
+    for row in _read_rows(get_settings().dataset_path):
+        symptoms = [
+            normalize_symptom(value)
+            for column, value in row.items()
+            if column.lower().startswith("symptom") and _present(value)
+        ]
+        yield (row.get("Disease") or "").strip(), [symptom for symptom in symptoms if symptom]
+
+
+def compile_runtime_data(vocabulary: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """Compile the runtime artifact from the CSV datasets.
+
+    ``vocabulary`` should be the ``symptom_to_index`` keys of the diagnosis bundle; when omitted
+    it is derived from ``dataset.csv``.
+    """
+    settings = get_settings()
+    if vocabulary is None:
+        vocabulary = _dataset_vocabulary(_read_rows(settings.dataset_path))
+
+    severity_map: Dict[str, float] = {}
+    for row in _read_rows(settings.severity_path):
+        symptom = normalize_symptom(row.get("Symptom") or "")
+        if symptom and _present(row.get("weight")):
+            severity_map[symptom] = float(row["weight"])
+
+    descriptions = {
+        row.get("Disease", ""): (row.get("Description") or "").strip()
+        for row in _read_rows(settings.description_path)
+    }
+    diseases: Dict[str, Dict[str, Any]] = {}
+    for row in _read_rows(settings.precaution_path):
+        raw_disease = row.get("Disease", "")
+        precaution_columns = [column for column in row if column.lower().startswith("precaution")]
+        diseases[raw_disease.strip()] = {
+            "description": descriptions.get(raw_disease, ""),
+            "precautions": [row[column].strip() for column in precaution_columns if _present(row[column])],
+        }
+
+    return {
+        "version": RUNTIME_DATA_VERSION,
+        "vocabulary": sorted(vocabulary),
+        "severity_map": severity_map,
+        "diseases": diseases,
+    }
+
+
+def write_runtime_data(data: Dict[str, Any], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+
+
+@lru_cache
+def get_runtime_data() -> Dict[str, Any]:
+    """Load the compiled runtime artifact, compiling it in-process if it is missing or stale."""
+    settings = get_settings()
+    path = settings.runtime_data_path
+    if path.exists():
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data.get("version") == RUNTIME_DATA_VERSION:
+            return data
+        logger.warning("Runtime data %s has version %s; recompiling.", path, data.get("version"))
+    else:
+        logger.warning("Runtime data %s not found; compiling from CSV files.", path)
+    return compile_runtime_data()
@@ -0,0 +1,174 @@
+"""Append-only session store for bearer tokens.
+
+Sessions live in a newline-delimited JSON log separate from the user records, so logins never
+rewrite ``users.json`` and a user can hold several concurrent sessions. Each process replays the
+log into an in-memory map keyed by the SHA-256 of the token and only reads bytes appended since
+its last sync, so lookups and inserts are O(1). Expired sessions are ignored on lookup and
+physically dropped by :func:`sweep`, which rewrites the log atomically; other processes notice
+the new inode and replay it from the start.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import secrets
+import time
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Optional, Set
+
+from backend.app.core.config import get_settings
+from backend.app.data import json_store
+
+_LOCK = Lock()
+_STATE: Dict[str, Any] = {"path": None, "inode": None, "offset": 0, "records": 0}
+_SESSIONS: Dict[str, Dict[str, Any]] = {}
+_USER_SESSIONS: Dict[str, Set[str]] = {}
+
+
+def _hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _reset(path: Path, inode: Optional[int]) -> None:
+    _STATE.update(path=path, inode=inode, offset=0, records=0)
+    _SESSIONS.clear()
+    _USER_SESSIONS.clear()
+
+
+def _forget(token_hash: str) -> None:
+    session = _SESSIONS.pop(token_hash, None)
+    if session is not None:
+        _USER_SESSIONS.get(session["user_id"], set()).discard(token_hash)
+
+
+def _apply(record: Dict[str, Any]) -> None:
+    op = record.get("op")
+    if op == "create":
+        _SESSIONS[record["token_hash"]] = record
+        _USER_SESSIONS.setdefault(record["user_id"], set()).add(record["token_hash"])
+    elif op == "revoke":
+        _forget(record["token_hash"])
+    elif op == "revoke_user":
+        for token_hash in list(_USER_SESSIONS.pop(record["user_id"], set())):
+            _SESSIONS.pop(token_hash, None)
+
+
+def _sync(path: Path) -> None:
+    """Apply records appended to the log since the last sync. Requires ``_LOCK``."""
+    if _STATE["path"] != path:
+        _reset(path, None)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        _reset(path, None)
+        return
+    if stat.st_ino == _STATE["inode"] and stat.st_size == _STATE["offset"]:
+        return
+    with open(path, "rb") as file:
+        inode = os.fstat(file.fileno()).st_ino
+        if inode != _STATE["inode"] or os.fstat(file.fileno()).st_size < _STATE["offset"]:
+            _reset(path, inode)
+        file.seek(_STATE["offset"])
+        data = file.read()
+    complete = data.rfind(b"\n") + 1  # a concurrent writer may still be appending the last line
+    for line in data[:complete].splitlines():
+        if line.strip():
+            _apply(json.loads(line))
+            _STATE["records"] += 1
+    _STATE["offset"] += complete
+
+
+def _append(path: Path, record: Dict[str, Any]) -> None:
+    with json_store.locked(path):
+        with open(path, "ab") as file:
+            file.write(json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+
+def create_session(user_id: str, ttl_seconds: Optional[float] = None) -> str:
+    """Create a new session for ``user_id`` and return its bearer token."""
+    token = secrets.token_hex(24)
+    adopt_token(user_id, token, ttl_seconds)
+    return token
+
+
+def adopt_token(user_id: str, token: str, ttl_seconds: Optional[float] = None) -> None:
+    """Register an existing bearer ``token`` as a session of ``user_id``.
+
+    Used to carry over the single ``auth_token`` that user records held before sessions had
+    their own log (see ``user_store.migrate_legacy_tokens``).
+    """
+    settings = get_settings()
+    ttl = ttl_seconds if ttl_seconds is not None else settings.session_ttl_hours * 3600
+    now = time.time()
+    record = {
+        "op": "create",
+        "token_hash": _hash_token(token),
+        "user_id": user_id,
+        "created_at": now,
+        "expires_at": now + ttl,
+    }
+    _append(settings.session_store_path, record)
+    with _LOCK:
+        _sync(settings.session_store_path)
+
+
+def get_user_id(token: str) -> Optional[str]:
+    """Return the user id for a live session token, or ``None``."""
+    settings = get_settings()
+    token_hash = _hash_token(token)
+    with _LOCK:
+        _sync(settings.session_store_path)
+        session = _SESSIONS.get(token_hash)
+        if session is None:
+            return None
+        if session["expires_at"] <= time.time():
+            _forget(token_hash)  # lazy eviction; the log entry is dropped by the next sweep
+            return None
+        return session["user_id"]
+
+
+def revoke(token: str) -> bool:
+    """Revoke a single session. Returns ``False`` if it was not active."""
+    if get_user_id(token) is None:
+        return False
+    settings = get_settings()
+    _append(settings.session_store_path, {"op": "revoke", "token_hash": _hash_token(token)})
+    with _LOCK:
+        _sync(settings.session_store_path)
+    return True
+
+
+def revoke_user(user_id: str) -> None:
+    """Revoke every session belonging to ``user_id``."""
+    settings = get_settings()
+    _append(settings.session_store_path, {"op": "revoke_user", "user_id": user_id})
+    with _LOCK:
+        _sync(settings.session_store_path)
+
+
+def active_session_count(user_id: str) -> int:
+    settings = get_settings()
+    now = time.time()
+    with _LOCK:
+        _sync(settings.session_store_path)
+        return sum(1 for token_hash in _USER_SESSIONS.get(user_id, ()) if _SESSIONS[token_hash]["expires_at"] > now)
+
+
+def sweep() -> int:
+    """Rewrite the log with only live sessions. Returns the number of log records dropped."""
+    settings = get_settings()
+    path = settings.session_store_path
+    now = time.time()
+    with json_store.locked(path), _LOCK:
+        _sync(path)
+        live = [session for session in _SESSIONS.values() if session["expires_at"] > now]
+        dropped = _STATE["records"] - len(live)
+        payload = b"".join(json.dumps(session, separators=(",", ":")).encode("utf-8") + b"\n" for session in live)
+        json_store.write_bytes(path, payload)
+        _reset(path, None)
+        _sync(path)
+    return dropped
@@ -0,0 +1,261 @@
+"""Incrementally maintained severity rollups for timeline entries.
+
+Each rollup record aggregates the ``severity_score`` (``symptom`` is ``None``) or one symptom's
+``symptom_severity`` value for a user, entry type and day/week bucket as count, sum, min and
+max. ``timeline_store`` applies additions and removals to the affected buckets on every write,
+so trend queries read O(buckets) records instead of scanning entries. Records are located
+through a key -> position map kept for the current rollup list, so a write touches only the
+buckets of the entries it adds or removes. Sums are kept exactly as integer millionths
+(``sum_units``) so repeated additions and removals do not drift; ``sum`` is derived from them.
+
+Summary entries produced by retention compaction carry the aggregated stats of the raw entries
+they replace under ``summary``, so compaction leaves the rollups unchanged.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+from threading import Lock
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+GRANULARITIES = ("day", "week")
+SUM_SCALE = 1_000_000
+
+RollupKey = Tuple[Optional[str], str, str, str, Optional[str]]
+Stats = Tuple[int, float, float, float]  # count, sum, min, max
+
+
+def bucket_keys(occurred_at: Any) -> Optional[Dict[str, str]]:
+    try:
+        moment = datetime.fromisoformat(str(occurred_at))
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    day = moment.date()
+    week = day - timedelta(days=day.weekday())
+    return {"day": day.isoformat(), "week": week.isoformat()}
+
+
+def observations(entry: Dict[str, Any]) -> Iterator[Tuple[Optional[str], Stats]]:
+    """Yield ``(symptom, stats)`` for the entry's severity values; ``symptom`` is ``None`` for the score."""
+    summary = entry.get("summary")
+    if isinstance(summary, dict):
+        if summary.get("severity_score"):
+            yield None, _stats_from_dict(summary["severity_score"])
+        for symptom, stats in (summary.get("symptom_severity") or {}).items():
+            yield str(symptom), _stats_from_dict(stats)
+        return
+    score = entry.get("severity_score")
+    if isinstance(score, (int, float)):
+        yield None, (1, float(score), float(score), float(score))
+    for symptom, value in (entry.get("symptom_severity") or {}).items():
+        if isinstance(value, (int, float)):
+            yield str(symptom), (1, float(value), float(value), float(value))
+
+
+def _stats_from_dict(stats: Dict[str, Any]) -> Stats:
+    return int(stats["count"]), float(stats["sum"]), float(stats["min"]), float(stats["max"])
+
+
+def stats_dict(stats: Stats) -> Dict[str, Any]:
+    count, total, low, high = stats
+    return {"count": count, "sum": total, "min": low, "max": high}
+
+
+def merge_stats(left: Optional[Stats], right: Stats) -> Stats:
+    if left is None:
+        return right
+    return left[0] + right[0], left[1] + right[1], min(left[2], right[2]), max(left[3], right[3])
+
+
+def _contributions(entry: Dict[str, Any]) -> Iterator[Tuple[RollupKey, Stats]]:
+    buckets = bucket_keys(entry.get("occurred_at"))
+    if buckets is None:
+        return
+    entry_type = entry.get("entry_type") or "case"
+    for symptom, stats in observations(entry):
+        for granularity in GRANULARITIES:
+            yield (entry.get("user_id"), entry_type, granularity, buckets[granularity], symptom), stats
+
+
+def _key(record: Dict[str, Any]) -> RollupKey:
+    return (
+        record.get("user_id"),
+        record["entry_type"],
+        record["granularity"],
+        record["bucket"],
+        record.get("symptom"),
+    )
+
+
+def _to_units(total: float) -> int:
+    return round(total * SUM_SCALE)
+
+
+def _units(record: Dict[str, Any]) -> int:
+    units = record.get("sum_units")
+    return units if isinstance(units, int) else _to_units(record["sum"])  # records written before sum_units
+
+
+def _record(key: RollupKey, count: int, units: int, low: float, high: float) -> Dict[str, Any]:
+    user_id, entry_type, granularity, bucket, symptom = key
+    return {
+        "user_id": user_id,
+        "entry_type": entry_type,
+        "granularity": granularity,
+        "bucket": bucket,
+        "symptom": symptom,
+        "count": count,
+        "sum": units / SUM_SCALE,
+        "sum_units": units,
+        "min": low,
+        "max": high,
+    }
+
+
+_POSITIONS_LOCK = Lock()
+_POSITIONS: Tuple[Optional[List[Dict[str, Any]]], Dict[RollupKey, int]] = (None, {})
+
+
+def _positions(rollups: List[Dict[str, Any]]) -> Dict[RollupKey, int]:
+    """Key -> index map of ``rollups``, rebuilt only when a different list is passed in.
+
+    ``timeline_store`` passes the list it last wrote (``json_store`` caches it), so the map is
+    usually carried over from the previous write instead of being rebuilt.
+    """
+    with _POSITIONS_LOCK:
+        cached, positions = _POSITIONS
+        if cached is rollups:
+            return positions
+    positions = {_key(record): index for index, record in enumerate(rollups)}
+    _remember(rollups, positions)
+    return positions
+
+
+def _remember(rollups: List[Dict[str, Any]], positions: Dict[RollupKey, int]) -> None:
+    global _POSITIONS
+    with _POSITIONS_LOCK:
+        _POSITIONS = (rollups, positions)
+
+
+def rebuild(entries: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Compute all rollups from scratch; used for backfill and repair."""
+    table: Dict[RollupKey, Tuple[int, int, float, float]] = {}
+    for entry in entries:
+        for key, (count, total, low, high) in _contributions(entry):
+            current = table.get(key)
+            units = _to_units(total)
+            if current is not None:
+                count, units = current[0] + count, current[1] + units
+                low, high = min(current[2], low), max(current[3], high)
+            table[key] = (count, units, low, high)
+    return [_record(key, *stats) for key, stats in table.items()]
+
+
+def add(rollups: List[Dict[str, Any]], added: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Return a new rollup list with the contributions of newly added entries applied."""
+    positions = dict(_positions(rollups))
+    updated = list(rollups)  # records themselves are shared; changed ones are replaced
+    for entry in added:
+        for key, (count, total, low, high) in _contributions(entry):
+            index = positions.get(key)
+            if index is None:
+                positions[key] = len(updated)
+                updated.append(_record(key, count, _to_units(total), low, high))
+                continue
+            current = updated[index]
+            updated[index] = _record(
+                key,
+                current["count"] + count,
+                _units(current) + _to_units(total),
+                min(current["min"], low),
+                max(current["max"], high),
+            )
+    _remember(updated, positions)
+    return updated
+
+
+def remove(
+    rollups: List[Dict[str, Any]],
+    removed: Iterable[Dict[str, Any]],
+    remaining: Iterable[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """Return a new rollup list with the contributions of ``removed`` entries taken out.
+
+    Counts and sums are decremented exactly. A bucket whose count reaches zero is dropped. Its
+    min and max are recomputed from ``remaining`` only when a removed value was one of them,
+    since extremes cannot be decremented.
+    """
+    positions = _positions(rollups)
+    changed: Dict[int, Optional[Dict[str, Any]]] = {}
+    stale: set[RollupKey] = set()
+    for entry in removed:
+        for key, (count, total, low, high) in _contributions(entry):
+            index = positions.get(key)
+            current = changed.get(index, rollups[index]) if index is not None else None
+            if current is None:
+                continue
+            if current["count"] <= count:
+                changed[index] = None
+                stale.discard(key)
+                continue
+            changed[index] = _record(
+                key, current["count"] - count, _units(current) - _to_units(total), current["min"], current["max"]
+            )
+            if low <= current["min"] or high >= current["max"]:
+                stale.add(key)
+    if stale:
+        extremes: Dict[RollupKey, Stats] = {}
+        for entry in remaining:
+            for key, stats in _contributions(entry):
+                if key in stale:
+                    extremes[key] = merge_stats(extremes.get(key), stats)
+        for key in stale:
+            if key in extremes:
+                _, _, low, high = extremes[key]
+                index = positions[key]
+                changed[index] = {**changed[index], "min": low, "max": high}
+    if not changed:
+        return rollups
+    positions = dict(positions)
+    updated = list(rollups)
+    for index, record in changed.items():
+        if record is not None:
+            updated[index] = record
+    # Emptied buckets are swapped with the last record, so only that record's position changes.
+    for index in sorted((index for index, record in changed.items() if record is None), reverse=True):
+        del positions[_key(updated[index])]
+        last = updated.pop()
+        if index < len(updated):
+            updated[index] = last
+            positions[_key(last)] = index
+    _remember(updated, positions)
+    return updated
+
+
+def trend(
+    records: Iterable[Dict[str, Any]],
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> List[Dict[str, Any]]:
+    """Merge rollup records into one point per bucket, ordered by bucket."""
+    merged: Dict[str, Dict[str, Any]] = {}
+    start_key = start.isoformat() if start else None
+    end_key = end.isoformat() if end else None
+    for record in records:
+        bucket = record["bucket"]
+        if (start_key and bucket < start_key) or (end_key and bucket > end_key):
+            continue
+        point = merged.get(bucket)
+        if point is None:
+            merged[bucket] = {**{key: record[key] for key in ("bucket", "count", "min", "max")}, "units": _units(record)}
+            continue
+        point["count"] += record["count"]
+        point["units"] += _units(record)
+        point["min"] = min(point["min"], record["min"])
+        point["max"] = max(point["max"], record["max"])
+    points = []
+    for _, point in sorted(merged.items()):
+        total = point.pop("units") / SUM_SCALE
+        points.append({**point, "sum": total, "mean": total / point["count"] if point["count"] else 0.0})
+    return points
@@ -1,90 +1,471 @@
-"""Simple file-backed storage for symptom timeline entries."""
+"""Simple file-backed storage for symptom timeline entries.
+
+Every write stamps the affected entries with a store-wide, monotonically increasing ``version``;
+deletions leave a tombstone carrying the version at which they happened. A user's timeline
+version is the highest version among their entries and tombstones, which backs ETags and the
+``since=<version>`` delta sync. Compaction prunes tombstones older than the retention window and
+keeps one ``horizon`` record per user with the newest pruned version; a delta request from before
+the horizon raises :class:`ChangesExpired` and the client must reload the full timeline. Severity
+rollups (see ``timeline_rollups``) are kept in a second sibling file and updated under the same
+lock as the entries.
+"""
 from __future__ import annotations
 
 import json
-from datetime import datetime, timezone
+import time
+import uuid
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
 from threading import Lock
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
 
 from backend.app.core.config import get_settings
+from backend.app.data import json_store, timeline_rollups
+
+_INDEX_CACHE_SIZE = 1024
+_INDEX_CACHE: "OrderedDict[str, Tuple[Tuple[List[Dict[str, Any]], ...], _UserIndex]]" = OrderedDict()
+_INDEX_LOCK = Lock()
+
+SortKey = Tuple[str, str]
+
+
+class _UserIndex(NamedTuple):
+    keys: List[SortKey]  # ascending (occurred_at, id)
+    entries: List[Dict[str, Any]]  # aligned with ``keys``
+    versions: List[int]  # ascending entry versions
+    by_version: List[Dict[str, Any]]  # aligned with ``versions``
+    tombstones: List[Dict[str, Any]]  # ascending by version
+    horizon: int  # newest pruned tombstone version; deltas from before it are incomplete
+    rollups: Dict[Tuple[str, Optional[str]], List[Dict[str, Any]]]  # (granularity, symptom) -> records
+    version: int
 
-_LOCK = Lock()
 
+class ChangesExpired(ValueError):
+    """The requested ``since`` version predates the retained deletion history."""
 
-def _ensure_file(path: Path) -> None:
-    if not path.parent.exists():
-        path.parent.mkdir(parents=True, exist_ok=True)
-    if not path.exists():
-        path.write_text("[]", encoding="utf-8")
+
+class TimelineDelta(NamedTuple):
+    upserted: List[Dict[str, Any]]
+    deleted_ids: List[str]
+    version: int
 
 
 def _read_entries(path: Path) -> List[Dict[str, Any]]:
-    _ensure_file(path)
-    data = json.loads(path.read_text(encoding="utf-8"))
-    if isinstance(data, list):
-        return data
-    return []
+    return json_store.read_list(path)
 
 
 def _write_entries(path: Path, entries: List[Dict[str, Any]]) -> None:
-    _ensure_file(path)
-    path.write_text(json.dumps(entries, ensure_ascii=False, indent=2), encoding="utf-8")
+    json_store.write_list(path, entries)
 
 
-def _filter_for_user(entries: List[Dict[str, Any]], user_id: str) -> List[Dict[str, Any]]:
+def _tombstone_path(path: Path) -> Path:
+    return path.with_name(f"{path.stem}_tombstones{path.suffix}")
+
+
+def _rollup_path(path: Path) -> Path:
+    return path.with_name(f"{path.stem}_rollups{path.suffix}")
+
+
+def _load_rollups(path: Path, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Return stored rollups, backfilling them from ``entries`` if none exist. Requires the lock."""
+    rollup_path = _rollup_path(path)
+    if rollup_path.exists():
+        return _read_entries(rollup_path)
+    return timeline_rollups.rebuild(entries)
+
+
+def _visible_to(record: Dict[str, Any], user_id: str) -> bool:
     # Legacy entries without a user_id are returned to signed-in users for backward compatibility.
-    return [entry for entry in entries if entry.get("user_id") == user_id or entry.get("user_id") is None]
+    return record.get("user_id") == user_id or record.get("user_id") is None
+
+
+def _filter_for_user(entries: List[Dict[str, Any]], user_id: str) -> List[Dict[str, Any]]:
+    return [entry for entry in entries if _visible_to(entry, user_id)]
+
+
+def sort_key(entry: Dict[str, Any]) -> SortKey:
+    return str(entry.get("occurred_at") or ""), str(entry.get("id") or "")
+
+
+def _version(record: Dict[str, Any]) -> int:
+    value = record.get("version")
+    return value if isinstance(value, int) else 0
+
+
+def _build_index(
+    entries: List[Dict[str, Any]],
+    tombstones: List[Dict[str, Any]],
+    rollups: List[Dict[str, Any]],
+    user_id: str,
+) -> _UserIndex:
+    visible = sorted(_filter_for_user(entries, user_id), key=sort_key)
+    by_version = sorted(visible, key=_version)
+    user_tombstones = sorted(_filter_for_user(tombstones, user_id), key=_version)
+    horizon = max((_version(record) for record in user_tombstones if record.get("horizon")), default=0)
+    user_tombstones = [record for record in user_tombstones if not record.get("horizon")]
+    latest = max(
+        _version(by_version[-1]) if by_version else 0,
+        _version(user_tombstones[-1]) if user_tombstones else 0,
+        horizon,
+    )
+    user_rollups: Dict[Tuple[str, Optional[str]], List[Dict[str, Any]]] = {}
+    for record in _filter_for_user(rollups, user_id):
+        user_rollups.setdefault((record["granularity"], record.get("symptom")), []).append(record)
+    return _UserIndex(
+        keys=[sort_key(entry) for entry in visible],
+        entries=visible,
+        versions=[_version(entry) for entry in by_version],
+        by_version=by_version,
+        tombstones=user_tombstones,
+        horizon=horizon,
+        rollups=user_rollups,
+        version=latest,
+    )
+
+
+def _user_index(user_id: str) -> _UserIndex:
+    """Return the per-user index, rebuilt only when a backing file has changed."""
+    settings = get_settings()
+    sources = (
+        _read_entries(settings.timeline_log_path),
+        _read_entries(_tombstone_path(settings.timeline_log_path)),
+        _read_entries(_rollup_path(settings.timeline_log_path)),
+    )
+    with _INDEX_LOCK:
+        cached = _INDEX_CACHE.get(user_id)
+        if cached is not None and all(current is previous for current, previous in zip(sources, cached[0])):
+            _INDEX_CACHE.move_to_end(user_id)
+            return cached[1]
+    index = _build_index(*sources, user_id)
+    with _INDEX_LOCK:
+        _INDEX_CACHE[user_id] = (sources, index)
+        _INDEX_CACHE.move_to_end(user_id)
+        while len(_INDEX_CACHE) > _INDEX_CACHE_SIZE:
+            _INDEX_CACHE.popitem(last=False)
+    return index
+
+
+def _next_version(entries: List[Dict[str, Any]], tombstones: List[Dict[str, Any]]) -> int:
+    return max((_version(record) for record in [*entries, *tombstones]), default=0) + 1
+
+
+def _remove(predicate) -> int:
+    """Delete matching entries, recording tombstones. Returns the number of removed entries."""
+    settings = get_settings()
+    tombstone_path = _tombstone_path(settings.timeline_log_path)
+    with json_store.locked(settings.timeline_log_path):
+        entries = _read_entries(settings.timeline_log_path)
+        tombstones = _read_entries(tombstone_path)
+        removed = [entry for entry in entries if predicate(entry)]
+        if not removed:
+            return 0
+        remaining = [entry for entry in entries if not predicate(entry)]
+        version = _next_version(entries, tombstones)
+        deleted_at = now_iso()
+        new_tombstones = [
+            {"id": entry.get("id"), "user_id": entry.get("user_id"), "version": version, "deleted_at": deleted_at}
+            for entry in removed
+        ]
+        rollups = timeline_rollups.remove(_load_rollups(settings.timeline_log_path, entries), removed, remaining)
+        # Tombstones are committed first so a crash can only over-report deletions to delta clients.
+        json_store.write_list(tombstone_path, [*tombstones, *new_tombstones])
+        json_store.write_list(_rollup_path(settings.timeline_log_path), rollups)
+        _write_entries(settings.timeline_log_path, remaining)
+    return len(removed)
 
 
 def list_entries(user_id: str) -> List[Dict[str, Any]]:
     """Return stored timeline entries for a user sorted by occurrence time descending."""
+    return list(reversed(_user_index(user_id).entries))
+
+
+def iter_entries(user_id: str) -> Iterator[Dict[str, Any]]:
+    """Yield the user's entries newest first without copying the timeline."""
+    entries = _user_index(user_id).entries
+    for position in range(len(entries) - 1, -1, -1):
+        yield entries[position]
+
+
+def iter_labeled_cases() -> Iterator[Tuple[str, List[str]]]:
+    """Yield ``(top_prediction, symptoms)`` for every user's case entries, without user data."""
+    for entry in _read_entries(get_settings().timeline_log_path):
+        if entry.get("entry_type", "case") == "case" and entry.get("top_prediction") and entry.get("symptoms"):
+            yield entry["top_prediction"], list(entry["symptoms"])
+
+
+def list_page(user_id: str, limit: int, cursor: Optional[SortKey] = None) -> Tuple[List[Dict[str, Any]], Optional[SortKey]]:
+    """Return up to ``limit`` entries older than ``cursor`` (newest first) and the next cursor."""
+    index = _user_index(user_id)
+    end = len(index.keys) if cursor is None else bisect_left(index.keys, cursor)
+    start = max(end - limit, 0)
+    page = list(reversed(index.entries[start:end]))
+    next_cursor = index.keys[start] if start > 0 and page else None
+    return page, next_cursor
+
+
+def changes_since(user_id: str, since: int) -> TimelineDelta:
+    """Return entries written and ids deleted after version ``since``.
+
+    Raises :class:`ChangesExpired` if tombstones after ``since`` may already have been pruned.
+    """
+    index = _user_index(user_id)
+    if since < index.horizon:
+        raise ChangesExpired(f"Changes since version {since} are no longer available")
+    upserted = index.by_version[bisect_right(index.versions, since) :]
+    deleted_ids = [str(tombstone.get("id")) for tombstone in index.tombstones if _version(tombstone) > since]
+    return TimelineDelta(
+        upserted=sorted(upserted, key=sort_key, reverse=True),
+        deleted_ids=deleted_ids,
+        version=index.version,
+    )
+
+
+def trends(
+    user_id: str,
+    granularity: str,
+    entry_type: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> Dict[Optional[str], List[Dict[str, Any]]]:
+    """Return severity trend points per bucket, keyed by symptom (``None`` is the overall score)."""
+    settings = get_settings()
+    if not _rollup_path(settings.timeline_log_path).exists():
+        rebuild_rollups()
+    index = _user_index(user_id)
+    series: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for (record_granularity, symptom), records in index.rollups.items():
+        if record_granularity != granularity:
+            continue
+        if entry_type is not None:
+            records = [record for record in records if record["entry_type"] == entry_type]
+        points = timeline_rollups.trend(records, start, end)
+        if points:
+            series[symptom] = points
+    return series
+
+
+def rebuild_rollups() -> None:
+    """Recompute all severity rollups from the stored entries."""
     settings = get_settings()
-    with _LOCK:
+    with json_store.locked(settings.timeline_log_path):
         entries = _read_entries(settings.timeline_log_path)
-    filtered = _filter_for_user(entries, user_id)
-    try:
-        return sorted(filtered, key=lambda item: item.get("occurred_at", ""), reverse=True)
-    except Exception:
-        return filtered
+        json_store.write_list(_rollup_path(settings.timeline_log_path), timeline_rollups.rebuild(entries))
+
+
+def user_version(user_id: str) -> int:
+    """Return the version of the user's timeline; it changes whenever the timeline does."""
+    return _user_index(user_id).version
 
 
 def add_entry(entry: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+    return add_entries([entry], user_id)[0]
+
+
+def add_entries(new_entries: List[Dict[str, Any]], user_id: str) -> List[Dict[str, Any]]:
+    """Append several entries for a user in a single commit; they share one version.
+
+    Ids are unique across all users: an entry whose id is already taken (e.g. an imported id
+    that another user's entry uses) is stored under a new id.
+    """
     settings = get_settings()
-    with _LOCK:
+    with json_store.locked(settings.timeline_log_path):
         entries = _read_entries(settings.timeline_log_path)
-        entry_with_user = {**entry, "user_id": user_id}
-        entries.append(entry_with_user)
-        _write_entries(settings.timeline_log_path, entries)
-    return entry_with_user
+        tombstones = _read_entries(_tombstone_path(settings.timeline_log_path))
+        version = _next_version(entries, tombstones)
+        taken = {entry.get("id") for entry in entries}
+        stored = []
+        for entry in new_entries:
+            entry_id = entry.get("id")
+            if entry_id in taken:
+                entry_id = str(uuid.uuid4())
+            taken.add(entry_id)
+            stored.append({**entry, "id": entry_id, "user_id": user_id, "version": version})
+        rollups = timeline_rollups.add(_load_rollups(settings.timeline_log_path, entries), stored)
+        json_store.write_list(_rollup_path(settings.timeline_log_path), rollups)
+        _write_entries(settings.timeline_log_path, [*entries, *stored])
+    return stored
+
+
+def existing_ids(user_id: str) -> set[str]:
+    return {str(entry.get("id")) for entry in _user_index(user_id).entries}
 
 
 def delete_entry(entry_id: str, user_id: str) -> bool:
-    settings = get_settings()
-    with _LOCK:
-        entries = _read_entries(settings.timeline_log_path)
-        filtered = [
-            entry for entry in entries if not (entry.get("id") == entry_id and entry.get("user_id") in {user_id, None})
-        ]
-        deleted = len(filtered) != len(entries)
-        if deleted:
-            _write_entries(settings.timeline_log_path, filtered)
-    return deleted
+    return _remove(lambda entry: entry.get("id") == entry_id and entry.get("user_id") in {user_id, None}) > 0
 
 
 def clear_entries(user_id: str) -> None:
+    _remove(lambda entry: entry.get("user_id") in {user_id, None})
+
+
+def _parse_time(value: Any) -> Optional[datetime]:
+    try:
+        moment = datetime.fromisoformat(str(value))
+    except (TypeError, ValueError):
+        return None
+    return moment if moment.tzinfo is not None else moment.replace(tzinfo=timezone.utc)
+
+
+def _summarize(group: List[Dict[str, Any]], version: int) -> Dict[str, Any]:
+    """Collapse same-day tracker entries into one summary entry that preserves their severity stats."""
+    ordered = sorted(group, key=sort_key)
+    stats: Dict[Optional[str], timeline_rollups.Stats] = {}
+    for entry in ordered:
+        for symptom, entry_stats in timeline_rollups.observations(entry):
+            stats[symptom] = timeline_rollups.merge_stats(stats.get(symptom), entry_stats)
+    raw_count = sum(int((entry.get("summary") or {}).get("count", 1)) for entry in ordered)
+    notes: List[Dict[str, Any]] = []
+    for entry in ordered:
+        if isinstance(entry.get("summary"), dict):
+            notes.extend(entry["summary"].get("notes") or [])
+        elif entry.get("notes"):
+            notes.append({"occurred_at": entry.get("occurred_at"), "text": entry["notes"]})
+    first_occurred_at = (ordered[0].get("summary") or {}).get("first_occurred_at", ordered[0].get("occurred_at"))
+    score = stats.pop(None, None)
+    summary_entry: Dict[str, Any] = {
+        "id": str(uuid.uuid4()),
+        "symptoms": list(dict.fromkeys(symptom for entry in ordered for symptom in entry.get("symptoms", []))),
+        "notes": f"Summary of {raw_count} tracker check-ins",
+        "occurred_at": ordered[-1].get("occurred_at"),
+        "user_id": ordered[-1].get("user_id"),
+        "entry_type": "tracker",
+        "version": version,
+        "summary": {
+            "count": raw_count,
+            "first_occurred_at": first_occurred_at,
+            "severity_score": timeline_rollups.stats_dict(score) if score else None,
+            "symptom_severity": {symptom: timeline_rollups.stats_dict(value) for symptom, value in stats.items()},
+            "notes": notes,
+        },
+    }
+    if score:
+        summary_entry["severity_score"] = score[1] / score[0]
+    if stats:
+        summary_entry["symptom_severity"] = {symptom: value[1] / value[0] for symptom, value in stats.items()}
+    return summary_entry
+
+
+def _prune_tombstones(tombstones: List[Dict[str, Any]], cutoff: datetime) -> Tuple[List[Dict[str, Any]], int]:
+    """Drop tombstones deleted before ``cutoff``, folding them into per-user horizon records.
+
+    Tombstones written before deletions were timestamped are stamped now and pruned once they
+    age past the cutoff. Returns the new tombstone list and the number of tombstones pruned.
+    """
+    horizons: Dict[Optional[str], int] = {}
+    kept: List[Dict[str, Any]] = []
+    pruned = 0
+    stamp = now_iso()
+    for tombstone in tombstones:
+        user_id = tombstone.get("user_id")
+        if tombstone.get("horizon"):
+            horizons[user_id] = max(horizons.get(user_id, 0), _version(tombstone))
+            continue
+        deleted_at = _parse_time(tombstone.get("deleted_at")) if tombstone.get("deleted_at") else None
+        if deleted_at is None:
+            kept.append({**tombstone, "deleted_at": stamp})
+        elif deleted_at < cutoff:
+            horizons[user_id] = max(horizons.get(user_id, 0), _version(tombstone))
+            pruned += 1
+        else:
+            kept.append(tombstone)
+    horizon_records = [{"user_id": user_id, "version": version, "horizon": True} for user_id, version in horizons.items()]
+    return [*horizon_records, *kept], pruned
+
+
+def _parse_ms(path: Path) -> float:
+    start = time.perf_counter()
+    if path.exists():
+        json.loads(path.read_bytes())
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def _compaction_marker_path(path: Path) -> Path:
+    return path.with_name(f"{path.stem}_compacted")
+
+
+def compact(
+    retention_days: int, now: Optional[datetime] = None, min_interval_seconds: float = 0.0
+) -> Dict[str, Any]:
+    """Downsample tracker entries older than ``retention_days`` into one summary per user and day.
+
+    Case entries and recent tracker entries are kept verbatim. Summaries carry the aggregated
+    severity stats of the entries they replace, so trends are unaffected; replaced entries get
+    tombstones so delta-sync clients drop them. The notes of replaced check-ins are kept under
+    ``summary["notes"]``. Tombstones older than ``retention_days`` are pruned (see
+    :func:`_prune_tombstones`). Runs under the store lock for its whole duration and commits
+    atomically, so it is safe to run while requests are being served.
+
+    Every worker process runs its own compaction job over the same log. A run that finds that
+    any process completed one less than ``min_interval_seconds`` ago returns without work (its
+    report has ``skipped=True``).
+    """
     settings = get_settings()
-    with _LOCK:
-        entries = _read_entries(settings.timeline_log_path)
-        remaining = [entry for entry in entries if entry.get("user_id") not in {user_id, None}]
-        _write_entries(settings.timeline_log_path, remaining)
+    path = settings.timeline_log_path
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=retention_days)
+    report: Dict[str, Any] = {"retention_days": retention_days, "cutoff": cutoff.isoformat()}
+    marker = _compaction_marker_path(path)
+    with json_store.locked(path):
+        try:
+            since_last = time.time() - marker.stat().st_mtime
+        except FileNotFoundError:
+            since_last = None
+        if since_last is not None and since_last < min_interval_seconds:
+            report.update(skipped=True, seconds_since_last=round(since_last, 1))
+            return report
+        entries = _read_entries(path)
+        tombstones = _read_entries(_tombstone_path(path))
+        bytes_before = path.stat().st_size if path.exists() else 0
+        parse_ms_before = _parse_ms(path)
+        groups: Dict[Tuple[Optional[str], str], List[Dict[str, Any]]] = {}
+        for entry in entries:
+            if entry.get("entry_type") != "tracker":
+                continue
+            moment = _parse_time(entry.get("occurred_at"))
+            if moment is None or moment >= cutoff:
+                continue
+            day = moment.astimezone(timezone.utc).date().isoformat()
+            groups.setdefault((entry.get("user_id"), day), []).append(entry)
+        groups = {key: group for key, group in groups.items() if len(group) > 1}
+        replaced = {id(entry) for group in groups.values() for entry in group}
+        kept_tombstones, tombstones_pruned = _prune_tombstones(tombstones, cutoff)
+        if replaced:
+            version = _next_version(entries, tombstones)
+            summaries = [_summarize(group, version) for group in groups.values()]
+            deleted_at = now_iso()
+            new_tombstones = [
+                {"id": entry.get("id"), "user_id": entry.get("user_id"), "version": version, "deleted_at": deleted_at}
+                for group in groups.values()
+                for entry in group
+            ]
+            json_store.write_list(_tombstone_path(path), [*kept_tombstones, *new_tombstones])
+            _write_entries(path, [*(entry for entry in entries if id(entry) not in replaced), *summaries])
+        elif kept_tombstones != tombstones:
+            json_store.write_list(_tombstone_path(path), kept_tombstones)
+        bytes_after = path.stat().st_size if path.exists() else 0
+        report.update(
+            entries_before=len(entries),
+            entries_after=len(entries) - len(replaced) + len(groups),
+            entries_summarized=len(replaced),
+            summaries_created=len(groups),
+            tombstones_pruned=tombstones_pruned,
+            bytes_before=bytes_before,
+            bytes_after=bytes_after,
+            bytes_reclaimed=bytes_before - bytes_after,
+            parse_ms_before=parse_ms_before,
+            parse_ms_after=_parse_ms(path),
+            skipped=False,
+        )
+        marker.touch()
+    return report
 
 
 def last_entry_timestamp(user_id: str) -> Optional[datetime]:
-    entries = list_entries(user_id)
+    entries = _user_index(user_id).entries
     if not entries:
         return None
-    latest = entries[0].get("occurred_at")
+    latest = entries[-1].get("occurred_at")
     if not latest:
         return None
     try:
@@ -94,15 +475,11 @@ def last_entry_timestamp(user_id: str) -> Optional[datetime]:
 
 
 def entry_count(user_id: str) -> int:
-    return len(list_entries(user_id))
+    return len(_user_index(user_id).entries)
 
 
 def has_data(user_id: str) -> bool:
-    settings = get_settings()
-    with _LOCK:
-        _ensure_file(settings.timeline_log_path)
-        entries = _read_entries(settings.timeline_log_path)
-    return len(_filter_for_user(entries, user_id)) > 0
+    return entry_count(user_id) > 0
 
 
 def entries_by_id(user_id: str) -> Dict[str, Dict[str, Any]]:
@@ -1,38 +1,25 @@
-"""File-backed user store with token-based authentication."""
+"""File-backed user store. Sessions and tokens live in ``session_store``."""
 from __future__ import annotations
 
 import hashlib
-import json
 import secrets
 import uuid
 from datetime import datetime, timezone
 from pathlib import Path
-from threading import Lock
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from backend.app.core.config import get_settings
+from backend.app.data import json_store
 
-_LOCK = Lock()
-
-
-def _ensure_file(path: Path) -> None:
-    if not path.parent.exists():
-        path.parent.mkdir(parents=True, exist_ok=True)
-    if not path.exists():
-        path.write_text("[]", encoding="utf-8")
+_ID_INDEX: Tuple[Optional[List[Dict[str, Any]]], Dict[str, Dict[str, Any]]] = (None, {})
 
 
 def _read_users(path: Path) -> List[Dict[str, Any]]:
-    _ensure_file(path)
-    data = json.loads(path.read_text(encoding="utf-8"))
-    if isinstance(data, list):
-        return data
-    return []
+    return json_store.read_list(path)
 
 
 def _write_users(path: Path, users: List[Dict[str, Any]]) -> None:
-    _ensure_file(path)
-    path.write_text(json.dumps(users, ensure_ascii=False, indent=2), encoding="utf-8")
+    json_store.write_list(path, users)
 
 
 def _normalize_email(email: str) -> str:
@@ -49,7 +36,7 @@ def create_user(name: str, email: str, password: str) -> Dict[str, Any]:
     """Create a new user if the email is unused."""
     normalized_email = _normalize_email(email)
     settings = get_settings()
-    with _LOCK:
+    with json_store.locked(settings.user_store_path):
         users = _read_users(settings.user_store_path)
         if any(user.get("email") == normalized_email for user in users):
             raise ValueError("Email already registered")
@@ -61,10 +48,8 @@ def create_user(name: str, email: str, password: str) -> Dict[str, Any]:
             "salt": salt,
             "password_hash": password_hash,
             "created_at": datetime.now(timezone.utc).isoformat(),
-            "auth_token": None,
         }
-        users.append(user)
-        _write_users(settings.user_store_path, users)
+        _write_users(settings.user_store_path, [*users, user])
     return user
 
 
@@ -72,53 +57,52 @@ def authenticate(email: str, password: str) -> Optional[Dict[str, Any]]:
     """Validate credentials and return the user dict if valid."""
     normalized_email = _normalize_email(email)
     settings = get_settings()
-    with _LOCK:
-        users = _read_users(settings.user_store_path)
-        for user in users:
-            if user.get("email") != normalized_email:
-                continue
-            salt = user.get("salt")
-            if not salt:
-                continue
-            _, password_hash = _hash_password(password, salt)
-            if password_hash == user.get("password_hash"):
-                return user
-    return None
-
-
-def issue_token(user_id: str) -> str:
-    """Create and persist a new auth token for the user."""
-    settings = get_settings()
-    with _LOCK:
-        users = _read_users(settings.user_store_path)
-        for user in users:
-            if user.get("id") == user_id:
-                token = secrets.token_hex(24)
-                user["auth_token"] = token
-                _write_users(settings.user_store_path, users)
-                return token
-    raise ValueError("User not found")
-
-
-def get_user_by_token(token: str) -> Optional[Dict[str, Any]]:
-    """Return user dict for the provided token."""
-    settings = get_settings()
-    with _LOCK:
-        users = _read_users(settings.user_store_path)
-        for user in users:
-            if user.get("auth_token") == token:
-                return user
+    users = _read_users(settings.user_store_path)
+    for user in users:
+        if user.get("email") != normalized_email:
+            continue
+        salt = user.get("salt")
+        if not salt:
+            continue
+        _, password_hash = _hash_password(password, salt)
+        if password_hash == user.get("password_hash"):
+            return user
     return None
 
 
 def get_user_by_id(user_id: str) -> Optional[Dict[str, Any]]:
     settings = get_settings()
-    with _LOCK:
-        users = _read_users(settings.user_store_path)
-        for user in users:
-            if user.get("id") == user_id:
-                return user
-    return None
+    users = _read_users(settings.user_store_path)
+    return _id_index(users).get(user_id)
+
+
+def _id_index(users: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    # The store returns the same list object until the file changes, so key the index on it.
+    global _ID_INDEX
+    source, index = _ID_INDEX
+    if source is not users:
+        index = {user["id"]: user for user in users if user.get("id")}
+        _ID_INDEX = (users, index)
+    return index
+
+
+def migrate_legacy_tokens(adopt: Callable[[str, str], None]) -> int:
+    """Move ``auth_token`` values left in user records into the session store.
+
+    Each token is handed to ``adopt(user_id, token)`` before the records are rewritten without
+    it, so a crash in between only re-imports the same tokens on the next start. Returns the
+    number of tokens migrated; 0 once the file is clean.
+    """
+    path = get_settings().user_store_path
+    with json_store.locked(path):
+        users = _read_users(path)
+        legacy = [user for user in users if user.get("auth_token")]
+        if not legacy and not any("auth_token" in user for user in users):
+            return 0
+        for user in legacy:
+            adopt(user["id"], user["auth_token"])
+        _write_users(path, [{key: value for key, value in user.items() if key != "auth_token"} for user in users])
+    return len(legacy)
 
 
 def public_user_dict(user: Dict[str, Any]) -> Dict[str, Any]:
@@ -2,16 +2,22 @@
 from __future__ import annotations
 
 import logging
+from threading import Event, Thread
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from backend.app.core import profiling, rate_limit, warmup
 from backend.app.core.config import get_settings
-from backend.app.ml import inference
-from backend.app.routes import auth, healthcheck, predict, privacy, symptoms, timeline
+from backend.app.data import event_store, session_store, timeline_store, user_store
+from backend.app.ml import inference, shadow, similar_cases
+from backend.app.routes import analytics, auth, cases, feedback, healthcheck, predict, privacy, symptoms, timeline
+from backend.app.routes import profiling as profiling_routes
+from backend.app.routes import shadow as shadow_routes
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
+_shutdown = Event()
 
 app = FastAPI(title=settings.app_name)
 
@@ -24,20 +30,148 @@ app.add_middleware(
 )
 
 app.include_router(healthcheck.router)
-app.include_router(auth.router)
-app.include_router(predict.router)
-app.include_router(symptoms.router)
-app.include_router(timeline.router)
-app.include_router(privacy.router)
+# Every API call is charged to the caller's standard budget; see core/rate_limit.py.
+_standard_budget = [Depends(rate_limit.rate_limited("standard"))]
+app.include_router(auth.router, dependencies=_standard_budget)
+app.include_router(predict.router, dependencies=_standard_budget)
+app.include_router(symptoms.router, dependencies=_standard_budget)
+app.include_router(cases.router, dependencies=_standard_budget)
+app.include_router(feedback.router, dependencies=_standard_budget)
+app.include_router(timeline.router, dependencies=_standard_budget)
+app.include_router(privacy.router, dependencies=_standard_budget)
 
+if settings.analytics_enabled:
+    app.include_router(analytics.router)
 
-@app.on_event("startup")
-async def _warm_models() -> None:
+if shadow.get_evaluator() is not None:
+    app.include_router(shadow_routes.router)
+
+if settings.profiling_enabled:
+    # Installed only when enabled so unprofiled deployments pay nothing.
+    app.include_router(profiling_routes.router)
+    app.add_middleware(profiling.ProfilingMiddleware)
+
+    @app.on_event("startup")
+    async def _instrument_routes() -> None:
+        # Runs once every router is included, wherever that happens in this module.
+        profiling.instrument_routes(app)
+
+
+def _run_warmup() -> None:
     try:
-        inference.get_diagnosis_bundle()
-        inference.get_triage_model()
-        logger.info("Models loaded successfully during startup.")
+        warmup.run_warmup()
+        logger.info("Models loaded and request paths warmed during startup.")
     except FileNotFoundError as exc:
         logger.error("Model file missing: %s", exc)
     except Exception as exc:
         logger.exception("Model warm-up failed: %s", exc)
+
+
+@app.on_event("startup")
+async def _warm_models() -> None:
+    # Warm up in the background so /health answers immediately; /ready reports completion.
+    Thread(target=_run_warmup, name="warmup", daemon=True).start()
+
+
+@app.on_event("startup")
+async def _migrate_legacy_tokens() -> None:
+    # Before sessions had their own log, each user record held one auth_token. Those tokens
+    # are carried over as sessions with a fresh TTL so existing clients stay signed in.
+    migrated = user_store.migrate_legacy_tokens(session_store.adopt_token)
+    if migrated:
+        logger.warning("Migrated %d legacy auth tokens from the user store into the session log", migrated)
+
+
+def _run_timeline_compaction(interval_seconds: float) -> None:
+    while not _shutdown.wait(interval_seconds):
+        try:
+            # Every worker runs this job; the store lets only one of them compact per interval.
+            report = timeline_store.compact(settings.timeline_retention_days, min_interval_seconds=interval_seconds / 2)
+            if report["skipped"]:
+                logger.debug("Timeline compaction skipped; another worker compacted recently")
+                continue
+            logger.info("Timeline compaction finished: %s", report)
+        except Exception:
+            logger.exception("Timeline compaction failed")
+
+
+@app.on_event("startup")
+async def _start_timeline_compaction() -> None:
+    interval_hours = settings.timeline_compaction_interval_hours
+    if interval_hours > 0:
+        Thread(
+            target=_run_timeline_compaction, args=(interval_hours * 3600,), name="timeline-compaction", daemon=True
+        ).start()
+
+
+def _run_session_sweep(interval_seconds: float) -> None:
+    while not _shutdown.wait(interval_seconds):
+        try:
+            dropped = session_store.sweep()
+            logger.info("Session sweep dropped %d expired or revoked log records", dropped)
+        except Exception:
+            logger.exception("Session sweep failed")
+
+
+@app.on_event("startup")
+async def _start_session_sweep() -> None:
+    interval_minutes = settings.session_sweep_interval_minutes
+    if interval_minutes > 0:
+        Thread(target=_run_session_sweep, args=(interval_minutes * 60,), name="session-sweep", daemon=True).start()
+
+
+def _run_analytics_flush(interval_seconds: float) -> None:
+    # Woken early when a request fills the event buffer, so requests do not write chunks.
+    while not _shutdown.is_set():
+        event_store.wait_for_pending(interval_seconds)
+        if _shutdown.is_set():
+            break  # the shutdown hook flushes
+        try:
+            event_store.flush()
+            event_store.prune(settings.analytics_retention_days)
+        except Exception:
+            logger.exception("Analytics event flush failed")
+
+
+@app.on_event("startup")
+async def _start_analytics_flush() -> None:
+    interval_seconds = settings.analytics_flush_interval_seconds
+    if settings.analytics_enabled and interval_seconds > 0:
+        Thread(target=_run_analytics_flush, args=(interval_seconds,), name="analytics-flush", daemon=True).start()
+
+
+def _run_model_reload(interval_seconds: float) -> None:
+    while not _shutdown.wait(interval_seconds):
+        try:
+            inference.reload_diagnosis_bundle()
+        except FileNotFoundError:
+            pass  # reported by the warm-up
+        except Exception:
+            logger.exception("Diagnosis model reload failed")
+        try:
+            similar_cases.reload_case_index()
+        except Exception:
+            logger.exception("Case index reload failed")
+
+
+@app.on_event("startup")
+async def _start_model_reload() -> None:
+    # Each worker polls the model and case index files, so a bundle written by
+    # update_diagnosis_model.py or an index rebuilt by build_case_index.py is picked up
+    # everywhere without a restart.
+    interval_seconds = settings.diagnosis_reload_interval_seconds
+    if interval_seconds > 0:
+        Thread(target=_run_model_reload, args=(interval_seconds,), name="model-reload", daemon=True).start()
+
+
+@app.on_event("startup")
+async def _start_shadow_evaluation() -> None:
+    # The candidate bundle is loaded by the worker thread, not during startup.
+    shadow.start(_shutdown)
+
+
+@app.on_event("shutdown")
+async def _stop_background_jobs() -> None:
+    _shutdown.set()
+    if settings.analytics_enabled:
+        event_store.flush()
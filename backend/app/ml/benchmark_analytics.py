@@ -0,0 +1,100 @@
+"""Benchmark the analytics queries over a synthetic columnar event log.
+
+Writes ``--events`` synthetic prediction outcomes (dataset cases with their disease's triage
+level, spread uniformly over the last ``--days`` days) as event-store chunks into a temporary
+directory. Then times the hourly triage query over the last 30 days and the trending-symptom
+query, first cold (chunks read from disk) and then warm (chunks cached in memory).
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[3]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.append(str(ROOT_DIR))
+
+from backend.app.core.config import get_settings
+from backend.app.data import event_store
+from backend.app.data.runtime_data import iter_dataset_cases
+from backend.app.ml import inference
+from backend.app.routes import analytics
+
+
+def write_synthetic_events(directory: Path, events: int, days: float, chunk_size: int, seed: int = 42) -> None:
+    cases = [(disease, symptoms) for disease, symptoms in iter_dataset_cases() if symptoms]
+    disease_names = np.asarray(sorted({disease for disease, _ in cases}))
+    disease_codes = np.searchsorted(disease_names, [disease for disease, _ in cases])
+    triage_names, triage_of_disease = np.unique([inference.triage_level_for(name) for name in disease_names], return_inverse=True)
+    symptom_names = np.asarray(sorted({symptom for _, symptoms in cases for symptom in symptoms}))
+    case_lengths = np.asarray([len(symptoms) for _, symptoms in cases])
+    case_starts = np.concatenate([[0], np.cumsum(case_lengths)[:-1]])
+    case_symptoms = np.searchsorted(symptom_names, [symptom for _, symptoms in cases for symptom in symptoms])
+
+    rng = np.random.default_rng(seed)
+    now = int(time.time())
+    for offset in range(0, events, chunk_size):
+        count = min(chunk_size, events - offset)
+        picked = rng.integers(len(cases), size=count)
+        lengths = case_lengths[picked]
+        offsets = np.zeros(count + 1, dtype=np.uint32)
+        np.cumsum(lengths, out=offsets[1:])
+        within = np.arange(offsets[-1]) - np.repeat(offsets[:-1].astype(np.int64), lengths)
+        timestamps = np.sort(rng.integers(now - int(days * 86400), now, size=count))
+        event_store.write_chunk(
+            directory,
+            {
+                "timestamp": timestamps.astype(np.int64),
+                "disease": disease_codes[picked].astype(np.uint16),
+                "triage": triage_of_disease[disease_codes[picked]].astype(np.uint8),
+                "severity": rng.uniform(0, 10, size=count).astype(np.float32),
+                "symptom_offsets": offsets,
+                "symptom_ids": case_symptoms[np.repeat(case_starts[picked], lengths) + within].astype(np.uint16),
+                "disease_names": disease_names,
+                "triage_names": triage_names,
+                "symptom_names": symptom_names,
+            },
+        )
+
+
+def _timed_ms(func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the analytics queries.")
+    parser.add_argument("--events", type=int, default=5_000_000)
+    parser.add_argument("--days", type=float, default=30.0)
+    parser.add_argument("--chunk-size", type=int, default=get_settings().analytics_chunk_size)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        settings = get_settings()
+        settings.analytics_dir = Path(directory)
+        elapsed = _timed_ms(lambda: write_synthetic_events(Path(directory), args.events, args.days, args.chunk_size))
+        size_mb = sum(path.stat().st_size for path in Path(directory).iterdir()) / (1024 * 1024)
+        print(f"wrote {args.events} events in {elapsed:.0f} ms ({size_mb:.1f} MB, {size_mb * 2**20 / args.events:.1f} B/event)")
+
+        queries = {
+            "triage per hour, 30 days": lambda: analytics.triage_analytics(bucket="hour", start=None, end=None),
+            "trending symptoms, 24h vs 7d": lambda: analytics.trending_symptoms(
+                window_hours=24, baseline_days=7, min_count=5, limit=20
+            ),
+        }
+        for label, query in queries.items():
+            event_store.clear_cache()  # measure the first query after a restart
+            cold = _timed_ms(query)
+            warm = min(_timed_ms(query) for _ in range(5))
+            print(f"{label}: cold {cold:.0f} ms, warm {warm:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""Golden-parity harness and offline benchmark for ``inference.predict_diseases``.
+
+The inputs are every row of ``dataset.csv`` plus ``--perturbations`` synthetic cases from
+``synthetic_workload``. The synthetic cases have dropped, extra and unrelated symptoms,
+misspellings and severity overrides. ``--record`` runs them through the reference
+implementation (``single-row``) and stores the golden outputs in ``--golden``: the top-k diseases
+with their probabilities and triage levels, the red flags and the severity score per case. The
+golden file also stores a fingerprint of the diagnosis model and of the inputs.
+
+The reference is the current code, which already interns symptoms into bitsets
+(``symptom_set.py``) for red flags, severity scores and the probability cache key. A recording
+therefore guards later changes against that baseline but cannot catch regressions the bitset
+rewrite itself introduced; ``benchmark_symptom_sets.py`` compares that path with the
+string-based helpers.
+
+Without ``--record`` each implementation variant is run over the same inputs and compared with
+the golden outputs:
+
+* ``single-row``: one uncached ``predict_proba`` call per case, as on a cache miss;
+* ``cached``: ``predict_diseases`` with its probability cache, starting cold;
+* ``batched``: ``predict_proba`` over ``--batch-size`` cases at a time;
+* ``flat-forest``: probabilities from the pure-Python ``FlatForest`` used by diagnosis sessions;
+* ``strings``: the string-set path used for candidate bundles (``bundle=`` argument).
+
+Diseases and triage levels must match exactly. The only exception is positions where the
+golden probabilities tie, whose order is arbitrary. Probabilities and severity scores must be
+within ``--tolerance`` and red flags must match. For each variant the script reports the time
+per stage, rows/s and the peak traced memory over ``--memory-rows`` cases. It exits with
+status 1 if any variant changes a golden result, or if the model or inputs differ from the
+recorded ones.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[3]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.append(str(ROOT_DIR))
+
+from backend.app.core.config import get_settings
+from backend.app.data.runtime_data import iter_dataset_cases
+from backend.app.ml import forest, inference
+from backend.app.ml.preprocess import normalize_symptom
+from backend.app.ml.synthetic_workload import WorkloadModel
+
+TOP_K = 3
+
+
+class Case(NamedTuple):
+    symptoms: List[str]  # normalized
+    overrides: Dict[str, float]
+
+
+class Output(NamedTuple):
+    results: List[Dict[str, Any]]  # predict_diseases output
+    red_flags: List[str]
+
+
+Stages = Dict[str, float]
+Variant = Callable[[Sequence[Case], Stages], List[Output]]
+
+
+def build_cases(perturbations: int, seed: int) -> List[Case]:
+    cases = [Case(symptoms, {}) for _, symptoms in iter_dataset_cases() if symptoms]
+    workload = WorkloadModel.from_dataset()
+    for batch in workload.generate(perturbations, seed=seed):
+        for body in workload.requests(batch):
+            symptoms = list(dict.fromkeys(value for name in body["symptoms"] if (value := normalize_symptom(name))))
+            overrides = {normalize_symptom(detail["name"]): float(detail["severity"]) for detail in body["symptom_details"]}
+            cases.append(Case(symptoms, {name: value for name, value in overrides.items() if name}))
+    return cases
+
+
+def _digest(cases: Sequence[Case]) -> str:
+    payload = json.dumps([[case.symptoms, sorted(case.overrides.items())] for case in cases], separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _model_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _rank(symptom_set: Any, probabilities: np.ndarray) -> Output:
+    return Output(
+        inference.predict_diseases(symptom_set, top_k=TOP_K + 1, probabilities=probabilities),
+        inference.detect_red_flags(symptom_set),
+    )
+
+
+class _Timer:
+    def __init__(self, stages: Stages) -> None:
+        self.stages = stages
+        self.last = time.perf_counter()
+
+    def lap(self, stage: str) -> None:
+        now = time.perf_counter()
+        self.stages[stage] += now - self.last
+        self.last = now
+
+
+def _single_row(cases: Sequence[Case], stages: Stages) -> List[Output]:
+    model, index = inference.get_diagnosis_bundle()["model"], inference.get_symptom_index()
+    outputs = []
+    timer = _Timer(stages)
+    for case in cases:
+        symptom_set = inference.intern_symptoms(case.symptoms, case.overrides, normalized=True)
+        timer.lap("intern")
+        vector = index.vector(*symptom_set.key)
+        if not vector.any():
+            outputs.append(Output([], inference.detect_red_flags(symptom_set)))
+            timer.lap("rank")
+            continue
+        probabilities = model.predict_proba(vector.reshape(1, -1))[0]
+        timer.lap("model")
+        outputs.append(_rank(symptom_set, probabilities))
+        timer.lap("rank")
+    return outputs
+
+
+def _cached(cases: Sequence[Case], stages: Stages) -> List[Output]:
+    inference._class_probabilities.cache_clear()
+    outputs = []
+    timer = _Timer(stages)
+    for case in cases:
+        symptom_set = inference.intern_symptoms(case.symptoms, case.overrides, normalized=True)
+        timer.lap("intern")
+        try:
+            results = inference.predict_diseases(symptom_set, top_k=TOP_K + 1)
+        except ValueError:  # no mapped symptoms
+            results = []
+        timer.lap("predict")
+        outputs.append(Output(results, inference.detect_red_flags(symptom_set)))
+        timer.lap("red_flags")
+    return outputs
+
+
+def _batched(batch_size: int) -> Variant:
+    def run(cases: Sequence[Case], stages: Stages) -> List[Output]:
+        model, index = inference.get_diagnosis_bundle()["model"], inference.get_symptom_index()
+        outputs: List[Output] = []
+        timer = _Timer(stages)
+        for start in range(0, len(cases), batch_size):
+            chunk = cases[start : start + batch_size]
+            symptom_sets = [inference.intern_symptoms(case.symptoms, case.overrides, normalized=True) for case in chunk]
+            timer.lap("intern")
+            vectors = np.vstack([index.vector(*symptom_set.key) for symptom_set in symptom_sets])
+            mapped = vectors.any(axis=1)
+            probabilities = np.zeros((len(chunk), len(model.classes_)))
+            if mapped.any():
+                probabilities[mapped] = model.predict_proba(vectors[mapped])
+            timer.lap("model")
+            for symptom_set, row, has_symptoms in zip(symptom_sets, probabilities, mapped):
+                if has_symptoms:
+                    outputs.append(_rank(symptom_set, row))
+                else:
+                    outputs.append(Output([], inference.detect_red_flags(symptom_set)))
+            timer.lap("rank")
+        return outputs
+
+    return run
+
+
+def _flat_forest(cases: Sequence[Case], stages: Stages) -> List[Output]:
+    flat, index = forest.get_flat_forest(), inference.get_symptom_index()
+    outputs = []
+    timer = _Timer(stages)
+    for case in cases:
+        symptom_set = inference.intern_symptoms(case.symptoms, case.overrides, normalized=True)
+        timer.lap("intern")
+        vector = index.vector(*symptom_set.key)
+        if not vector.any():
+            outputs.append(Output([], inference.detect_red_flags(symptom_set)))
+            timer.lap("rank")
+            continue
+        probabilities = flat.predict_proba(flat.evaluate(flat.prepare(vector)))
+        timer.lap("model")
+        outputs.append(_rank(symptom_set, probabilities))
+        timer.lap("rank")
+    return outputs
+
+
+def _strings(cases: Sequence[Case], stages: Stages) -> List[Output]:
+    bundle = inference.get_diagnosis_bundle()
+    outputs = []
+    timer = _Timer(stages)
+    for case in cases:
+        try:
+            results = inference.predict_diseases(case.symptoms, TOP_K + 1, case.overrides, bundle=bundle)
+        except ValueError:
+            results = []
+        timer.lap("predict")
+        outputs.append(Output(results, inference.detect_red_flags(case.symptoms)))
+        timer.lap("red_flags")
+    return outputs
+
+
+def encode_outputs(outputs: Sequence[Output]) -> Dict[str, np.ndarray]:
+    """Golden arrays; -1 marks a missing result (no mapped symptoms).
+
+    Outputs hold ``TOP_K + 1`` results; only the probability of the last one is kept, to tell
+    whether the k-th disease ties with the next candidate.
+    """
+    classes = {name: position for position, name in enumerate(inference.get_diagnosis_bundle()["model"].classes_)}
+    triage_names = sorted({inference.triage_level_for(name) for name in classes})
+    triage = {name: position for position, name in enumerate(triage_names)}
+    rules = {message: bit for bit, (_, message) in enumerate(inference._RED_FLAG_RULES)}
+    n = len(outputs)
+    arrays = {
+        "top_classes": np.full((n, TOP_K), -1, dtype=np.int32),
+        "top_probabilities": np.zeros((n, TOP_K)),
+        "next_probability": np.zeros(n),
+        "top_triage": np.full((n, TOP_K), -1, dtype=np.int8),
+        "severity": np.full(n, np.nan),
+        "red_flags": np.zeros(n, dtype=np.int64),
+        "triage_names": np.asarray(triage_names, dtype=str),
+    }
+    for row, output in enumerate(outputs):
+        for position, result in enumerate(output.results[:TOP_K]):
+            arrays["top_classes"][row, position] = classes[result["disease"]]
+            arrays["top_probabilities"][row, position] = result["probability"]
+            arrays["top_triage"][row, position] = triage[result["triage_level"]]
+        if len(output.results) > TOP_K:
+            arrays["next_probability"][row] = output.results[TOP_K]["probability"]
+        if output.results:
+            arrays["severity"][row] = output.results[0]["severity_score"]
+        arrays["red_flags"][row] = sum(1 << rules[message] for message in output.red_flags)
+    return arrays
+
+
+def compare(golden: Dict[str, np.ndarray], actual: Dict[str, np.ndarray], tolerance: float) -> Dict[str, np.ndarray]:
+    """Return a boolean mismatch mask per checked field."""
+    golden_probabilities = golden["top_probabilities"]
+    # A position whose golden probability ties with another candidate may hold either disease.
+    tied = np.zeros_like(golden_probabilities, dtype=bool)
+    for position in range(TOP_K):
+        for other in range(TOP_K):
+            if other != position:
+                tied[:, position] |= np.abs(golden_probabilities[:, position] - golden_probabilities[:, other]) <= tolerance
+    tied[:, -1] |= np.abs(golden_probabilities[:, -1] - golden["next_probability"]) <= tolerance
+    same_class = golden["top_classes"] == actual["top_classes"]
+    return {
+        "diseases": (~same_class & ~tied).any(axis=1),
+        "probabilities": (np.abs(golden_probabilities - actual["top_probabilities"]) > tolerance).any(axis=1)
+        | (np.abs(golden["next_probability"] - actual["next_probability"]) > tolerance),
+        "triage": (same_class & (golden["top_triage"] != actual["top_triage"])).any(axis=1),
+        "red_flags": golden["red_flags"] != actual["red_flags"],
+        "severity": ~np.isclose(golden["severity"], actual["severity"], rtol=0, atol=tolerance, equal_nan=True),
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Golden-parity check and benchmark for predict_diseases.")
+    parser.add_argument("--record", action="store_true", help="Write golden outputs from the reference variant")
+    parser.add_argument("--golden", type=Path, default=settings.models_dir / "predict_golden.npz")
+    parser.add_argument("--variants", nargs="+", default=["single-row", "cached", "batched", "flat-forest", "strings"])
+    parser.add_argument("--perturbations", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--batch-size", type=int, default=512)
+    parser.add_argument("--tolerance", type=float, default=1e-9)
+    parser.add_argument("--memory-rows", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    variants: Dict[str, Variant] = {
+        "single-row": _single_row,
+        "cached": _cached,
+        "batched": _batched(args.batch_size),
+        "flat-forest": _flat_forest,
+        "strings": _strings,
+    }
+    unknown = set(args.variants) - set(variants)
+    if unknown:
+        parser.error(f"unknown variants: {', '.join(sorted(unknown))}")
+
+    model_digest = _model_digest(settings.diagnosis_model_path)
+    if args.record:
+        cases = build_cases(args.perturbations, args.seed)
+        arrays = encode_outputs(_single_row(cases, defaultdict(float)))
+        meta = {"model": model_digest, "inputs": _digest(cases), "perturbations": args.perturbations, "seed": args.seed}
+        args.golden.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(args.golden, meta=np.asarray(json.dumps(meta)), **arrays)
+        print(f"recorded {len(cases)} golden cases to {args.golden}")
+        return 0
+
+    with np.load(args.golden, allow_pickle=False) as data:
+        golden = {name: data[name] for name in data.files}
+    meta = json.loads(str(golden.pop("meta")))
+    cases = build_cases(meta["perturbations"], meta["seed"])
+    if _digest(cases) != meta["inputs"]:
+        print("inputs differ from the recorded ones (dataset or generator changed); re-record", file=sys.stderr)
+        return 1
+    if meta["model"] != model_digest:
+        print("the diagnosis model differs from the recorded one; re-record after retraining", file=sys.stderr)
+        return 1
+
+    print(f"cases={len(cases)} (dataset rows + {meta['perturbations']} perturbations), top_k={TOP_K}")
+    failed = False
+    for name in args.variants:
+        stages: Stages = defaultdict(float)
+        start = time.perf_counter()
+        outputs = variants[name](cases, stages)
+        elapsed = time.perf_counter() - start
+        mismatches = compare(golden, encode_outputs(outputs), args.tolerance)
+        bad = np.zeros(len(cases), dtype=bool)
+        for mask in mismatches.values():
+            bad |= mask
+
+        tracemalloc.start()
+        variants[name](cases[: args.memory_rows], defaultdict(float))
+        peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+
+        timings = " ".join(f"{stage}={seconds / len(cases) * 1e6:.0f}us" for stage, seconds in stages.items())
+        print(
+            f"{name:12s} {len(cases) / elapsed:9.0f} rows/s  {timings}  peak={peak_kb:.0f}KB/{args.memory_rows} rows  "
+            f"mismatches={int(bad.sum())}"
+        )
+        for field, mask in mismatches.items():
+            if mask.any():
+                failed = True
+                first = int(np.flatnonzero(mask)[0])
+                print(f"  {field}: {int(mask.sum())} cases differ, e.g. {cases[first]}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
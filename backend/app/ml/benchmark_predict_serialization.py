@@ -0,0 +1,103 @@
+"""Benchmark and contract check for the fast ``/predict`` serialization path.
+
+For a sample of symptom sets drawn from the dataset the script:
+
+* checks that the fast body (``core.serialization``) parses to the same document as the
+  standard ``PredictionResponse`` -> ``response_model`` -> ``JSONResponse`` path and validates
+  against ``PredictionResponse`` (exit status 1 on any mismatch);
+* reports the CPU time per request spent producing the response body on each path;
+* reports the end-to-end CPU time per ``POST /predict`` through the ASGI app with the
+  ``FAST_PREDICT_SERIALIZATION`` setting off and on.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence
+
+ROOT_DIR = Path(__file__).resolve().parents[3]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.append(str(ROOT_DIR))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+from fastapi.testclient import TestClient
+
+from backend.app.core import serialization
+from backend.app.core.config import get_settings
+from backend.app.data.runtime_data import iter_dataset_cases
+from backend.app.main import app
+from backend.app.routes import predict
+from backend.app.schemas.response import PredictionResponse
+
+
+def _sample(count: int, seed: int) -> List[List[str]]:
+    cases = [symptoms for _, symptoms in iter_dataset_cases() if symptoms]
+    rng = random.Random(seed)
+    return [rng.sample(case, k=rng.randint(1, len(case))) for case in rng.sample(cases, k=min(count, len(cases)))]
+
+
+def _cpu_per_call_us(func: Callable[[], object], repeat: int) -> float:
+    start = time.process_time()
+    for _ in range(repeat):
+        func()
+    return (time.process_time() - start) / repeat * 1_000_000
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark /predict response serialization.")
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20, help="serializations per sample")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    route = next(route for route in app.routes if isinstance(route, APIRoute) and route.path == "/predict")
+    loop = asyncio.new_event_loop()
+
+    def standard_body(results, fields) -> bytes:
+        model = PredictionResponse(results=results, **fields)
+        content = loop.run_until_complete(serialize_response(field=route.response_field, response_content=model))
+        return JSONResponse(content).body
+
+    samples = _sample(args.samples, args.seed)
+    parts = [predict._predict_parts(symptoms, {}) for symptoms in samples]
+
+    mismatches = 0
+    for symptoms, (results, fields) in zip(samples, parts):
+        fast = serialization.prediction_body(results, fields)
+        PredictionResponse.model_validate_json(fast)
+        if json.loads(fast) != json.loads(standard_body(results, fields)):
+            mismatches += 1
+            print(f"Mismatch for {symptoms}", file=sys.stderr)
+
+    standard_us = sum(_cpu_per_call_us(lambda: standard_body(*part), args.repeat) for part in parts) / len(parts)
+    fast_us = sum(_cpu_per_call_us(lambda: serialization.prediction_body(*part), args.repeat) for part in parts) / len(parts)
+
+    settings = get_settings()
+    settings.rate_limit_enabled = False  # every request comes from the same test client
+    client = TestClient(app)
+    end_to_end = {}
+    for enabled in (False, True):
+        settings.fast_predict_serialization = enabled
+        start = time.process_time()
+        for symptoms in samples:
+            response = client.post("/predict", json={"symptoms": symptoms})
+            response.raise_for_status()
+        end_to_end[enabled] = (time.process_time() - start) / len(samples) * 1000
+
+    print(f"samples={len(samples)} contract_mismatches={mismatches}")
+    print(f"body CPU per request: standard={standard_us:.1f}us fast={fast_us:.1f}us saving={standard_us - fast_us:.1f}us")
+    print(
+        f"end-to-end CPU per request: standard={end_to_end[False]:.2f}ms fast={end_to_end[True]:.2f}ms "
+        f"saving={end_to_end[False] - end_to_end[True]:.2f}ms"
+    )
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""Benchmark the similar-case LSH index against an exact scan.
+
+Builds a synthetic case base of ``--cases`` symptom sets (dataset cases with symptoms randomly
+dropped and added, so most sets are distinct) and, for each ``BANDSxROWS`` configuration, an
+LSH index over it. Queries are 2-5 symptom subsets of dataset cases. For each configuration the
+script reports the index build time, the mean query time and recall@``--limit``: the share of
+the exact top cases that the index returns. Cases tied on similarity are interchangeable, so a
+returned case counts when its similarity reaches that of the last exact top case. The exact scan
+computes the similarity of every case with the same vectorized code.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[3]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.append(str(ROOT_DIR))
+
+from backend.app.data.runtime_data import iter_dataset_cases
+from backend.app.ml.similar_cases import CaseIndex, build_case_index
+
+
+def synthetic_cases(count: int, seed: int) -> List[Tuple[str, str, List[str]]]:
+    rng = random.Random(seed)
+    cases = [(disease, symptoms) for disease, symptoms in iter_dataset_cases() if symptoms]
+    vocabulary = sorted({symptom for _, symptoms in cases for symptom in symptoms})
+    generated = []
+    for _ in range(count):
+        disease, symptoms = rng.choice(cases)
+        kept = [symptom for symptom in symptoms if rng.random() > 0.2] or symptoms[:1]
+        kept += rng.sample(vocabulary, k=rng.randint(0, 3))
+        generated.append(("synthetic", disease, kept))
+    return generated
+
+
+def sample_queries(count: int, seed: int) -> List[List[str]]:
+    rng = random.Random(seed)
+    cases = [symptoms for _, symptoms in iter_dataset_cases() if symptoms]
+    return [rng.sample(case, k=rng.randint(min(len(case), 2), min(len(case), 5))) for case in (rng.choice(cases) for _ in range(count))]
+
+
+def exact_top(index: CaseIndex, symptoms: Sequence[str], limit: int, all_cases: np.ndarray) -> np.ndarray:
+    """Similarities of the exact top ``limit`` cases, highest first."""
+    symptom_ids = sorted({index.symptom_ids[symptom] for symptom in symptoms if symptom in index.symptom_ids})
+    similarity = index.jaccard(symptom_ids, all_cases)
+    return -np.sort(-similarity)[:limit]
+
+
+def recall(answer: List[Dict], expected: np.ndarray) -> int:
+    threshold = round(float(expected[-1]), 4)
+    return min(sum(result["similarity"] >= threshold for result in answer), len(expected))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the similar-case LSH index.")
+    parser.add_argument("--cases", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--max-candidates", type=int, default=2000)
+    parser.add_argument("--configs", nargs="+", default=["16x4", "20x3", "32x2"], help="BANDSxROWS")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    cases = synthetic_cases(args.cases, args.seed)
+    print(f"generated {len(cases)} cases in {time.perf_counter() - start:.1f} s")
+    queries = sample_queries(args.queries, args.seed + 1)
+
+    exact: Optional[List[np.ndarray]] = None
+    for config in args.configs:
+        bands, rows = (int(value) for value in config.split("x"))
+        start = time.perf_counter()
+        index = CaseIndex(build_case_index(cases, bands=bands, rows=rows))
+        build_s = time.perf_counter() - start
+        all_cases = np.arange(index.n_cases)
+
+        if exact is None:  # the case order is the same for every configuration
+            start = time.perf_counter()
+            exact = [exact_top(index, query, args.limit, all_cases) for query in queries]
+            scan_ms = (time.perf_counter() - start) / len(queries) * 1000
+            print(f"distinct cases={index.n_cases}; exact scan {scan_ms:.1f} ms/query")
+
+        start = time.perf_counter()
+        answers = [index.query(query, limit=args.limit, max_candidates=args.max_candidates) for query in queries]
+        query_ms = (time.perf_counter() - start) / len(queries) * 1000
+
+        found = sum(recall(answer, expected) for answer, expected in zip(answers, exact))
+        total = sum(len(expected) for expected in exact)
+        print(
+            f"{config}: build {build_s:.1f} s, query {query_ms:.2f} ms, recall@{args.limit} {found / total:.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
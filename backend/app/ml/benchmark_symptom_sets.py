@@ -0,0 +1,125 @@
+"""Micro-benchmark of the string-set and bitset symptom pipelines.
+
+For a sample of dataset cases (with random severity overrides, red-flag and follow-up terms and
+unknown symptoms mixed in) the script checks that the bitset path (``inference`` with a
+:class:`SymptomSet`) produces the same model vector, severity score, red flags and follow-up
+questions as the string path (``preprocess.encode_symptoms``/``generate_severity_score`` and the
+previous string-set rule checks, reproduced below). It then reports the time per request of the
+pre-model steps on each path, and of ``predict_diseases`` with a cold and a warm probability cache.
+Exits with status 1 on any mismatch.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[3]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.append(str(ROOT_DIR))
+
+from backend.app.data.runtime_data import iter_dataset_cases
+from backend.app.ml import inference
+from backend.app.ml.preprocess import encode_symptoms, generate_severity_score, normalize_symptom
+
+
+def _string_red_flags(symptoms: Sequence[str]) -> List[str]:
+    normalized = {value for symptom in symptoms if (value := normalize_symptom(symptom))}
+    return [message for required, message in inference._RED_FLAG_RULES if required.issubset(normalized)]
+
+
+def _string_follow_up_questions(symptoms: Sequence[str], limit: int = 5) -> List[str]:
+    questions: List[str] = []
+    for symptom in symptoms:
+        questions.extend(inference._FOLLOW_UP_BANK.get(normalize_symptom(symptom), []))
+    return list(dict.fromkeys(questions))[:limit]
+
+
+def _sample(count: int, seed: int) -> List[Tuple[List[str], Dict[str, float]]]:
+    rng = random.Random(seed)
+    cases = [symptoms for _, symptoms in iter_dataset_cases() if symptoms]
+    rule_terms = [symptom for required, _ in inference._RED_FLAG_RULES for symptom in required]
+    rule_terms += list(inference._FOLLOW_UP_BANK)
+    samples = []
+    for _ in range(count):
+        case = rng.choice(cases)
+        symptoms = rng.sample(case, k=rng.randint(1, min(len(case), 5)))
+        if rng.random() < 0.3:
+            symptoms.append(rng.choice(rule_terms))
+        if rng.random() < 0.1:
+            symptoms.append("unlisted_symptom")
+        symptoms = list(dict.fromkeys(symptoms))
+        overrides = {symptom: float(rng.randint(0, 10)) for symptom in symptoms if rng.random() < 0.3}
+        samples.append((symptoms, overrides))
+    return samples
+
+
+def _per_request_us(func: Callable[[], object], samples: int, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / (repeat * samples) * 1_000_000
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the bitset symptom pipeline.")
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    bundle = inference.get_diagnosis_bundle()
+    symptom_to_index, severity_map = bundle["symptom_to_index"], bundle["severity_map"]
+    index = inference.get_symptom_index()
+    samples = _sample(args.samples, args.seed)
+
+    mismatches = 0
+    for symptoms, overrides in samples:
+        symptom_set = inference.intern_symptoms(symptoms, overrides, normalized=True)
+        expected_vector = encode_symptoms(symptoms, symptom_to_index, severity_map, overrides)
+        checks = {
+            "vector": np.array_equal(index.vector(*symptom_set.key), expected_vector),
+            "severity": abs(symptom_set.severity_score - generate_severity_score(symptoms, severity_map, overrides)) < 1e-9,
+            "red_flags": inference.detect_red_flags(symptom_set) == _string_red_flags(symptoms),
+            "follow_up": inference.suggest_follow_up_questions(symptom_set) == _string_follow_up_questions(symptoms),
+        }
+        failed = [name for name, ok in checks.items() if not ok]
+        if failed:
+            mismatches += 1
+            print(f"Mismatch ({', '.join(failed)}) for {symptoms} {overrides}", file=sys.stderr)
+
+    def string_path() -> None:
+        for symptoms, overrides in samples:
+            encode_symptoms(symptoms, symptom_to_index, severity_map, overrides)
+            generate_severity_score(symptoms, severity_map, overrides)
+            _string_red_flags(symptoms)
+            _string_follow_up_questions(symptoms)
+
+    def bitset_path() -> None:
+        for symptoms, overrides in samples:
+            symptom_set = inference.intern_symptoms(symptoms, overrides, normalized=True)
+            index.vector(*symptom_set.key)
+            inference.detect_red_flags(symptom_set)
+            inference.suggest_follow_up_questions(symptom_set)
+
+    string_us = _per_request_us(string_path, len(samples), args.repeat)
+    bitset_us = _per_request_us(bitset_path, len(samples), args.repeat)
+
+    sets = [inference.intern_symptoms(symptoms, overrides, normalized=True) for symptoms, overrides in samples]
+    inference._class_probabilities.cache_clear()
+    cold_us = _per_request_us(lambda: [inference.predict_diseases(symptom_set) for symptom_set in sets], len(sets), 1)
+    warm_us = _per_request_us(lambda: [inference.predict_diseases(symptom_set) for symptom_set in sets], len(sets), 1)
+
+    print(f"samples={len(samples)} mismatches={mismatches}")
+    print(f"pre-model steps per request: strings={string_us:.1f}us bitset={bitset_us:.1f}us")
+    print(f"predict_diseases per request: model={cold_us:.0f}us cached={warm_us:.0f}us")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""Benchmark the batch (TF-IDF + LogisticRegression) and streaming (hashing + SGD) triage trainers.
+
+A synthetic guidance corpus of ``--documents`` rows is generated from the knowledge-base texts
+by recombining their sentences, written to a CSV file, and each trainer is run in its own
+process so peak RSS is measured in isolation. The batch trainer loads the corpus into memory as
+``train_triage_model.py`` does; the streaming trainer reads it in chunks. Reported per trainer:
+fit time, peak RSS (and the increase over the RSS after imports), single-document prediction
+latency and accuracy on a held-out slice.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import multiprocessing
+import random
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+ROOT_DIR = Path(__file__).resolve().parents[3]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.append(str(ROOT_DIR))
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def write_synthetic_corpus(path: Path, documents: int, seed: int = 42) -> None:
+    from backend.app.ml.train_triage_model import load_labeled_corpus
+
+    texts, labels = load_labeled_corpus()
+    by_label: Dict[str, List[List[str]]] = {}
+    for text, label in zip(texts, labels):
+        by_label.setdefault(label, []).append(text.split())
+    vocabulary = [word for text in texts for word in text.split()]
+    rng = random.Random(seed)
+    label_names = sorted(by_label)
+    with path.open("w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["text", "triage_level"])
+        for _ in range(documents):
+            label = rng.choice(label_names)
+            words = rng.choice(by_label[label])
+            start = rng.randrange(len(words))
+            span = words[start : start + rng.randint(8, 40)] or words
+            noise = rng.sample(vocabulary, k=min(len(vocabulary), rng.randint(2, 10)))
+            writer.writerow([" ".join(span + noise), label])
+
+
+def _collect(chunks) -> tuple[List[str], List[str]]:
+    texts: List[str] = []
+    labels: List[str] = []
+    for chunk_texts, chunk_labels in chunks:
+        texts.extend(chunk_texts)
+        labels.extend(chunk_labels)
+    return texts, labels
+
+
+def _measure_prediction(pipeline, texts: Sequence[str], labels: Sequence[str], samples: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    for text in texts[:samples]:
+        start = time.perf_counter()
+        pipeline.predict([text])
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    predicted = pipeline.predict(list(texts))
+    accuracy = sum(1 for guess, label in zip(predicted, labels) if guess == label) / max(len(labels), 1)
+    return {
+        "predict_p50_ms": latencies[len(latencies) // 2],
+        "predict_p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "holdout_accuracy": accuracy,
+    }
+
+
+def _run_trainer(name: str, corpus: Path, options: Dict[str, Any], results) -> None:
+    import pickle
+
+    from backend.app.ml import train_triage_model, train_triage_model_streaming as streaming
+
+    def training_chunks():
+        return streaming.split_holdout(streaming.iter_corpus_chunks(corpus, options["chunk_size"]), holdout=False)
+
+    baseline_rss = _peak_rss_mb()
+    start = time.perf_counter()
+    if name == "batch":
+        texts, labels = _collect(training_chunks())
+        pipeline = train_triage_model.build_pipeline()
+        pipeline.fit(texts, labels)
+        del texts, labels
+    else:
+        pipeline = streaming.build_streaming_pipeline(options["n_features"])
+        streaming.partial_fit_stream(pipeline, training_chunks, options["epochs"])
+        streaming.finalize_for_serving(pipeline)
+    fit_seconds = time.perf_counter() - start
+    peak_rss = _peak_rss_mb()
+
+    holdout_texts, holdout_labels = _collect(
+        streaming.split_holdout(streaming.iter_corpus_chunks(corpus, options["chunk_size"]), holdout=True)
+    )
+    results.put(
+        {
+            "trainer": name,
+            "fit_seconds": fit_seconds,
+            "peak_rss_mb": peak_rss,
+            "rss_increase_mb": peak_rss - baseline_rss,
+            "model_mb": len(pickle.dumps(pipeline)) / (1024 * 1024),
+            **_measure_prediction(pipeline, holdout_texts, holdout_labels, options["latency_samples"]),
+        }
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark batch vs streaming triage training.")
+    parser.add_argument("--documents", type=int, default=200_000)
+    parser.add_argument("--corpus", type=Path, help="existing CSV corpus to use instead of a synthetic one")
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--n-features", type=int, default=2**20)
+    parser.add_argument("--latency-samples", type=int, default=500)
+    args = parser.parse_args(argv)
+    options = {
+        "chunk_size": args.chunk_size,
+        "epochs": args.epochs,
+        "n_features": args.n_features,
+        "latency_samples": args.latency_samples,
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        corpus = args.corpus
+        if corpus is None:
+            corpus = Path(directory) / "corpus.csv"
+            write_synthetic_corpus(corpus, args.documents)
+        context = multiprocessing.get_context("spawn")
+        rows = []
+        for name in ("batch", "streaming"):
+            results = context.Queue()
+            process = context.Process(target=_run_trainer, args=(name, corpus, options, results))
+            process.start()
+            rows.append(results.get())
+            process.join()
+
+    columns = list(rows[0])
+    print(" | ".join(columns))
+    for row in rows:
+        print(" | ".join(f"{row[column]:.3f}" if isinstance(row[column], float) else str(row[column]) for column in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Build the MinHash/LSH index of reference cases used by ``/cases/similar``.
+
+Indexes every row of ``dataset.csv``. With ``--include-timeline`` the symptom sets and top
+predictions of saved timeline cases are added too (without any user data); they are labelled
+``timeline`` because their disease is a model prediction, not a confirmed diagnosis.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from itertools import chain
+from pathlib import Path
+from typing import Iterator, Optional, Sequence, Tuple
+
+ROOT_DIR = Path(__file__).resolve().parents[3]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.append(str(ROOT_DIR))
+
+from backend.app.core.config import get_settings
+from backend.app.data import timeline_store
+from backend.app.data.runtime_data import iter_dataset_cases
+from backend.app.ml.preprocess import normalize_symptom
+from backend.app.ml.similar_cases import build_case_index, write_case_index
+
+
+def _timeline_cases() -> Iterator[Tuple[str, str, list]]:
+    for disease, symptoms in timeline_store.iter_labeled_cases():
+        yield "timeline", disease, [value for symptom in symptoms if (value := normalize_symptom(symptom))]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Build the similar-case LSH index.")
+    parser.add_argument("--bands", type=int, default=20, help="More bands raise recall and candidate counts")
+    parser.add_argument("--rows", type=int, default=3, help="More rows per band raise the similarity threshold")
+    parser.add_argument("--include-timeline", action="store_true", help="Also index saved timeline cases")
+    parser.add_argument("--output", type=Path, default=settings.case_index_path)
+    args = parser.parse_args(argv)
+
+    cases = (("dataset", disease, symptoms) for disease, symptoms in iter_dataset_cases())
+    if args.include_timeline:
+        cases = chain(cases, _timeline_cases())
+    arrays = build_case_index(cases, bands=args.bands, rows=args.rows)
+    write_case_index(arrays, args.output)
+    logging.info(
+        "Saved case index (%d distinct cases, %d bands x %d rows) to %s",
+        len(arrays["case_count"]),
+        args.bands,
+        args.rows,
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
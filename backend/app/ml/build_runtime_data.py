@@ -0,0 +1,40 @@
+"""Compile the CSV datasets into the runtime data artifact loaded by the API."""
+from __future__ import annotations
+
+import logging
+import pickle
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[3]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.append(str(ROOT_DIR))
+
+from backend.app.core.config import get_settings
+from backend.app.data.runtime_data import compile_runtime_data, write_runtime_data
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    settings = get_settings()
+
+    vocabulary = None
+    if settings.diagnosis_model_path.exists():
+        with open(settings.diagnosis_model_path, "rb") as file:
+            vocabulary = list(pickle.load(file)["symptom_to_index"])
+        logging.info("Using vocabulary from %s", settings.diagnosis_model_path)
+    else:
+        logging.info("Diagnosis model not found; deriving vocabulary from %s", settings.dataset_path)
+
+    data = compile_runtime_data(vocabulary)
+    write_runtime_data(data, settings.runtime_data_path)
+    logging.info(
+        "Saved runtime data (%d symptoms, %d diseases) to %s",
+        len(data["vocabulary"]),
+        len(data["diseases"]),
+        settings.runtime_data_path,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Server-side interactive diagnosis sessions.
+
+A session keeps the encoded symptom vector and the flattened forest's per-tree leaf assignments
+for the symptoms entered so far, so adding, re-weighting or removing one symptom only re-routes
+the trees whose decision path tests that feature instead of re-scoring the whole forest.
+
+Sessions live in process memory and are evicted after ``DIAGNOSIS_SESSION_TTL_MINUTES`` without
+activity, or oldest first once ``DIAGNOSIS_SESSION_MAX`` sessions are open. With several worker
+processes, clients must be routed back to the worker that created their session.
+"""
+from __future__ import annotations
+
+import secrets
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from backend.app.core.config import get_settings
+from backend.app.ml import inference
+from backend.app.ml.forest import FlatForest, get_flat_forest
+from backend.app.ml.preprocess import symptom_weight
+
+
+class DiagnosisSession:
+    def __init__(self, forest: FlatForest) -> None:
+        self.id = secrets.token_urlsafe(16)
+        self.lock = Lock()
+        self.last_access = time.monotonic()
+        self.symptoms: List[str] = []
+        self.severity_overrides: Dict[str, float] = {}
+        self.trees_rerouted = forest.n_trees
+        self._forest = forest
+        self._x = forest.prepare(np.zeros(forest.n_features))
+        self._state = forest.evaluate(self._x)
+
+    def _reweight(self, symptom: str) -> int:
+        bundle = inference.get_diagnosis_bundle()
+        index = bundle["symptom_to_index"].get(symptom)
+        if index is None:
+            return 0
+        weight = 0.0
+        if symptom in self.symptoms:
+            weight = symptom_weight(symptom, bundle["severity_map"], self.severity_overrides)
+        value = self._forest.prepare([weight])[0]
+        if value == self._x[index]:
+            return 0
+        self._x[index] = value
+        return self._forest.update(self._state, self._x, index)
+
+    def set_symptom(self, symptom: str, severity: Optional[float] = None) -> int:
+        """Add ``symptom`` or change its severity; returns the number of trees re-routed."""
+        if symptom not in self.symptoms:
+            self.symptoms.append(symptom)
+        if severity is None:
+            self.severity_overrides.pop(symptom, None)
+        else:
+            self.severity_overrides[symptom] = float(severity)
+        self.trees_rerouted = self._reweight(symptom)
+        return self.trees_rerouted
+
+    def remove_symptom(self, symptom: str) -> bool:
+        if symptom not in self.symptoms:
+            return False
+        self.symptoms.remove(symptom)
+        self.severity_overrides.pop(symptom, None)
+        self.trees_rerouted = self._reweight(symptom)
+        return True
+
+    def has_mapped_symptoms(self) -> bool:
+        return any(self._x)
+
+    def probabilities(self) -> np.ndarray:
+        return self._forest.predict_proba(self._state)
+
+
+_LOCK = Lock()
+_SESSIONS: "OrderedDict[str, DiagnosisSession]" = OrderedDict()
+
+
+def _evict(now: float) -> None:
+    """Drop idle sessions; ``_SESSIONS`` is ordered by last access. Requires ``_LOCK``."""
+    settings = get_settings()
+    ttl = settings.diagnosis_session_ttl_minutes * 60
+    while _SESSIONS:
+        session = next(iter(_SESSIONS.values()))
+        if now - session.last_access < ttl and len(_SESSIONS) <= settings.diagnosis_session_max:
+            break
+        _SESSIONS.popitem(last=False)
+
+
+def create_session() -> DiagnosisSession:
+    session = DiagnosisSession(get_flat_forest())
+    with _LOCK:
+        _SESSIONS[session.id] = session
+        _evict(session.last_access)
+    return session
+
+
+def get_session(session_id: str) -> Optional[DiagnosisSession]:
+    """Return a live session and refresh its idle timer."""
+    now = time.monotonic()
+    with _LOCK:
+        _evict(now)
+        session = _SESSIONS.get(session_id)
+        if session is not None:
+            session.last_access = now
+            _SESSIONS.move_to_end(session_id)
+        return session
+
+
+def close_session(session_id: str) -> bool:
+    with _LOCK:
+        return _SESSIONS.pop(session_id, None) is not None
+
+
+def session_count() -> int:
+    with _LOCK:
+        _evict(time.monotonic())
+        return len(_SESSIONS)
@@ -0,0 +1,112 @@
+"""Flattened random forest with incremental re-evaluation.
+
+``FlatForest`` copies the node arrays of a fitted ``RandomForestClassifier`` into plain Python
+lists so single rows can be routed without sklearn's per-call overhead. ``ForestState`` keeps
+the leaf each tree assigns to one input vector together with the features tested on that
+decision path, so changing one feature only re-routes the trees whose current path tests it.
+Probabilities match ``predict_proba``: the mean of the per-tree leaf class distributions.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Dict, List, Sequence, Set, Tuple
+
+import numpy as np
+
+from backend.app.ml import inference
+
+
+class ForestState:
+    """Leaf assignments and decision-path index for one input vector."""
+
+    __slots__ = ("leaves", "paths", "feature_trees")
+
+    def __init__(self, n_trees: int) -> None:
+        self.leaves: List[int] = [0] * n_trees
+        self.paths: List[Tuple[int, ...]] = [()] * n_trees
+        self.feature_trees: Dict[int, Set[int]] = {}
+
+
+class FlatForest:
+    def __init__(self, model) -> None:
+        features: List[int] = []
+        thresholds: List[float] = []
+        left: List[int] = []
+        right: List[int] = []
+        leaf_rows: Dict[int, int] = {}
+        leaf_values: List[np.ndarray] = []
+        self.roots: List[int] = []
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            offset = len(features)
+            self.roots.append(offset)
+            is_leaf = tree.children_left == -1
+            features.extend(np.where(is_leaf, -1, tree.feature).tolist())
+            thresholds.extend(tree.threshold.tolist())
+            left.extend(np.where(is_leaf, -1, tree.children_left + offset).tolist())
+            right.extend(np.where(is_leaf, -1, tree.children_right + offset).tolist())
+            leaves = np.flatnonzero(is_leaf)
+            leaf_rows.update(zip((leaves + offset).tolist(), range(len(leaf_rows), len(leaf_rows) + len(leaves))))
+            values = tree.value[leaves, 0, :].astype(float)
+            totals = values.sum(axis=1, keepdims=True)
+            leaf_values.append(np.divide(values, totals, out=np.zeros_like(values), where=totals > 0))
+        self.feature = features
+        self.threshold = thresholds
+        self.left = left
+        self.right = right
+        self.leaf_rows = leaf_rows
+        self.leaf_values = np.vstack(leaf_values)
+        self.n_trees = len(self.roots)
+        self.n_features = int(model.n_features_in_)
+        self.classes_ = model.classes_
+
+    @staticmethod
+    def prepare(vector: Sequence[float]) -> List[float]:
+        """Round inputs to float32 like sklearn does before comparing them with thresholds."""
+        return np.asarray(vector, dtype=np.float32).astype(float).tolist()
+
+    def _route(self, tree: int, x: Sequence[float]) -> Tuple[int, Tuple[int, ...]]:
+        feature, threshold, left, right = self.feature, self.threshold, self.left, self.right
+        node = self.roots[tree]
+        path: List[int] = []
+        while left[node] != -1:
+            tested = feature[node]
+            path.append(tested)
+            node = left[node] if x[tested] <= threshold[node] else right[node]
+        return node, tuple(path)
+
+    def _assign(self, state: ForestState, tree: int, x: Sequence[float]) -> None:
+        for tested in set(state.paths[tree]):
+            state.feature_trees[tested].discard(tree)
+        leaf, path = self._route(tree, x)
+        state.leaves[tree] = leaf
+        state.paths[tree] = path
+        for tested in set(path):
+            state.feature_trees.setdefault(tested, set()).add(tree)
+
+    def evaluate(self, x: Sequence[float]) -> ForestState:
+        """Route ``x`` (see :meth:`prepare`) through every tree."""
+        state = ForestState(self.n_trees)
+        for tree in range(self.n_trees):
+            self._assign(state, tree, x)
+        return state
+
+    def update(self, state: ForestState, x: Sequence[float], feature: int) -> int:
+        """Re-route the trees whose decision path tests ``feature``; returns how many were re-routed."""
+        trees = list(state.feature_trees.get(feature, ()))
+        for tree in trees:
+            self._assign(state, tree, x)
+        return len(trees)
+
+    def predict_proba(self, state: ForestState) -> np.ndarray:
+        rows = [self.leaf_rows[leaf] for leaf in state.leaves]
+        return self.leaf_values[rows].sum(axis=0) / self.n_trees
+
+
+@lru_cache(maxsize=2)  # the serving model and, during a hot swap, its replacement
+def flat_forest_for(model) -> FlatForest:
+    return FlatForest(model)
+
+
+def get_flat_forest() -> FlatForest:
+    return flat_forest_for(inference.get_diagnosis_bundle()["model"])
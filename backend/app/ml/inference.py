@@ -2,16 +2,19 @@
 from __future__ import annotations
 
 import logging
+import os
 import pickle
 from functools import lru_cache
-from typing import Dict, List, Mapping, Sequence
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
 
 import numpy as np
-import pandas as pd
 
 from backend.app.core.config import get_settings
-from backend.app.data.loader import load_descriptions, load_precautions
-from backend.app.ml.preprocess import clean_text, encode_symptoms, generate_severity_score, normalize_symptom
+from backend.app.data.runtime_data import get_runtime_data
+from backend.app.ml.preprocess import clean_text, encode_symptoms, generate_severity_score
+from backend.app.ml.symptom_set import SymptomIndex, SymptomSet
 
 logger = logging.getLogger(__name__)
 
@@ -22,17 +25,65 @@ def _load_pickle(path) -> object:
         return pickle.load(file)
 
 
-@lru_cache
-def get_diagnosis_bundle() -> Dict:
-    settings = get_settings()
-    bundle = _load_pickle(settings.diagnosis_model_path)
+_BUNDLE_LOCK = Lock()
+_BUNDLE: Dict[str, Any] = {}  # the serving bundle and the stat of the file it was read from
+
+
+def read_diagnosis_bundle(path: Path) -> Tuple[Dict, Tuple[int, int, int]]:
+    """Read a diagnosis bundle from ``path`` without caching it; returns it with the file's stat key."""
+    with open(path, "rb") as file:
+        stat = os.fstat(file.fileno())
+        bundle = pickle.load(file)
     required_keys = {"model", "symptom_to_index", "severity_map"}
     missing = required_keys - set(bundle.keys())
     if missing:
         raise RuntimeError(f"Diagnosis model bundle is missing keys: {missing}")
+    return bundle, (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def get_diagnosis_bundle() -> Dict:
+    bundle = _BUNDLE.get("bundle")
+    if bundle is None:
+        with _BUNDLE_LOCK:
+            if "bundle" not in _BUNDLE:
+                bundle, stat = read_diagnosis_bundle(get_settings().diagnosis_model_path)
+                _BUNDLE.update(bundle=bundle, stat=stat)
+            bundle = _BUNDLE["bundle"]
     return bundle
 
 
+def reload_diagnosis_bundle(force: bool = False) -> bool:
+    """Swap in the diagnosis bundle on disk if the file changed since it was loaded.
+
+    Only a model trained on the same vocabulary, severity weights and disease classes can be
+    swapped in while serving (e.g. one updated by ``update_diagnosis_model.py``); anything else
+    raises ``RuntimeError`` and needs a restart, because interned symptom sets, the spell checker
+    and the phrase table are built from the loaded vocabulary. Returns whether a swap happened.
+    """
+    path = get_settings().diagnosis_model_path
+    current = get_diagnosis_bundle()
+    stat = os.stat(path)
+    if not force and (stat.st_ino, stat.st_size, stat.st_mtime_ns) == _BUNDLE.get("stat"):
+        return False
+    bundle, stat_key = read_diagnosis_bundle(path)
+    if (
+        bundle["symptom_to_index"] != current["symptom_to_index"]
+        or bundle["severity_map"] != current["severity_map"]
+        or list(bundle["model"].classes_) != list(current["model"].classes_)
+    ):
+        _BUNDLE["stat"] = stat_key  # report the incompatible file once
+        raise RuntimeError(f"{path} changed vocabulary, severity weights or classes; restart to load it.")
+    from backend.app.ml import forest, recommender  # they import this module
+
+    forest.flat_forest_for(bundle["model"])  # built before the swap so requests never wait on it
+    with _BUNDLE_LOCK:
+        _BUNDLE.update(bundle=bundle, stat=stat_key)
+    _class_probabilities.cache_clear()
+    recommender.get_symptom_statistics.cache_clear()
+    logger.info("Swapped in diagnosis model %s (%d trees).", path, len(bundle["model"].estimators_))
+    return True
+
+
 @lru_cache
 def get_triage_model():
     settings = get_settings()
@@ -41,28 +92,16 @@ def get_triage_model():
 
 @lru_cache
 def get_disease_metadata() -> Dict[str, Dict[str, List[str]]]:
-    precautions = load_precautions()
-    descriptions = load_descriptions()
-    merged = precautions.merge(descriptions, on="Disease", how="left")
-    metadata: Dict[str, Dict[str, List[str] | str]] = {}
-    precaution_columns = [col for col in precautions.columns if col.lower().startswith("precaution")]
-
-    for _, row in merged.iterrows():
-        disease = str(row["Disease"]).strip()
-        precaution_values = []
-        for column in precaution_columns:
-            value = row[column]
-            if pd.notna(value):
-                text = str(value).strip()
-                if text and text.lower() != "nan":
-                    precaution_values.append(text)
-        description_value = row.get("Description", "")
-        description = str(description_value).strip() if pd.notna(description_value) else ""
-        metadata[disease] = {
-            "description": description,
-            "precautions": precaution_values,
-        }
-    return metadata
+    return get_runtime_data()["diseases"]
+
+
+@lru_cache
+def get_symptom_vocabulary() -> List[str]:
+    """Return the sorted symptom vocabulary understood by the diagnosis model."""
+    vocabulary = sorted(get_diagnosis_bundle()["symptom_to_index"])
+    if vocabulary != get_runtime_data()["vocabulary"]:
+        logger.warning("Runtime data vocabulary differs from the diagnosis model; rebuild runtime data.")
+    return vocabulary
 
 
 _RED_FLAG_RULES = (
@@ -75,15 +114,35 @@ _RED_FLAG_RULES = (
 )
 
 
-def detect_red_flags(symptoms: Sequence[str]) -> List[str]:
-    normalized = {
-        value for symptom in symptoms if (value := normalize_symptom(symptom))
-    }
-    flags: List[str] = []
-    for required, message in _RED_FLAG_RULES:
-        if required.issubset(normalized):
-            flags.append(message)
-    return flags
+@lru_cache
+def get_symptom_index() -> SymptomIndex:
+    """Interning table for the serving model's vocabulary plus the terms used by the rules below."""
+    bundle = get_diagnosis_bundle()
+    rule_terms = [symptom for required, _ in _RED_FLAG_RULES for symptom in sorted(required)]
+    return SymptomIndex(bundle["symptom_to_index"], bundle["severity_map"], [*rule_terms, *_FOLLOW_UP_BANK])
+
+
+def intern_symptoms(
+    symptoms: Sequence[str],
+    severity_overrides: Mapping[str, float] | None = None,
+    normalized: bool = False,
+) -> SymptomSet:
+    return get_symptom_index().intern(symptoms, severity_overrides, normalized=normalized)
+
+
+def _as_symptom_set(symptoms: Sequence[str] | SymptomSet) -> SymptomSet:
+    return symptoms if isinstance(symptoms, SymptomSet) else intern_symptoms(symptoms)
+
+
+@lru_cache
+def _red_flag_masks() -> List[Tuple[int, str]]:
+    index = get_symptom_index()
+    return [(index.mask(required), message) for required, message in _RED_FLAG_RULES]
+
+
+def detect_red_flags(symptoms: Sequence[str] | SymptomSet) -> List[str]:
+    bits = _as_symptom_set(symptoms).bits
+    return [message for mask, message in _red_flag_masks() if bits & mask == mask]
 
 
 _FOLLOW_UP_BANK = {
@@ -116,43 +175,85 @@ _FOLLOW_UP_BANK = {
 }
 
 
-def suggest_follow_up_questions(symptoms: Sequence[str], limit: int = 5) -> List[str]:
+@lru_cache
+def _follow_up_questions_by_id() -> Dict[int, List[str]]:
+    index = get_symptom_index()
+    return {index.ids[symptom]: questions for symptom, questions in _FOLLOW_UP_BANK.items()}
+
+
+def suggest_follow_up_questions(symptoms: Sequence[str] | SymptomSet, limit: int = 5) -> List[str]:
+    bank = _follow_up_questions_by_id()
     questions: List[str] = []
-    for symptom in symptoms:
-        key = normalize_symptom(symptom)
-        if key in _FOLLOW_UP_BANK:
-            questions.extend(_FOLLOW_UP_BANK[key])
+    for index in _as_symptom_set(symptoms).ids:
+        questions.extend(bank.get(index, ()))
     # deduplicate while preserving order
-    seen = set()
-    deduped = []
-    for question in questions:
-        if question not in seen:
-            seen.add(question)
-            deduped.append(question)
-    return deduped[:limit]
+    return list(dict.fromkeys(questions))[:limit]
+
+
+@lru_cache(maxsize=None)
+def triage_level_for(disease: str) -> str:
+    """Return the triage level for a disease; it depends only on the disease metadata."""
+    disease_info = get_disease_metadata().get(disease, {})
+    description = disease_info.get("description", "")
+    precautions = disease_info.get("precautions", [])
+    triage_text = clean_text(" ".join([disease, description, " ".join(precautions)]))
+    return str(get_triage_model().predict([triage_text])[0])
+
+
+@lru_cache(maxsize=4096)
+def _class_probabilities(model: Any, bits: int, overridden: Tuple[Tuple[int, float], ...]) -> np.ndarray:
+    """Probabilities of ``model`` for a symptom set, cached on its bitset key.
+
+    The model is part of the key so a request racing a model swap cannot cache stale results.
+    """
+    vector = get_symptom_index().vector(bits, overridden)
+    if float(vector.sum()) == 0:
+        raise ValueError("None of the provided symptoms could be mapped to the model vocabulary.")
+    probabilities = model.predict_proba(vector.reshape(1, -1))[0]
+    probabilities.setflags(write=False)  # shared between requests
+    return probabilities
+
+
+def rank_classes(probabilities: np.ndarray) -> np.ndarray:
+    """Class indices by descending probability along the last axis.
+
+    Shared by every ranking of model output so tied classes are ordered the same way everywhere.
+    """
+    return np.argsort(probabilities, axis=-1)[..., ::-1]
 
 
 def predict_diseases(
-    symptoms: Sequence[str],
+    symptoms: Sequence[str] | SymptomSet,
     top_k: int = 3,
     severity_overrides: Mapping[str, float] | None = None,
+    probabilities: np.ndarray | None = None,
+    bundle: Mapping | None = None,
 ) -> List[Dict]:
-    bundle = get_diagnosis_bundle()
-    model = bundle["model"]
-    symptom_to_index = bundle["symptom_to_index"]
-    severity_map = bundle["severity_map"]
-
-    vector = encode_symptoms(symptoms, symptom_to_index, severity_map, severity_overrides).reshape(1, -1)
-    if float(vector.sum()) == 0:
-        raise ValueError("None of the provided symptoms could be mapped to the model vocabulary.")
+    """Rank diseases for ``symptoms``.
 
-    probabilities = model.predict_proba(vector)[0]
-    classes = model.classes_
-    severity_score = generate_severity_score(symptoms, severity_map, severity_overrides)
+    ``symptoms`` may be a :class:`SymptomSet` interned with its severity overrides, in which case
+    ``severity_overrides`` is ignored. ``probabilities`` may carry class probabilities that were
+    already computed for the same symptoms (e.g. by a diagnosis session), in which case the model
+    is not invoked. ``bundle`` replaces the serving diagnosis bundle, e.g. with a candidate model
+    under shadow evaluation; ``symptoms`` must then be names.
+    """
+    if bundle is None:
+        bundle = get_diagnosis_bundle()
+        symptom_set = symptoms if isinstance(symptoms, SymptomSet) else intern_symptoms(symptoms, severity_overrides)
+        if probabilities is None:
+            probabilities = _class_probabilities(bundle["model"], *symptom_set.key)
+        severity_score = symptom_set.severity_score
+    else:
+        if probabilities is None:
+            vector = encode_symptoms(symptoms, bundle["symptom_to_index"], bundle["severity_map"], severity_overrides)
+            if float(vector.sum()) == 0:
+                raise ValueError("None of the provided symptoms could be mapped to the model vocabulary.")
+            probabilities = bundle["model"].predict_proba(vector.reshape(1, -1))[0]
+        severity_score = generate_severity_score(symptoms, bundle["severity_map"], severity_overrides)
+    classes = bundle["model"].classes_
 
-    top_indices = np.argsort(probabilities)[::-1][:top_k]
+    top_indices = rank_classes(probabilities)[:top_k]
     metadata = get_disease_metadata()
-    triage_model = get_triage_model()
 
     results: List[Dict] = []
     for index in top_indices:
@@ -161,8 +262,7 @@ def predict_diseases(
         disease_info = metadata.get(disease, {})
         precautions = disease_info.get("precautions", [])
         description = disease_info.get("description", "")
-        triage_text = clean_text(" ".join([disease, description, " ".join(precautions)]))
-        triage_level = triage_model.predict([triage_text])[0]
+        triage_level = triage_level_for(disease)
 
         results.append(
             {
@@ -2,10 +2,12 @@
 from __future__ import annotations
 
 import re
-from typing import Iterable, Mapping, Sequence
+from typing import TYPE_CHECKING, Iterable, Mapping, Sequence
 
 import numpy as np
-import pandas as pd
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 _SYMPTOM_SANITIZER = re.compile(r"[^a-z0-9_\s]")
 _TEXT_SANITIZER = re.compile(r"[^a-z0-9\s]")
@@ -34,6 +36,19 @@ def clean_text(text: str) -> str:
     return _WHITESPACE.sub(" ", sanitized).strip()
 
 
+def symptom_weight(
+    symptom: str,
+    severity_map: Mapping[str, float],
+    severity_overrides: Mapping[str, float] | None = None,
+) -> float:
+    """Return the severity weight of one normalized symptom, scaled by a 0-10 user severity."""
+    base_weight = severity_map.get(symptom, 1.0)
+    override = (severity_overrides or {}).get(symptom)
+    if override is None:
+        return base_weight
+    return base_weight * (1 + max(min(override, 10.0), 0.0) / 10.0)  # 0-10 scale -> 1.0 to 2.0x
+
+
 def encode_symptoms(
     symptom_list: Sequence[str],
     symptom_to_index: Mapping[str, int],
@@ -47,18 +62,11 @@ def encode_symptoms(
         normalized = normalize_symptom(raw_symptom)
         if normalized:
             unique_symptoms.add(normalized)
-    severity_overrides = severity_overrides or {}
     for symptom in unique_symptoms:
         index = symptom_to_index.get(symptom)
         if index is None:
             continue
-        base_weight = severity_map.get(symptom, 1.0)
-        override = severity_overrides.get(symptom)
-        if override is not None:
-            factor = 1 + max(min(override, 10.0), 0.0) / 10.0  # 0-10 scale -> 1.0 to 2.0x
-            vector[index] = base_weight * factor
-        else:
-            vector[index] = base_weight
+        vector[index] = symptom_weight(symptom, severity_map, severity_overrides)
     return vector
 
 
@@ -73,21 +81,16 @@ def generate_severity_score(
         normalized = normalize_symptom(raw_symptom)
         if normalized:
             unique_symptoms.add(normalized)
-    severity_overrides = severity_overrides or {}
     total = 0.0
     for symptom in unique_symptoms:
-        base = severity_map.get(symptom, 1.0)
-        override = severity_overrides.get(symptom)
-        if override is not None:
-            factor = 1 + max(min(override, 10.0), 0.0) / 10.0
-            total += base * factor
-        else:
-            total += base
+        total += symptom_weight(symptom, severity_map, severity_overrides)
     return float(total)
 
 
 def create_triage_labels(df: pd.DataFrame) -> pd.DataFrame:
     """Attach heuristic triage labels based on precaution keywords."""
+    import pandas as pd  # training-only dependency; keep it out of the serving import path
+
     precaution_columns = [col for col in df.columns if col.lower().startswith("precaution")]
     labeled_df = df.copy()
 
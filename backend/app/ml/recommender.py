@@ -0,0 +1,166 @@
+"""Data-driven "next most informative symptom" recommendations.
+
+Training stores symptom statistics in the diagnosis bundle under ``symptom_statistics``: a
+sparse disease x symptom matrix of P(symptom | disease) and a sparse symptom co-occurrence
+matrix, both computed from ``dataset.csv``. At request time every unasked symptom seen with one
+of the current top-ranked diseases is scored by the expected reduction in entropy of the
+distribution over those diseases if it were asked about; co-occurrence with the reported
+symptoms breaks ties.
+"""
+from __future__ import annotations
+
+import logging
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Mapping, Sequence
+
+import numpy as np
+from scipy import sparse
+
+from backend.app.ml import inference
+
+logger = logging.getLogger(__name__)
+
+
+def build_symptom_statistics(
+    samples: Iterable[Iterable[int]],
+    labels: Iterable[str],
+    diseases: Sequence[str],
+    n_symptoms: int,
+) -> Dict[str, Any]:
+    """Aggregate training samples (symptom index sets) into the bundle's symptom statistics."""
+    disease_rows = {disease: row for row, disease in enumerate(diseases)}
+    cases: List[int] = []
+    case_rows: List[int] = []
+    case_symptoms: List[int] = []
+    for indices, label in zip(samples, labels):
+        indices = sorted(set(int(index) for index in indices))
+        if label not in disease_rows or not indices:
+            continue
+        cases.append(disease_rows[label])
+        case_rows.extend([len(cases) - 1] * len(indices))
+        case_symptoms.extend(indices)
+    incidence = sparse.csr_matrix(
+        (np.ones(len(case_rows)), (case_rows, case_symptoms)), shape=(len(cases), n_symptoms)
+    )
+    membership = sparse.csr_matrix(
+        (np.ones(len(cases)), (cases, np.arange(len(cases)))), shape=(len(diseases), len(cases))
+    )
+    disease_counts = np.asarray(membership.sum(axis=1)).ravel()
+    counts = (membership @ incidence).tocsr()
+    scale = sparse.diags(np.divide(1.0, disease_counts, out=np.zeros(len(diseases)), where=disease_counts > 0))
+    cooccurrence = (incidence.T @ incidence).tocsr()
+    cooccurrence.setdiag(0)
+    cooccurrence.eliminate_zeros()
+    return {
+        "diseases": list(diseases),
+        "disease_counts": disease_counts,
+        "disease_symptom": (scale @ counts).tocsr(),
+        "cooccurrence": cooccurrence,
+    }
+
+
+def _statistics_from_dataset(bundle: Mapping[str, Any]) -> Dict[str, Any]:
+    from backend.app.data.runtime_data import iter_dataset_cases
+
+    symptom_to_index = bundle["symptom_to_index"]
+    labels: List[str] = []
+    samples: List[List[int]] = []
+    for disease, symptoms in iter_dataset_cases():
+        labels.append(disease)
+        samples.append([symptom_to_index[symptom] for symptom in symptoms if symptom in symptom_to_index])
+    return build_symptom_statistics(samples, labels, list(bundle["model"].classes_), len(symptom_to_index))
+
+
+@lru_cache
+def get_symptom_statistics() -> Dict[str, Any]:
+    bundle = inference.get_diagnosis_bundle()
+    statistics = bundle.get("symptom_statistics")
+    if statistics is None:
+        logger.warning("Diagnosis bundle has no symptom statistics; computing them from the dataset.")
+        statistics = _statistics_from_dataset(bundle)
+    return {
+        **statistics,
+        "disease_rows": {disease: row for row, disease in enumerate(statistics["diseases"])},
+        "index_to_symptom": {index: symptom for symptom, index in bundle["symptom_to_index"].items()},
+    }
+
+
+def cooccurring_symptoms(symptoms: Sequence[str], limit: int = 5) -> List[str]:
+    """Return the unreported symptoms that most often co-occur with ``symptoms`` in the dataset."""
+    if limit <= 0:
+        return []
+    statistics = get_symptom_statistics()
+    symptom_to_index = inference.get_diagnosis_bundle()["symptom_to_index"]
+    asked = [symptom_to_index[symptom] for symptom in symptoms if symptom in symptom_to_index]
+    if not asked:
+        return []
+    counts = np.asarray(statistics["cooccurrence"][asked].sum(axis=0)).ravel()
+    counts[asked] = 0
+    top = [index for index in np.lexsort((np.arange(len(counts)), -counts)) if counts[index] > 0][:limit]
+    return [statistics["index_to_symptom"][int(index)] for index in top]
+
+
+def _entropy(distribution: np.ndarray) -> np.ndarray:
+    """Entropy in bits along the first axis; zero-probability terms contribute nothing."""
+    logs = np.log2(distribution, out=np.zeros_like(distribution), where=distribution > 0)
+    return -(distribution * logs).sum(axis=0)
+
+
+def recommend_symptoms(
+    symptoms: Sequence[str],
+    disease_probabilities: Mapping[str, float],
+    limit: int = 5,
+) -> List[Dict[str, Any]]:
+    """Rank unasked symptoms by expected information gain over the given candidate diseases.
+
+    ``disease_probabilities`` is typically the model's top-k ranking; it is renormalized. Each
+    result carries the symptom, its expected information gain in bits and the probability that
+    the patient has it under the current ranking.
+    """
+    statistics = get_symptom_statistics()
+    symptom_to_index = inference.get_diagnosis_bundle()["symptom_to_index"]
+    disease_rows = statistics["disease_rows"]
+    rows = [disease_rows[disease] for disease in disease_probabilities if disease in disease_rows]
+    if len(rows) < 2:
+        return []
+    prior = np.array([disease_probabilities[statistics["diseases"][row]] for row in rows], dtype=float)
+    if prior.sum() <= 0:
+        return []
+    prior = prior / prior.sum()
+
+    asked = [symptom_to_index[symptom] for symptom in symptoms if symptom in symptom_to_index]
+    likelihood = statistics["disease_symptom"][rows]
+    # Symptoms absent from every candidate disease cannot separate them, so only the sparse
+    # union of the candidates' symptom columns is scored.
+    candidates = np.asarray(likelihood.sum(axis=0)).ravel() > 0
+    candidates[asked] = False
+    columns = np.flatnonzero(candidates)
+    if not len(columns):
+        return []
+
+    present = likelihood[:, columns].toarray()  # P(symptom | disease), diseases x candidates
+    p_present = prior @ present
+    joint_yes = prior[:, None] * present
+    joint_no = prior[:, None] * (1.0 - present)
+    p_absent = 1.0 - p_present
+    posterior_yes = np.divide(joint_yes, p_present, out=np.zeros_like(joint_yes), where=p_present > 0)
+    posterior_no = np.divide(joint_no, p_absent, out=np.zeros_like(joint_no), where=p_absent > 0)
+    gain = _entropy(prior[:, None]) - p_present * _entropy(posterior_yes) - p_absent * _entropy(posterior_no)
+
+    # Ties in gain are common (several symptoms may split the candidates identically); prefer
+    # the symptoms that co-occur most often with those already reported.
+    if asked:
+        related = np.asarray(statistics["cooccurrence"][asked][:, columns].sum(axis=0)).ravel()
+    else:
+        related = np.zeros(len(columns))
+    gain = np.round(gain, 12)
+    order = [position for position in np.lexsort((columns, -related, -gain)) if gain[position] > 0][:limit]
+    index_to_symptom = statistics["index_to_symptom"]
+    return [
+        {
+            "symptom": index_to_symptom[int(columns[position])],
+            "information_gain": float(gain[position]),
+            "probability": float(p_present[position]),
+        }
+        for position in order
+    ]
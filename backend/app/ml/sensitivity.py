@@ -0,0 +1,99 @@
+"""What-if sensitivity analysis for a symptom set.
+
+All perturbations of the baseline (leave one symptom out, add one of the symptoms that most
+often co-occur with it, sweep the severity of one symptom) are encoded as rows of a single
+matrix and scored with one ``predict_proba`` call. Ranks for every row come from one argsort,
+ordered like ``inference.predict_diseases``.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from backend.app.ml import inference, recommender
+from backend.app.ml.preprocess import encode_symptoms, symptom_weight
+
+
+def _ranked(probabilities: np.ndarray, order: np.ndarray, classes: np.ndarray, top_k: int) -> List[Dict[str, Any]]:
+    return [
+        {"disease": str(classes[index]), "probability": float(probabilities[index]), "rank": rank}
+        for rank, index in enumerate(order[:top_k], start=1)
+    ]
+
+
+def analyze(
+    symptoms: Sequence[str],
+    severity_overrides: Mapping[str, float] | None = None,
+    add_candidates: int = 5,
+    severity_levels: Sequence[float] = (0, 5, 10),
+    top_k: int = 3,
+) -> Dict[str, Any]:
+    """Score the baseline and every perturbation in one vectorized model call.
+
+    Raises ``ValueError`` if none of ``symptoms`` map to the model vocabulary.
+    """
+    bundle = inference.get_diagnosis_bundle()
+    model = bundle["model"]
+    symptom_to_index = bundle["symptom_to_index"]
+    severity_map = bundle["severity_map"]
+    overrides = dict(severity_overrides or {})
+
+    baseline = encode_symptoms(symptoms, symptom_to_index, severity_map, overrides)
+    if float(baseline.sum()) == 0:
+        raise ValueError("None of the provided symptoms could be mapped to the model vocabulary.")
+    mapped = [symptom for symptom in dict.fromkeys(symptoms) if symptom in symptom_to_index]
+
+    perturbations: List[Dict[str, Any]] = []
+    rows: List[np.ndarray] = [baseline]
+
+    def _add_row(kind: str, symptom: str, index: int, weight: float, severity: Optional[float] = None) -> None:
+        row = baseline.copy()
+        row[index] = weight
+        rows.append(row)
+        perturbations.append({"kind": kind, "symptom": symptom, "severity": severity})
+
+    for symptom in mapped:
+        _add_row("remove", symptom, symptom_to_index[symptom], 0.0)
+
+    for symptom in recommender.cooccurring_symptoms(mapped, limit=add_candidates):
+        _add_row("add", symptom, symptom_to_index[symptom], symptom_weight(symptom, severity_map))
+
+    for symptom in mapped:
+        for level in severity_levels:
+            weight = symptom_weight(symptom, severity_map, {symptom: float(level)})
+            if weight == baseline[symptom_to_index[symptom]]:
+                continue  # same row as the baseline, e.g. level 0 for a symptom without an override
+            _add_row("severity", symptom, symptom_to_index[symptom], weight, float(level))
+
+    matrix = np.vstack(rows)
+    probabilities = model.predict_proba(matrix)
+    order = inference.rank_classes(probabilities)
+    ranks = np.empty_like(order)
+    ranks[np.arange(len(matrix))[:, None], order] = np.arange(probabilities.shape[1])
+    classes = model.classes_
+
+    baseline_top = _ranked(probabilities[0], order[0], classes, top_k)
+    tracked = order[0, :top_k]
+    results: List[Dict[str, Any]] = []
+    for row, perturbation in enumerate(perturbations, start=1):
+        top = _ranked(probabilities[row], order[row], classes, top_k)
+        deltas = [
+            {
+                "disease": str(classes[index]),
+                "probability": float(probabilities[row, index]),
+                "probability_delta": float(probabilities[row, index] - probabilities[0, index]),
+                "rank": int(ranks[row, index]) + 1,
+                "rank_delta": int(ranks[row, index] - ranks[0, index]),
+            }
+            for index in tracked
+        ]
+        results.append(
+            {
+                **perturbation,
+                "top": top,
+                "deltas": deltas,
+                "top_changed": top[0]["disease"] != baseline_top[0]["disease"],
+            }
+        )
+    return {"baseline": baseline_top, "perturbations": results}
@@ -0,0 +1,219 @@
+"""Shadow evaluation of a candidate diagnosis bundle on live traffic.
+
+When ``SHADOW_MODEL_PATH`` points at a candidate bundle, a ``SHADOW_SAMPLE_RATE`` fraction of
+the requests scored by the serving model is copied onto a bounded in-memory queue together with
+the served ranking. A background worker scores each copy with the candidate and aggregates
+top-1 agreement, top-k overlap, triage-level disagreement and both models' latency
+distributions. Served requests may be answered from the probability cache, so the worker also
+times an uncached call of the serving model, through the same code path as the candidate, to
+compare like with like. The request path only samples and calls ``put_nowait``: when the
+queue is full the copy is dropped and counted, so shadow traffic never delays ``/predict``.
+
+Statistics are kept per worker process and reset on restart or when the candidate file changes.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import random
+import time
+from collections import Counter, deque
+from functools import lru_cache
+from pathlib import Path
+from queue import Empty, Full, Queue
+from threading import Event, Lock, Thread
+from typing import Any, Deque, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.app.core.config import get_settings
+from backend.app.ml import inference
+
+logger = logging.getLogger(__name__)
+
+_LATENCY_PERCENTILES = (50, 90, 99)
+
+
+class ShadowRequest(NamedTuple):
+    symptoms: tuple
+    severity_overrides: Dict[str, float]
+    primary_diseases: tuple
+    primary_triage_level: str
+
+
+def _latency_summary(samples: Sequence[float]) -> Dict[str, Any]:
+    if not samples:
+        return {"count": 0}
+    values = np.asarray(samples)
+    summary: Dict[str, Any] = {"count": int(values.size), "mean_ms": round(float(values.mean()), 3)}
+    for percentile, value in zip(_LATENCY_PERCENTILES, np.percentile(values, _LATENCY_PERCENTILES)):
+        summary[f"p{percentile}_ms"] = round(float(value), 3)
+    summary["max_ms"] = round(float(values.max()), 3)
+    return summary
+
+
+class ShadowEvaluator:
+    def __init__(self, candidate_path: Path, sample_rate: float, queue_size: int, latency_window: int) -> None:
+        self.candidate_path = candidate_path
+        self.sample_rate = sample_rate
+        self._queue: Queue[ShadowRequest] = Queue(maxsize=max(queue_size, 1))
+        self._latency_window = max(latency_window, 1)
+        self._lock = Lock()
+        self._candidate: Optional[Mapping[str, Any]] = None
+        self._candidate_stat: Optional[Tuple[int, int, int]] = None
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts: Counter = Counter()
+            self._topk_overlap = 0.0
+            self._disagreements: Counter = Counter()
+            self._primary_latency: Deque[float] = deque(maxlen=self._latency_window)
+            self._candidate_latency: Deque[float] = deque(maxlen=self._latency_window)
+
+    def _load_candidate(self) -> Mapping[str, Any]:
+        """Return the candidate bundle, re-reading it when the file changes.
+
+        Only the current candidate is held in memory. Statistics are reset on a reload because
+        they describe the previous candidate.
+        """
+        stat = os.stat(self.candidate_path)
+        if self._candidate is None or (stat.st_ino, stat.st_size, stat.st_mtime_ns) != self._candidate_stat:
+            replaced = self._candidate is not None
+            self._candidate = None  # release the old bundle before reading the new one
+            self._candidate, self._candidate_stat = inference.read_diagnosis_bundle(self.candidate_path)
+            if replaced:
+                self.reset()
+                logger.info("Reloaded shadow candidate %s; statistics reset.", self.candidate_path)
+        return self._candidate
+
+    def submit(
+        self,
+        symptoms: Sequence[str],
+        severity_overrides: Mapping[str, float],
+        results: Sequence[Mapping[str, Any]],
+    ) -> None:
+        """Queue a served prediction for shadow scoring if it is sampled; never blocks."""
+        if not results or random.random() >= self.sample_rate:
+            return
+        request = ShadowRequest(
+            tuple(symptoms),
+            dict(severity_overrides),
+            tuple(result["disease"] for result in results),
+            results[0]["triage_level"],
+        )
+        try:
+            self._queue.put_nowait(request)
+        except Full:
+            with self._lock:
+                self._counts["dropped"] += 1
+            return
+        with self._lock:
+            self._counts["enqueued"] += 1
+
+    def _timed_predict(self, request: ShadowRequest, bundle: Mapping[str, Any]) -> Tuple[List[Dict], float]:
+        start = time.perf_counter()
+        results = inference.predict_diseases(
+            request.symptoms,
+            top_k=len(request.primary_diseases),
+            severity_overrides=request.severity_overrides,
+            bundle=bundle,
+        )
+        return results, (time.perf_counter() - start) * 1000
+
+    def evaluate(self, request: ShadowRequest) -> None:
+        candidate = self._load_candidate()
+        try:
+            results, latency_ms = self._timed_predict(request, candidate)
+        except ValueError:  # none of the symptoms is in the candidate's vocabulary
+            with self._lock:
+                self._counts["unscorable"] += 1
+            return
+        _, primary_latency_ms = self._timed_predict(request, inference.get_diagnosis_bundle())
+
+        primary_top, candidate_top = request.primary_diseases[0], results[0]["disease"]
+        overlap = len(set(request.primary_diseases) & {result["disease"] for result in results})
+        with self._lock:
+            self._counts["evaluated"] += 1
+            self._topk_overlap += overlap / len(request.primary_diseases)
+            if primary_top == candidate_top:
+                self._counts["top1_agreement"] += 1
+            else:
+                self._disagreements[f"{primary_top} -> {candidate_top}"] += 1
+            if results[0]["triage_level"] != request.primary_triage_level:
+                self._counts["triage_disagreement"] += 1
+            self._primary_latency.append(primary_latency_ms)
+            self._candidate_latency.append(latency_ms)
+
+    def run(self, stop: Event) -> None:
+        while not stop.is_set():
+            try:
+                request = self._queue.get(timeout=0.5)
+            except Empty:
+                continue
+            try:
+                self.evaluate(request)
+            except Exception:
+                logger.exception("Shadow evaluation failed")
+                with self._lock:
+                    self._counts["errors"] += 1
+
+    def report(self, disagreement_limit: int = 10) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts)
+            evaluated = counts.get("evaluated", 0)
+            return {
+                "candidate_model_path": str(self.candidate_path),
+                "sample_rate": self.sample_rate,
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self._queue.maxsize,
+                "enqueued": counts.get("enqueued", 0),
+                "dropped": counts.get("dropped", 0),
+                "evaluated": evaluated,
+                "unscorable": counts.get("unscorable", 0),
+                "errors": counts.get("errors", 0),
+                "top1_agreement": round(counts.get("top1_agreement", 0) / evaluated, 4) if evaluated else None,
+                "topk_overlap": round(self._topk_overlap / evaluated, 4) if evaluated else None,
+                "triage_disagreement": round(counts.get("triage_disagreement", 0) / evaluated, 4) if evaluated else None,
+                "top1_disagreements": [
+                    {"pair": pair, "count": count} for pair, count in self._disagreements.most_common(disagreement_limit)
+                ],
+                "latency": {
+                    "primary": _latency_summary(self._primary_latency),
+                    "candidate": _latency_summary(self._candidate_latency),
+                },
+            }
+
+
+@lru_cache
+def get_evaluator() -> Optional[ShadowEvaluator]:
+    """Return the process-wide evaluator, or ``None`` when no candidate model is configured."""
+    settings = get_settings()
+    if settings.shadow_model_path is None or settings.shadow_sample_rate <= 0:
+        return None
+    return ShadowEvaluator(
+        settings.shadow_model_path,
+        settings.shadow_sample_rate,
+        settings.shadow_queue_size,
+        settings.shadow_latency_window,
+    )
+
+
+def submit(
+    symptoms: Sequence[str],
+    severity_overrides: Mapping[str, float],
+    results: List[Dict[str, Any]],
+) -> None:
+    evaluator = get_evaluator()
+    if evaluator is not None:
+        evaluator.submit(symptoms, severity_overrides, results)
+
+
+def start(stop: Event) -> Optional[Thread]:
+    """Start the background worker if shadow evaluation is configured."""
+    evaluator = get_evaluator()
+    if evaluator is None:
+        return None
+    thread = Thread(target=evaluator.run, args=(stop,), name="shadow-evaluation", daemon=True)
+    thread.start()
+    return thread
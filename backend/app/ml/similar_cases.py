@@ -0,0 +1,250 @@
+"""Similar reference cases via MinHash signatures and an LSH band index.
+
+Every reference case (a symptom set with its disease) gets a MinHash signature of ``bands * rows``
+values, one per universal hash function ``(a * id + b) mod (2^31 - 1)`` over the symptom IDs. The
+signature is split into ``bands`` bands of ``rows`` values. Each band is hashed to a 64-bit key
+and stored in a sorted array per band. Two sets share a band with probability ``J^rows`` for
+Jaccard similarity ``J``, so a query finds cases above roughly ``(1 / bands) ^ (1 / rows)``
+similarity with high probability. More bands or fewer rows raise recall at the cost of more
+candidates.
+
+A query computes the signature of its symptom set, looks up each band key with
+``np.searchsorted`` and re-ranks the union of the matching buckets by exact Jaccard similarity,
+so query time depends on the bucket sizes rather than the number of cases. ``max_candidates``
+caps the re-ranking work, keeping the candidates that share the most bands.
+
+Identical cases are stored once with a ``count``. The index is built offline by
+``build_case_index.py`` into ``CASE_INDEX_PATH`` and loaded at startup; without that file no
+similar cases are returned. Workers poll the file with :func:`reload_case_index`, so a rebuilt
+index is picked up without a restart.
+"""
+from __future__ import annotations
+
+import io
+import logging
+import os
+import random
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.app.core.config import get_settings
+from backend.app.data import json_store
+
+logger = logging.getLogger(__name__)
+
+_PRIME = (1 << 31) - 1
+
+
+def _signatures(hash_a: np.ndarray, hash_b: np.ndarray, offsets: np.ndarray, symptoms: np.ndarray) -> np.ndarray:
+    """MinHash signatures ``(cases, num_perm)`` of CSR symptom sets; every set must be non-empty."""
+    hashed = (np.outer(hash_a, symptoms.astype(np.int64) + 1) + hash_b[:, None]) % _PRIME
+    return np.minimum.reduceat(hashed, offsets[:-1], axis=1).T.astype(np.uint32)
+
+
+def _band_keys(signatures: np.ndarray, bands: int, rows: int, multipliers: np.ndarray) -> np.ndarray:
+    """Hash each band of ``rows`` signature values to a 64-bit key; returns ``(cases, bands)``."""
+    values = signatures[:, : bands * rows].astype(np.uint64).reshape(len(signatures), bands, rows)
+    return (values * multipliers).sum(axis=2, dtype=np.uint64)  # wraps modulo 2^64
+
+
+def build_case_index(
+    cases: Iterable[Tuple[str, str, Sequence[str]]],
+    bands: int = 20,
+    rows: int = 3,
+    seed: int = 42,
+    chunk_size: int = 50_000,
+) -> Dict[str, np.ndarray]:
+    """Build the index arrays from ``(source, disease, symptoms)`` cases."""
+    counts: Dict[Tuple[str, str, Tuple[str, ...]], int] = {}
+    for source, disease, symptoms in cases:
+        key = (source, disease, tuple(sorted(set(symptom for symptom in symptoms if symptom))))
+        if key[2]:
+            counts[key] = counts.get(key, 0) + 1
+
+    symptom_names = sorted({symptom for _, _, symptoms in counts for symptom in symptoms})
+    disease_names = sorted({disease for _, disease, _ in counts})
+    source_names = sorted({source for source, _, _ in counts})
+    symptom_ids = {name: index for index, name in enumerate(symptom_names)}
+    disease_ids = {name: index for index, name in enumerate(disease_names)}
+    source_ids = {name: index for index, name in enumerate(source_names)}
+
+    lengths = np.fromiter((len(symptoms) for _, _, symptoms in counts), dtype=np.int64, count=len(counts))
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    case_symptoms = np.fromiter(
+        (symptom_ids[symptom] for _, _, symptoms in counts for symptom in symptoms), dtype=np.int32, count=int(offsets[-1])
+    )
+
+    rng = random.Random(seed)
+    num_perm = bands * rows
+    hash_a = np.array([rng.randrange(1, _PRIME) for _ in range(num_perm)], dtype=np.int64)
+    hash_b = np.array([rng.randrange(0, _PRIME) for _ in range(num_perm)], dtype=np.int64)
+    multipliers = np.array([rng.getrandbits(64) | 1 for _ in range(rows)], dtype=np.uint64)
+
+    keys = np.empty((len(counts), bands), dtype=np.uint64)
+    for start in range(0, len(counts), chunk_size):
+        end = min(start + chunk_size, len(counts))
+        chunk_offsets = offsets[start : end + 1] - offsets[start]
+        chunk_symptoms = case_symptoms[offsets[start] : offsets[end]]
+        keys[start:end] = _band_keys(_signatures(hash_a, hash_b, chunk_offsets, chunk_symptoms), bands, rows, multipliers)
+    band_cases = np.argsort(keys, axis=0, kind="stable").T.astype(np.int32)
+    band_keys = np.take_along_axis(keys.T, band_cases, axis=1)
+
+    return {
+        "symptom_names": np.asarray(symptom_names, dtype=str),
+        "disease_names": np.asarray(disease_names, dtype=str),
+        "source_names": np.asarray(source_names, dtype=str),
+        "case_offsets": offsets,
+        "case_symptoms": case_symptoms,
+        "case_disease": np.fromiter((disease_ids[disease] for _, disease, _ in counts), dtype=np.int32, count=len(counts)),
+        "case_source": np.fromiter((source_ids[source] for source, _, _ in counts), dtype=np.uint8, count=len(counts)),
+        "case_count": np.fromiter(counts.values(), dtype=np.int32, count=len(counts)),
+        "hash_a": hash_a,
+        "hash_b": hash_b,
+        "band_multipliers": multipliers,
+        "band_keys": band_keys,
+        "band_cases": band_cases,
+    }
+
+
+def write_case_index(arrays: Mapping[str, np.ndarray], path: Path) -> None:
+    """Atomically replace the index file; running workers pick it up with :func:`reload_case_index`."""
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    json_store.write_bytes(path, buffer.getvalue())
+
+
+class CaseIndex:
+    def __init__(self, arrays: Mapping[str, np.ndarray]) -> None:
+        self.symptom_names: List[str] = arrays["symptom_names"].tolist()
+        self.disease_names: List[str] = arrays["disease_names"].tolist()
+        self.source_names: List[str] = arrays["source_names"].tolist()
+        self.symptom_ids = {name: index for index, name in enumerate(self.symptom_names)}
+        self.case_offsets = arrays["case_offsets"]
+        self.case_symptoms = arrays["case_symptoms"]
+        self.case_disease = arrays["case_disease"]
+        self.case_source = arrays["case_source"]
+        self.case_count = arrays["case_count"]
+        self.hash_a = arrays["hash_a"]
+        self.hash_b = arrays["hash_b"]
+        self.band_multipliers = arrays["band_multipliers"]
+        self.band_keys = arrays["band_keys"]
+        self.band_cases = arrays["band_cases"]
+        self.bands, self.rows = self.band_keys.shape[0], len(self.band_multipliers)
+        self._case_lengths = np.diff(self.case_offsets)
+
+    @property
+    def n_cases(self) -> int:
+        return len(self.case_count)
+
+    def candidates(self, symptom_ids: Sequence[int], max_candidates: int) -> np.ndarray:
+        """Cases sharing at least one band with the query, most shared bands first."""
+        signature = _signatures(self.hash_a, self.hash_b, np.array([0, len(symptom_ids)]), np.asarray(symptom_ids))
+        keys = _band_keys(signature, self.bands, self.rows, self.band_multipliers)[0]
+        buckets = []
+        for band, key in enumerate(keys):
+            band_keys = self.band_keys[band]
+            lo, hi = np.searchsorted(band_keys, key, side="left"), np.searchsorted(band_keys, key, side="right")
+            if hi > lo:
+                buckets.append(self.band_cases[band, lo:hi])
+        if not buckets:
+            return np.empty(0, dtype=np.int32)
+        candidates, shared = np.unique(np.concatenate(buckets), return_counts=True)
+        if len(candidates) > max_candidates:
+            candidates = candidates[np.argsort(-shared, kind="stable")[:max_candidates]]
+        return candidates
+
+    def jaccard(self, symptom_ids: Sequence[int], cases: np.ndarray) -> np.ndarray:
+        """Exact Jaccard similarity between the query set and each of ``cases``."""
+        query = np.zeros(len(self.symptom_names), dtype=bool)
+        query[list(symptom_ids)] = True
+        lengths = self._case_lengths[cases]
+        segment_starts = np.zeros(len(cases), dtype=np.int64)
+        np.cumsum(lengths[:-1], out=segment_starts[1:])
+        positions = np.repeat(self.case_offsets[cases] - segment_starts, lengths) + np.arange(int(lengths.sum()))
+        shared = np.add.reduceat(query[self.case_symptoms[positions]].astype(np.int64), segment_starts)
+        return shared / (len(symptom_ids) + lengths - shared)
+
+    def query(self, symptoms: Iterable[str], limit: int = 5, max_candidates: int = 2000) -> List[Dict[str, Any]]:
+        """Return up to ``limit`` cases most similar to ``symptoms`` (normalized names)."""
+        symptom_ids = sorted({self.symptom_ids[symptom] for symptom in symptoms if symptom in self.symptom_ids})
+        if not symptom_ids:
+            return []
+        cases = self.candidates(symptom_ids, max_candidates)
+        if not len(cases):
+            return []
+        similarity = self.jaccard(symptom_ids, cases)
+        # Most similar first; ties go to the more frequent case.
+        order = np.lexsort((-self.case_count[cases], -similarity))[:limit]
+        return [
+            {
+                "disease": self.disease_names[self.case_disease[case]],
+                "symptoms": [
+                    self.symptom_names[index]
+                    for index in self.case_symptoms[self.case_offsets[case] : self.case_offsets[case + 1]]
+                ],
+                "similarity": round(float(similarity[position]), 4),
+                "source": self.source_names[self.case_source[case]],
+                "count": int(self.case_count[case]),
+            }
+            for position, case in ((position, int(cases[position])) for position in order)
+        ]
+
+
+_INDEX_LOCK = Lock()
+_INDEX: Dict[str, Any] = {}  # the loaded index and the stat of the file it was read from
+
+
+def _stat_key(path: Path) -> Optional[Tuple[int, int, int]]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def _read_case_index(path: Path) -> Tuple[Optional[CaseIndex], Optional[Tuple[int, int, int]]]:
+    try:
+        with open(path, "rb") as file:
+            stat = os.fstat(file.fileno())
+            with np.load(file, allow_pickle=False) as data:
+                index = CaseIndex({name: data[name] for name in data.files})
+    except FileNotFoundError:
+        logger.warning("Case index %s not found; run build_case_index.py to enable similar cases.", path)
+        return None, None
+    return index, (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def get_case_index() -> Optional[CaseIndex]:
+    if "index" not in _INDEX:
+        with _INDEX_LOCK:
+            if "index" not in _INDEX:
+                index, stat = _read_case_index(get_settings().case_index_path)
+                _INDEX.update(index=index, stat=stat)
+    return _INDEX["index"]
+
+
+def reload_case_index() -> bool:
+    """Swap in the case index on disk if the file changed, appeared or disappeared since it was loaded.
+
+    Returns whether the index was replaced.
+    """
+    path = get_settings().case_index_path
+    get_case_index()
+    if _stat_key(path) == _INDEX.get("stat"):
+        return False
+    index, stat = _read_case_index(path)
+    with _INDEX_LOCK:
+        _INDEX.update(index=index, stat=stat)
+    logger.info("Reloaded case index %s (%d cases).", path, index.n_cases if index is not None else 0)
+    return True
+
+
+def similar_cases(symptoms: Iterable[str], limit: int = 5) -> List[Dict[str, Any]]:
+    index = get_case_index()
+    if index is None:
+        return []
+    return index.query(symptoms, limit=limit, max_candidates=get_settings().similar_cases_max_candidates)
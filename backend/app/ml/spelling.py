@@ -0,0 +1,126 @@
+"""Symmetric-delete spelling correction for symptom identifiers."""
+from __future__ import annotations
+
+import logging
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+
+from backend.app.core.config import get_settings
+from backend.app.ml.inference import get_diagnosis_bundle
+
+logger = logging.getLogger(__name__)
+
+
+class Correction(NamedTuple):
+    """Nearest vocabulary entry for a misspelled symptom."""
+
+    original: str
+    suggestion: str
+    distance: int
+    confidence: float
+    applied: bool
+
+
+def _deletes(term: str, max_distance: int) -> Set[str]:
+    """Return every string reachable from ``term`` by removing up to ``max_distance`` characters."""
+    results = {term}
+    frontier = {term}
+    for _ in range(max_distance):
+        next_frontier: Set[str] = set()
+        for value in frontier:
+            if len(value) <= 1:
+                continue
+            for index in range(len(value)):
+                next_frontier.add(value[:index] + value[index + 1 :])
+        next_frontier -= results
+        results |= next_frontier
+        frontier = next_frontier
+    return results
+
+
+def _edit_distance(source: str, target: str, max_distance: int) -> int:
+    """Optimal string alignment distance, abandoning early once ``max_distance`` is exceeded."""
+    if abs(len(source) - len(target)) > max_distance:
+        return max_distance + 1
+    previous_previous: List[int] = []
+    previous = list(range(len(target) + 1))
+    for i in range(1, len(source) + 1):
+        current = [i] + [0] * len(target)
+        row_min = current[0]
+        for j in range(1, len(target) + 1):
+            cost = 0 if source[i - 1] == target[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (
+                i > 1
+                and j > 1
+                and source[i - 1] == target[j - 2]
+                and source[i - 2] == target[j - 1]
+            ):
+                value = min(value, previous_previous[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+class SymptomSpellChecker:
+    """Precomputed symmetric-delete index over the symptom vocabulary.
+
+    Every vocabulary term is expanded into its deletes up to ``max_distance`` at build time.
+    A lookup only generates the deletes of the query term and probes the index, so its cost
+    depends on the query length and edit distance, not on the vocabulary size.
+    """
+
+    def __init__(self, vocabulary: Iterable[str], max_distance: int = 2) -> None:
+        self.max_distance = max_distance
+        self._vocabulary = set(vocabulary)
+        self._index: Dict[str, List[str]] = {}
+        for term in sorted(self._vocabulary):
+            for variant in _deletes(term, max_distance):
+                self._index.setdefault(variant, []).append(term)
+
+    def suggestions(self, term: str) -> List[tuple[str, int]]:
+        """Return ``(vocabulary term, distance)`` pairs within ``max_distance``, nearest first."""
+        if term in self._vocabulary:
+            return [(term, 0)]
+        candidates: Set[str] = set()
+        for variant in _deletes(term, self.max_distance):
+            candidates.update(self._index.get(variant, ()))
+        scored = []
+        for candidate in candidates:
+            distance = _edit_distance(term, candidate, self.max_distance)
+            if distance <= self.max_distance:
+                scored.append((candidate, distance))
+        return sorted(scored, key=lambda item: (item[1], item[0]))
+
+    def correct(self, term: str, min_confidence: float) -> Optional[Correction]:
+        """Return the best correction for ``term``, or ``None`` if nothing is close enough."""
+        scored = self.suggestions(term)
+        if not scored:
+            return None
+        suggestion, distance = scored[0]
+        confidence = 1.0 - distance / max(len(term), len(suggestion), 1)
+        # Ties at the best distance are reported but never applied automatically.
+        ambiguous = len(scored) > 1 and scored[1][1] == distance
+        applied = not ambiguous and confidence >= min_confidence
+        return Correction(term, suggestion, distance, round(confidence, 4), applied)
+
+
+@lru_cache
+def get_spell_checker() -> SymptomSpellChecker:
+    """Return the spell checker for the loaded model vocabulary."""
+    settings = get_settings()
+    checker = SymptomSpellChecker(
+        get_diagnosis_bundle()["symptom_to_index"], max_distance=settings.spelling_max_edit_distance
+    )
+    logger.info("Built spelling index with %d entries.", len(checker._index))
+    return checker
+
+
+@lru_cache(maxsize=4096)
+def correct_symptom(symptom: str) -> Optional[Correction]:
+    """Return the correction for a single normalized symptom identifier."""
+    settings = get_settings()
+    return get_spell_checker().correct(symptom, settings.spelling_min_confidence)
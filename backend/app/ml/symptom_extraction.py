@@ -0,0 +1,267 @@
+"""Free-text symptom extraction using an Aho-Corasick automaton."""
+from __future__ import annotations
+
+import json
+import logging
+from collections import deque
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Sequence, Tuple
+
+from backend.app.core.config import get_settings
+from backend.app.ml.inference import get_diagnosis_bundle, get_symptom_index
+from backend.app.ml.preprocess import clean_text, normalize_symptom
+
+logger = logging.getLogger(__name__)
+
+# Colloquial phrasings mapped to vocabulary identifiers or to the extra terms used by the red-flag
+# and follow-up rules (``fever``, ``shortness_of_breath``, ``loss_of_consciousness``...). A phrase
+# may map to several terms, so text triggers the same rules as the equivalent symptom list while
+# the model still receives its own feature. Targets that are neither known are ignored, so the
+# table can safely be shared across model versions.
+_DEFAULT_SYNONYMS: Dict[str, str | Tuple[str, ...]] = {
+    "throwing up": "vomiting",
+    "threw up": "vomiting",
+    "puking": "vomiting",
+    "being sick": "vomiting",
+    "feeling sick": "nausea",
+    "queasy": "nausea",
+    "nauseous": "nausea",
+    "head ache": "headache",
+    "head hurts": "headache",
+    "migraine": "headache",
+    "tummy ache": "stomach_pain",
+    "stomach ache": "stomach_pain",
+    "stomachache": "stomach_pain",
+    "belly ache": "belly_pain",
+    "short of breath": ("breathlessness", "shortness_of_breath"),
+    "shortness of breath": "breathlessness",
+    "cant breathe": ("breathlessness", "shortness_of_breath"),
+    "out of breath": ("breathlessness", "shortness_of_breath"),
+    "temperature": ("mild_fever", "fever"),
+    "fever": "mild_fever",
+    "feverish": ("mild_fever", "fever"),
+    "high temperature": ("high_fever", "fever"),
+    "high fever": ("high_fever", "fever"),
+    "mild fever": ("mild_fever", "fever"),
+    "burning up": ("high_fever", "fever"),
+    "tired": "fatigue",
+    "exhausted": "fatigue",
+    "worn out": "fatigue",
+    "dizzy": "dizziness",
+    "lightheaded": "dizziness",
+    "light headed": "dizziness",
+    "room spinning": "spinning_movements",
+    "the runs": "diarrhoea",
+    "diarrhea": "diarrhoea",
+    "loose stools": "diarrhoea",
+    "itchy": "itching",
+    "rash": "skin_rash",
+    "coughing": "cough",
+    "coughing up blood": ("cough", "coughing", "blood_in_sputum"),
+    "coughing blood": ("cough", "coughing", "blood_in_sputum"),
+    "sneezing": "continuous_sneezing",
+    "stuffy nose": "congestion",
+    "blocked nose": "congestion",
+    "racing heart": "fast_heart_rate",
+    "heart racing": "fast_heart_rate",
+    "sore joints": "joint_pain",
+    "aching joints": "joint_pain",
+    "sore muscles": "muscle_pain",
+    "body aches": "muscle_pain",
+    "chest hurts": "chest_pain",
+    "chest tightness": "chest_pain",
+    "yellow eyes": "yellowing_of_eyes",
+    "yellow skin": "yellowish_skin",
+    "jaundice": "yellowish_skin",
+    "peeing a lot": "polyuria",
+    "frequent urination": "polyuria",
+    "burning when peeing": "burning_micturition",
+    "painful urination": "burning_micturition",
+    "no appetite": "loss_of_appetite",
+    "not hungry": "loss_of_appetite",
+    "always hungry": "excessive_hunger",
+    "blurry vision": ("blurred_and_distorted_vision", "vision_blurring"),
+    "blurred vision": ("blurred_and_distorted_vision", "vision_blurring"),
+    "vision blurring": "blurred_and_distorted_vision",
+    "severe headache": "headache",
+    "sweaty": "sweating",
+    "shaking": "shivering",
+    "shivers": "shivering",
+    "stiff neck": "stiff_neck",
+    "sore throat": "throat_irritation",
+    "scratchy throat": "throat_irritation",
+    "passed out": "loss_of_consciousness",
+    "fainted": "loss_of_consciousness",
+    "blacked out": "loss_of_consciousness",
+    "confused": ("altered_sensorium", "confusion"),
+    "confusion": "altered_sensorium",
+    "heartburn": "acidity",
+    "acid reflux": "acidity",
+    "cramping": "cramps",
+}
+
+
+class SymptomMatch(NamedTuple):
+    """A symptom term located in a piece of free text.
+
+    A phrase that maps to several terms yields one match per term with the same span.
+    ``start``/``end`` are offsets into the text after ``clean_text`` normalization.
+    """
+
+    symptom: str
+    phrase: str
+    start: int
+    end: int
+
+
+def _phrase_key(phrase: str) -> str:
+    return clean_text(phrase.replace("_", " "))
+
+
+class SymptomMatcher:
+    """Multi-pattern matcher over symptom phrases.
+
+    The automaton is built once over every vocabulary phrase and synonym. Scanning a text
+    visits each character once and follows precomputed goto/fail transitions, so matching
+    cost is linear in the text length regardless of how many phrases are loaded.
+    """
+
+    def __init__(self, phrases: Mapping[str, Tuple[str, ...]]) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Each state stores the (symptoms, phrase length) of the longest phrase ending there,
+        # plus a dictionary-suffix link to the next state that also ends a phrase.
+        self._output: List[tuple[Tuple[str, ...], int] | None] = [None]
+        self._dict_link: List[int] = [0]
+        self.phrase_count = 0
+        for phrase, symptoms in phrases.items():
+            key = _phrase_key(phrase)
+            if key:
+                self._insert(f" {key} ", symptoms)
+        self._build_links()
+
+    def _insert(self, pattern: str, symptoms: Tuple[str, ...]) -> None:
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+                self._dict_link.append(0)
+                self._goto[state][char] = next_state
+            state = next_state
+        if self._output[state] is None:
+            self.phrase_count += 1
+        self._output[state] = (symptoms, len(pattern))
+
+    def _build_links(self) -> None:
+        queue: deque[int] = deque()
+        for child in self._goto[0].values():
+            queue.append(child)
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                link = self._fail[child]
+                self._dict_link[child] = link if self._output[link] is not None else self._dict_link[link]
+
+    def find_all(self, text: str) -> List[SymptomMatch]:
+        """Return non-overlapping matches, preferring the longest phrase at each position."""
+        cleaned = f" {clean_text(text)} "
+        candidates: List[tuple[int, int, Tuple[str, ...]]] = []
+        state = 0
+        goto = self._goto
+        fail = self._fail
+        for position, char in enumerate(cleaned):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            hit = state if self._output[state] is not None else self._dict_link[state]
+            while hit:
+                symptoms, length = self._output[hit]  # type: ignore[misc]
+                # Phrases are padded with a leading and trailing space to enforce word boundaries.
+                candidates.append((position - length + 2, position, symptoms))
+                hit = self._dict_link[hit]
+
+        candidates.sort(key=lambda item: (item[0], item[0] - item[1]))
+        matches: List[SymptomMatch] = []
+        last_end = -1
+        for start, end, symptoms in candidates:
+            if start < last_end:
+                continue
+            matches.extend(SymptomMatch(symptom, cleaned[start:end], start - 1, end - 1) for symptom in symptoms)
+            last_end = end
+        return matches
+
+    def extract(self, text: str) -> List[str]:
+        """Return the distinct symptom identifiers found in ``text`` in order of appearance."""
+        return list(dict.fromkeys(match.symptom for match in self.find_all(text)))
+
+
+def _load_synonym_file(path: Path | None) -> Dict[str, str | Tuple[str, ...]]:
+    if path is None:
+        return {}
+    if not path.exists():
+        logger.warning("Symptom synonym file not found: %s", path)
+        return {}
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(data, dict):
+        raise ValueError(f"Symptom synonym file must contain a JSON object: {path}")
+    return {
+        str(phrase): str(target) if isinstance(target, str) else tuple(str(item) for item in target)
+        for phrase, target in data.items()
+    }
+
+
+def build_phrase_table(
+    vocabulary: Iterable[str],
+    synonyms: Mapping[str, str | Sequence[str]],
+    rule_terms: Iterable[str] = (),
+) -> Dict[str, Tuple[str, ...]]:
+    """Combine vocabulary identifiers, rule terms and synonyms into a phrase -> symptoms table.
+
+    ``rule_terms`` are the non-vocabulary terms the red-flag and follow-up rules test for. They
+    are matched by their own phrase as well, in addition to any vocabulary synonym of that phrase
+    (``fever`` yields ``mild_fever`` for the model and ``fever`` for the rules).
+    """
+    vocab = set(vocabulary)
+    known = vocab | set(rule_terms)
+    table: Dict[str, Tuple[str, ...]] = {}
+    for phrase, target in synonyms.items():
+        targets = (target,) if isinstance(target, str) else target
+        symptoms = tuple(dict.fromkeys(symptom for symptom in map(normalize_symptom, targets) if symptom in known))
+        if symptoms:
+            table[_phrase_key(phrase)] = symptoms
+    for term in known - vocab:
+        key = _phrase_key(term)
+        table[key] = tuple(dict.fromkeys([*table.get(key, ()), term]))
+    # Vocabulary terms always map to themselves, even if a synonym reuses the same phrase.
+    for symptom in vocab:
+        table[_phrase_key(symptom)] = (symptom,)
+    return table
+
+
+@lru_cache
+def get_symptom_matcher() -> SymptomMatcher:
+    """Return the matcher for the loaded model vocabulary and configured synonyms."""
+    settings = get_settings()
+    synonyms = {**_DEFAULT_SYNONYMS, **_load_synonym_file(settings.symptom_synonyms_path)}
+    index = get_symptom_index()
+    table = build_phrase_table(get_diagnosis_bundle()["symptom_to_index"], synonyms, index.names[index.n_features :])
+    matcher = SymptomMatcher(table)
+    logger.info("Built symptom matcher with %d phrases.", matcher.phrase_count)
+    return matcher
+
+
+def extract_symptoms(texts: Sequence[str]) -> List[List[SymptomMatch]]:
+    """Extract symptom matches from a batch of free-text notes."""
+    matcher = get_symptom_matcher()
+    return [matcher.find_all(text) for text in texts]
@@ -0,0 +1,124 @@
+"""Interned symptom sets carried as integer bitsets.
+
+A :class:`SymptomIndex` assigns every symptom the model knows its ``symptom_to_index`` column
+as ID. Extra terms used by rules outside the vocabulary (red flags, follow-up questions) get
+IDs after the model columns. :meth:`SymptomIndex.intern` normalizes a request's symptoms once
+and returns a :class:`SymptomSet` whose ``bits`` is a Python ``int`` with bit ``i`` set for
+ID ``i``. The later pipeline steps work on that value:
+
+* rules are mask tests (``bits & mask == mask``);
+* the model vector is the bitset unpacked with ``np.unpackbits`` times a precomputed weight
+  array, with the few user severity overrides applied on top;
+* the severity score is the sum of the weights of the set bits. Sets hold a handful of
+  symptoms, so it is summed over the IDs while interning, which is cheaper than unpacking for a
+  dot product;
+* the set is hashable, so ``(bits, overridden)`` is the cache key for model probabilities.
+
+Normalized symptoms without an ID still add to the severity score, as they do in
+``generate_severity_score``.
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.app.ml.preprocess import normalize_symptom, symptom_weight
+
+
+class SymptomSet(NamedTuple):
+    ids: Tuple[int, ...]  # interned IDs in input order
+    bits: int
+    unmapped: Tuple[str, ...]  # normalized symptoms that are not model features, in input order
+    overridden: Tuple[Tuple[int, float], ...]  # (ID, weight) for symptoms with a user severity
+    severity_score: float
+
+    @property
+    def key(self) -> Tuple[int, Tuple[Tuple[int, float], ...]]:
+        """Hashable identity of the model input: the bitset plus overridden weights."""
+        return self.bits, self.overridden
+
+
+class SymptomIndex:
+    def __init__(
+        self,
+        symptom_to_index: Mapping[str, int],
+        severity_map: Mapping[str, float],
+        extra_terms: Iterable[str] = (),
+    ) -> None:
+        self.n_features = len(symptom_to_index)
+        self.severity_map = severity_map
+        self.ids: Dict[str, int] = dict(symptom_to_index)
+        for term in extra_terms:
+            self.ids.setdefault(term, len(self.ids))
+        self.names: List[str] = [""] * len(self.ids)
+        for name, index in self.ids.items():
+            self.names[index] = name
+        self.weights = np.array([severity_map.get(name, 1.0) for name in self.names], dtype=float)
+        self._weights = self.weights.tolist()
+        self.vocabulary_mask = (1 << self.n_features) - 1
+        self._nbytes = (len(self.ids) + 7) // 8
+
+    def intern(
+        self,
+        symptoms: Sequence[str],
+        severity_overrides: Mapping[str, float] | None = None,
+        normalized: bool = False,
+    ) -> SymptomSet:
+        """Intern ``symptoms``; pass ``normalized=True`` if they already went through ``normalize_symptom``."""
+        ids: List[int] = []
+        unmapped: List[str] = []
+        unknown: List[str] = []
+        bits = 0
+        for raw_symptom in symptoms:
+            symptom = raw_symptom if normalized else normalize_symptom(raw_symptom)
+            if not symptom:
+                continue
+            index = self.ids.get(symptom)
+            if index is None:
+                if symptom not in unknown:
+                    unknown.append(symptom)
+                    unmapped.append(symptom)
+            elif not bits >> index & 1:
+                bits |= 1 << index
+                ids.append(index)
+                if index >= self.n_features:
+                    unmapped.append(symptom)
+        overridden = tuple(
+            sorted(
+                (index, symptom_weight(self.names[index], self.severity_map, severity_overrides))
+                for index in ids
+                if self.names[index] in (severity_overrides or {})
+            )
+        )
+        weights = self._weights
+        severity_score = sum(weights[index] for index in ids)
+        severity_score += sum(weight - weights[index] for index, weight in overridden)
+        severity_score += sum(symptom_weight(symptom, self.severity_map, severity_overrides) for symptom in unknown)
+        return SymptomSet(tuple(ids), bits, tuple(unmapped), overridden, float(severity_score))
+
+    def mask(self, names: Iterable[str]) -> Optional[int]:
+        """Return the bitset of ``names``, or ``None`` if one of them has no ID."""
+        bits = 0
+        for name in names:
+            index = self.ids.get(name)
+            if index is None:
+                return None
+            bits |= 1 << index
+        return bits
+
+    def unpack(self, bits: int) -> np.ndarray:
+        """Return the bitset as a 0/1 ``uint8`` array with one entry per ID."""
+        packed = np.frombuffer(bits.to_bytes(self._nbytes, "little"), dtype=np.uint8)
+        return np.unpackbits(packed, count=len(self.names), bitorder="little")
+
+    def vector(self, bits: int, overridden: Tuple[Tuple[int, float], ...] = ()) -> np.ndarray:
+        """Return the weighted model input for a set's ``key``, as ``encode_symptoms`` builds it."""
+        vector = self.unpack(bits & self.vocabulary_mask)[: self.n_features] * self.weights[: self.n_features]
+        for index, weight in overridden:
+            if index < self.n_features:
+                vector[index] = weight
+        return vector
+
+    def is_mapped(self, symptom_set: SymptomSet) -> bool:
+        return bool(symptom_set.bits & self.vocabulary_mask)
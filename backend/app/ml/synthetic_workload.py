@@ -0,0 +1,335 @@
+"""Seeded synthetic patient workloads learned from the dataset CSVs.
+
+:meth:`WorkloadModel.from_dataset` learns two things per disease from ``dataset.csv``. The first
+is its distinct symptom patterns with their frequencies, which carry the co-occurrence of
+symptoms within a disease. The second is the symptom marginals ``P(symptom | disease)``. Symptom
+severity weights come from the runtime data. Each synthetic case:
+
+* picks a pattern in proportion to its frequency, which also reproduces the disease prior;
+* keeps each symptom of the pattern with probability ``keep_rate``;
+* adds on average ``extra_rate`` symptoms drawn from the disease's marginals;
+* with probability ``noise_rate`` adds one symptom drawn uniformly from the vocabulary, as an
+  unrelated complaint;
+* reports a 0-10 severity for a ``detail_rate`` share of its symptoms, centred on the symptom's
+  weight;
+* writes each symptom in one of several spellings that normalize to the same name, and
+  misspells a ``typo_rate`` share of them.
+
+Cases are drawn in :class:`CaseBatch` chunks of NumPy arrays, with the symptoms stored in CSR
+form. Memory is therefore bounded by ``chunk_size`` whatever the total row count. Chunk ``i`` is
+drawn from its own generator seeded with ``(seed, i)``, so the output depends only on the seed
+and the chunk size, and chunks can be produced independently. :func:`generate_timelines` builds
+per-user timeline histories in the ``timeline_store`` entry format, starting at a fixed
+``TIMELINE_START`` unless told otherwise, so timelines are reproducible too.
+
+Run as a script to write a workload to a file::
+
+    python backend/app/ml/synthetic_workload.py --rows 10000000 --format dataset --output big.csv
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[3]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.append(str(ROOT_DIR))
+
+from backend.app.data.runtime_data import get_runtime_data, iter_dataset_cases
+from backend.app.ml.preprocess import normalize_symptom
+
+_MAX_SEVERITY_WEIGHT = 7.0  # highest weight in Symptom-severity.csv
+TIMELINE_START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _spellings(symptom: str) -> Tuple[str, ...]:
+    """Ways a user may write ``symptom`` that still normalize to it."""
+    spaced = symptom.replace("_", " ")
+    variants = [symptom, spaced, spaced.capitalize(), f" {symptom}"]
+    return tuple(dict.fromkeys(variant for variant in variants if normalize_symptom(variant) == symptom))
+
+
+def misspell(word: str, code: int) -> str:
+    """Deterministically apply one typo (drop, swap or double a letter) chosen by ``code``."""
+    if len(word) < 3:
+        return word
+    operation, position = code % 3, (code // 3) % (len(word) - 1)
+    if operation == 0:
+        return word[:position] + word[position + 1 :]
+    if operation == 1:
+        return word[:position] + word[position + 1] + word[position] + word[position + 2 :]
+    return word[: position + 1] + word[position] + word[position + 1 :]
+
+
+class CaseBatch(NamedTuple):
+    disease: np.ndarray  # disease code per case
+    offsets: np.ndarray  # case i owns symptom_ids[offsets[i]:offsets[i + 1]]
+    symptom_ids: np.ndarray
+    severity: np.ndarray  # reported 0-10 severity per symptom, -1 when not reported
+    spelling: np.ndarray  # index into the symptom's spellings
+    typo: np.ndarray  # typo code per symptom, 0 for none
+
+    def __len__(self) -> int:
+        return len(self.disease)
+
+
+class WorkloadModel:
+    def __init__(
+        self,
+        diseases: Sequence[str],
+        symptoms: Sequence[str],
+        patterns: np.ndarray,
+        pattern_disease: np.ndarray,
+        pattern_counts: np.ndarray,
+        severity_map: Mapping[str, float],
+    ) -> None:
+        self.diseases = list(diseases)
+        self.symptoms = list(symptoms)
+        self.patterns = patterns  # (patterns, symptoms) bool
+        self.pattern_disease = pattern_disease
+        self.pattern_p = pattern_counts / pattern_counts.sum()
+        # P(symptom | disease), from the pattern counts.
+        marginals = np.zeros((len(self.diseases), len(self.symptoms)))
+        np.add.at(marginals, pattern_disease, patterns * pattern_counts[:, None])
+        disease_counts = np.bincount(pattern_disease, weights=pattern_counts, minlength=len(self.diseases))
+        self.marginals = marginals / disease_counts[:, None]
+        self.weights = np.array([severity_map.get(symptom, 1.0) for symptom in self.symptoms])
+        self.spellings = [_spellings(symptom) for symptom in self.symptoms]
+        self._n_spellings = np.array([len(spellings) for spellings in self.spellings])
+
+    @classmethod
+    def from_dataset(cls) -> "WorkloadModel":
+        counts: Dict[Tuple[str, Tuple[str, ...]], int] = {}
+        for disease, symptoms in iter_dataset_cases():
+            if disease and symptoms:
+                key = (disease, tuple(sorted(set(symptoms))))
+                counts[key] = counts.get(key, 0) + 1
+        diseases = sorted({disease for disease, _ in counts})
+        symptoms = sorted({symptom for _, pattern in counts for symptom in pattern})
+        disease_ids = {name: index for index, name in enumerate(diseases)}
+        symptom_ids = {name: index for index, name in enumerate(symptoms)}
+        patterns = np.zeros((len(counts), len(symptoms)), dtype=bool)
+        for row, (_, pattern) in enumerate(counts):
+            patterns[row, [symptom_ids[symptom] for symptom in pattern]] = True
+        return cls(
+            diseases,
+            symptoms,
+            patterns,
+            np.array([disease_ids[disease] for disease, _ in counts]),
+            np.array(list(counts.values()), dtype=float),
+            get_runtime_data()["severity_map"],
+        )
+
+    def draw(
+        self,
+        rng: np.random.Generator,
+        size: int,
+        keep_rate: float = 0.85,
+        extra_rate: float = 0.5,
+        noise_rate: float = 0.05,
+        detail_rate: float = 0.3,
+        typo_rate: float = 0.02,
+    ) -> CaseBatch:
+        """Draw ``size`` cases; see the module docstring for the parameters."""
+        pattern = rng.choice(len(self.pattern_p), size=size, p=self.pattern_p)
+        disease = self.pattern_disease[pattern]
+        present = self.patterns[pattern] & (rng.random((size, len(self.symptoms))) < keep_rate)
+        extra_p = np.minimum(self.marginals * (extra_rate / self.marginals.sum(axis=1, keepdims=True)), 1.0)
+        present |= rng.random((size, len(self.symptoms))) < extra_p[disease]
+        noisy = np.flatnonzero(rng.random(size) < noise_rate)
+        present[noisy, rng.integers(len(self.symptoms), size=len(noisy))] = True
+        empty = ~present.any(axis=1)
+        present[empty] = self.patterns[pattern[empty]]
+
+        rows, symptom_ids = np.nonzero(present)
+        order = np.lexsort((rng.random(len(rows)), rows))  # shuffle the symptom order within each case
+        symptom_ids = symptom_ids[order]
+        offsets = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(present.sum(axis=1), out=offsets[1:])
+
+        count = len(symptom_ids)
+        centre = self.weights[symptom_ids] * (10 / _MAX_SEVERITY_WEIGHT)
+        severity = np.clip(np.rint(rng.normal(centre, 1.5)), 0, 10).astype(np.int8)
+        severity[rng.random(count) >= detail_rate] = -1
+        spelling = (rng.random(count) * self._n_spellings[symptom_ids]).astype(np.uint8)
+        typo = np.where(rng.random(count) < typo_rate, rng.integers(1, 2**31, size=count), 0)
+        return CaseBatch(disease.astype(np.int32), offsets, symptom_ids.astype(np.int32), severity, spelling, typo)
+
+    def generate(self, rows: int, seed: int = 0, chunk_size: int = 100_000, **rates: float) -> Iterator[CaseBatch]:
+        """Stream ``rows`` cases in chunks of ``chunk_size``."""
+        for chunk, start in enumerate(range(0, rows, chunk_size)):
+            rng = np.random.default_rng([seed, chunk])
+            yield self.draw(rng, min(chunk_size, rows - start), **rates)
+
+    def canonical(self, batch: CaseBatch, case: int) -> List[str]:
+        return [self.symptoms[index] for index in batch.symptom_ids[batch.offsets[case] : batch.offsets[case + 1]]]
+
+    def requests(self, batch: CaseBatch) -> Iterator[Dict[str, Any]]:
+        """``/predict`` bodies as users would send them, with the true disease under ``disease``."""
+        symptoms, spellings, typos, severities = (
+            batch.symptom_ids.tolist(),
+            batch.spelling.tolist(),
+            batch.typo.tolist(),
+            batch.severity.tolist(),
+        )
+        offsets = batch.offsets.tolist()
+        for case, disease in enumerate(batch.disease.tolist()):
+            names, details = [], []
+            for position in range(offsets[case], offsets[case + 1]):
+                name = self.spellings[symptoms[position]][spellings[position]]
+                if typos[position]:
+                    name = misspell(name, typos[position])
+                names.append(name)
+                if severities[position] >= 0:
+                    details.append({"name": name, "severity": severities[position]})
+            yield {"disease": self.diseases[disease], "symptoms": names, "symptom_details": details}
+
+    def dataset_rows(self, batch: CaseBatch, max_symptoms: int = 17) -> Iterator[List[str]]:
+        """Rows in the ``dataset.csv`` layout: disease, then up to ``max_symptoms`` symptom names."""
+        symptoms = batch.symptom_ids.tolist()
+        offsets = batch.offsets.tolist()
+        names = self.symptoms
+        for case, disease in enumerate(batch.disease.tolist()):
+            start = offsets[case]
+            row = [names[index] for index in symptoms[start : min(offsets[case + 1], start + max_symptoms)]]
+            yield [self.diseases[disease], *row, *[""] * (max_symptoms - len(row))]
+
+    def feature_matrix(self, batch: CaseBatch, symptom_to_index: Mapping[str, int], severity_map: Mapping[str, float]) -> np.ndarray:
+        """Model input vectors of the batch, as ``encode_symptoms`` builds them without overrides."""
+        columns = np.array([symptom_to_index.get(symptom, -1) for symptom in self.symptoms])
+        weights = np.array([severity_map.get(symptom, 1.0) for symptom in self.symptoms])
+        rows = np.repeat(np.arange(len(batch)), np.diff(batch.offsets))
+        mapped = columns[batch.symptom_ids] >= 0
+        matrix = np.zeros((len(batch), len(symptom_to_index)))
+        matrix[rows[mapped], columns[batch.symptom_ids][mapped]] = weights[batch.symptom_ids][mapped]
+        return matrix
+
+
+def generate_timelines(
+    model: WorkloadModel,
+    users: int,
+    seed: int = 0,
+    start: datetime = TIMELINE_START,
+    days: float = 365.0,
+    episodes_per_user: float = 3.0,
+    check_ins_per_episode: float = 2.0,
+    chunk_size: int = 10_000,
+    **rates: float,
+) -> Iterator[List[Dict[str, Any]]]:
+    """Yield each synthetic user's timeline entries, oldest first.
+
+    Every episode is a ``case`` entry labelled with the drawn disease, followed by ``tracker``
+    check-ins on the next days with decreasing severities. Episodes fall within ``days`` days
+    after ``start``.
+    """
+    for chunk, first_user in enumerate(range(0, users, chunk_size)):
+        rng = np.random.default_rng([seed, chunk, 1])
+        count = min(chunk_size, users - first_user)
+        episodes = 1 + rng.poisson(max(episodes_per_user - 1, 0), size=count)
+        batch = model.draw(rng, int(episodes.sum()), **rates)
+        case = 0
+        for user, user_episodes in enumerate(episodes.tolist()):
+            user_id = f"synthetic-{seed}-{first_user + user}"
+            offsets = np.sort(rng.uniform(0, days * 86400, size=user_episodes))
+            entries: List[Dict[str, Any]] = []
+            for offset in offsets.tolist():
+                symptoms = model.canonical(batch, case)
+                ids = batch.symptom_ids[batch.offsets[case] : batch.offsets[case + 1]]
+                reported = batch.severity[batch.offsets[case] : batch.offsets[case + 1]]
+                severity = {
+                    symptom: float(level if level >= 0 else round(model.weights[index] * 10 / _MAX_SEVERITY_WEIGHT))
+                    for symptom, index, level in zip(symptoms, ids.tolist(), reported.tolist())
+                }
+                occurred_at = start + timedelta(seconds=offset)
+                entries.append(
+                    {
+                        "id": str(uuid.UUID(bytes=rng.bytes(16), version=4)),
+                        "symptoms": symptoms,
+                        "notes": None,
+                        "occurred_at": occurred_at.isoformat(),
+                        "user_id": user_id,
+                        "entry_type": "case",
+                        "top_prediction": model.diseases[batch.disease[case]],
+                        "severity_score": float(model.weights[ids].sum()),
+                        "symptom_severity": severity,
+                    }
+                )
+                for day in range(1, 1 + int(rng.poisson(check_ins_per_episode))):
+                    factor = max(0.0, 1 - day * rng.uniform(0.1, 0.3))
+                    entries.append(
+                        {
+                            "id": str(uuid.UUID(bytes=rng.bytes(16), version=4)),
+                            "symptoms": symptoms,
+                            "notes": None,
+                            "occurred_at": (occurred_at + timedelta(days=day)).isoformat(),
+                            "user_id": user_id,
+                            "entry_type": "tracker",
+                            "symptom_severity": {symptom: round(value * factor, 1) for symptom, value in severity.items()},
+                        }
+                    )
+                case += 1
+            yield entries
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Write a synthetic patient workload.")
+    parser.add_argument("--rows", type=int, default=100_000, help="Cases (dataset/requests) or users (timeline)")
+    parser.add_argument("--format", choices=["dataset", "requests", "timeline"], default="dataset")
+    parser.add_argument("--output", default="-", help="File to write, or - for stdout")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument(
+        "--start",
+        type=datetime.fromisoformat,
+        default=TIMELINE_START,
+        help="First day of timeline histories (ISO date, default %(default)s)",
+    )
+    parser.add_argument("--days", type=float, default=365.0, help="Length of timeline histories in days")
+    parser.add_argument("--keep-rate", type=float, default=0.85)
+    parser.add_argument("--extra-rate", type=float, default=0.5)
+    parser.add_argument("--noise-rate", type=float, default=0.05)
+    parser.add_argument("--detail-rate", type=float, default=0.3)
+    parser.add_argument("--typo-rate", type=float, default=0.02)
+    args = parser.parse_args(argv)
+
+    model = WorkloadModel.from_dataset()
+    rates = {
+        "keep_rate": args.keep_rate,
+        "extra_rate": args.extra_rate,
+        "noise_rate": args.noise_rate,
+        "detail_rate": args.detail_rate,
+        "typo_rate": args.typo_rate,
+    }
+    started = time.perf_counter()
+    output = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        if args.format == "dataset":
+            writer = csv.writer(output)
+            writer.writerow(["Disease", *[f"Symptom_{index}" for index in range(1, 18)]])
+            for batch in model.generate(args.rows, args.seed, args.chunk_size, **rates):
+                writer.writerows(model.dataset_rows(batch))
+        elif args.format == "requests":
+            for batch in model.generate(args.rows, args.seed, args.chunk_size, **rates):
+                output.writelines(json.dumps(body, separators=(",", ":")) + "\n" for body in model.requests(batch))
+        else:
+            start = args.start if args.start.tzinfo else args.start.replace(tzinfo=timezone.utc)
+            for entries in generate_timelines(model, args.rows, args.seed, start, args.days, **rates):
+                output.writelines(json.dumps(entry, separators=(",", ":")) + "\n" for entry in entries)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"wrote {args.rows} {args.format} rows in {time.perf_counter() - started:.1f} s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
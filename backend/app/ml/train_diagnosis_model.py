@@ -19,6 +19,7 @@ if str(ROOT_DIR) not in sys.path:
 from backend.app.core.config import get_settings
 from backend.app.data.loader import load_dataset, load_symptom_severity
 from backend.app.ml.preprocess import encode_symptoms, normalize_symptom
+from backend.app.ml.recommender import build_symptom_statistics
 
 
 def _build_symptom_index(dataset) -> Dict[str, int]:
@@ -113,6 +114,10 @@ def main() -> None:
         "model": clf,
         "symptom_to_index": symptom_to_index,
         "severity_map": severity_map,
+        # Computed from all rows (before de-duplication) so frequencies reflect the dataset.
+        "symptom_statistics": build_symptom_statistics(
+            (np.flatnonzero(vector) for vector in X_raw), y_raw, list(clf.classes_), len(symptom_to_index)
+        ),
     }
 
     settings.diagnosis_model_path.parent.mkdir(parents=True, exist_ok=True)
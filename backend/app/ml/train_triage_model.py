@@ -5,6 +5,7 @@ import logging
 import pickle
 import sys
 from pathlib import Path
+from typing import List, Tuple
 
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
@@ -29,10 +30,8 @@ def _assemble_text(row) -> str:
     return clean_text(concatenated)
 
 
-def main() -> None:
-    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
-    settings = get_settings()
-
+def load_labeled_corpus() -> Tuple[List[str], List[str]]:
+    """Return the knowledge-base texts and their keyword-derived triage labels."""
     precautions_df = load_precautions()
     descriptions_df = load_descriptions()
     merged_df = precautions_df.merge(descriptions_df, on="Disease", how="left")
@@ -40,10 +39,11 @@ def main() -> None:
     labeled_df["text"] = labeled_df.apply(_assemble_text, axis=1)
     labeled_df = labeled_df[labeled_df["text"].str.len() > 0].copy()
 
-    X = labeled_df["text"].values
-    y = labeled_df["triage_level"].values
+    return labeled_df["text"].tolist(), labeled_df["triage_level"].tolist()
+
 
-    pipeline = Pipeline(
+def build_pipeline() -> Pipeline:
+    return Pipeline(
         steps=[
             (
                 "tfidf",
@@ -56,6 +56,14 @@ def main() -> None:
         ]
     )
 
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    settings = get_settings()
+
+    X, y = load_labeled_corpus()
+    pipeline = build_pipeline()
+
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=0.2, random_state=42, stratify=y
     )
@@ -0,0 +1,215 @@
+"""Streaming trainer for the triage level classifier.
+
+Alternative to ``train_triage_model.py`` for guidance corpora that do not fit in memory. Text is
+read in chunks from a CSV file with ``text`` and ``triage_level`` columns, vectorized with a
+stateless ``HashingVectorizer`` and fed to ``SGDClassifier.partial_fit``, so memory is bounded
+by the chunk size and the fixed number of hashed features rather than by the corpus size.
+Without ``--corpus`` the knowledge-base CSVs used by the batch trainer are streamed instead.
+
+The saved artifact is a regular ``Pipeline`` and is served exactly like the batch model. Pass
+``--update`` to continue training an existing streaming model on newly arrived guidance. The
+classifier keeps the label counts of every corpus it was trained on (``class_counts_``), so an
+update balances class weights over all of them rather than over the new documents alone.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import logging
+import pickle
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import classification_report
+from sklearn.pipeline import Pipeline
+
+ROOT_DIR = Path(__file__).resolve().parents[3]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.append(str(ROOT_DIR))
+
+from backend.app.core.config import get_settings
+from backend.app.ml.preprocess import clean_text
+
+Chunk = Tuple[List[str], List[str]]
+
+DEFAULT_CHUNK_SIZE = 10_000
+DEFAULT_N_FEATURES = 2**20
+HOLDOUT_EVERY = 5  # every fifth document is held out for evaluation
+
+
+def iter_corpus_chunks(path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Chunk]:
+    """Yield ``(texts, labels)`` chunks from a CSV corpus without loading it whole."""
+    texts: List[str] = []
+    labels: List[str] = []
+    with path.open(newline="", encoding="utf-8") as file:
+        for row in csv.DictReader(file):
+            text = clean_text(row.get("text") or "")
+            label = (row.get("triage_level") or "").strip()
+            if not text or not label:
+                continue
+            texts.append(text)
+            labels.append(label)
+            if len(texts) >= chunk_size:
+                yield texts, labels
+                texts, labels = [], []
+    if texts:
+        yield texts, labels
+
+
+def _knowledge_base_chunks(chunk_size: int) -> Iterator[Chunk]:
+    from backend.app.ml.train_triage_model import load_labeled_corpus
+
+    texts, labels = load_labeled_corpus()
+    for start in range(0, len(texts), chunk_size):
+        yield texts[start : start + chunk_size], labels[start : start + chunk_size]
+
+
+def split_holdout(chunks: Iterator[Chunk], holdout: bool) -> Iterator[Chunk]:
+    """Deterministically keep either the training or the holdout part of each chunk."""
+    seen = 0
+    for texts, labels in chunks:
+        keep = [(seen + offset) % HOLDOUT_EVERY == 0 for offset in range(len(texts))]
+        seen += len(texts)
+        selected = [index for index, flag in enumerate(keep) if flag == holdout]
+        if selected:
+            yield [texts[index] for index in selected], [labels[index] for index in selected]
+
+
+def build_streaming_pipeline(n_features: int = DEFAULT_N_FEATURES) -> Pipeline:
+    return Pipeline(
+        steps=[
+            (
+                "hashing",
+                HashingVectorizer(
+                    n_features=n_features,
+                    ngram_range=(1, 2),
+                    stop_words="english",
+                    alternate_sign=False,
+                    norm="l2",
+                ),
+            ),
+            ("clf", SGDClassifier(loss="log_loss", alpha=1e-5, random_state=42)),
+        ]
+    )
+
+
+def _balanced_weights(counts: Counter) -> Dict[str, float]:
+    total = sum(counts.values())
+    return {label: total / (len(counts) * count) for label, count in counts.items()}
+
+
+def partial_fit_stream(
+    pipeline: Pipeline,
+    make_chunks: Callable[[], Iterator[Chunk]],
+    epochs: int = 5,
+    classes: Optional[Sequence[str]] = None,
+    prior_counts: Optional[Mapping[str, int]] = None,
+    balance: bool = True,
+) -> Dict[str, int]:
+    """Train ``pipeline`` with one ``partial_fit`` call per chunk for ``epochs`` passes.
+
+    ``make_chunks`` must return a fresh iterator for every pass. Class weights are balanced from
+    a label-only pass over the stream plus ``prior_counts``, the label counts the model was
+    already trained on; ``balance=False`` fits unweighted. ``classes`` defaults to the labels
+    seen in that pass and must include every label when updating an existing model. Returns the
+    label counts of this stream.
+    """
+    counts: Counter = Counter()
+    for _, labels in make_chunks():
+        counts.update(labels)
+    if not counts:
+        raise RuntimeError("The training corpus is empty.")
+    classes = list(classes) if classes is not None else sorted(counts)
+    unknown = set(counts) - set(classes)
+    if unknown:
+        raise ValueError(f"Corpus contains labels the model was not trained with: {sorted(unknown)}")
+    weights = _balanced_weights(counts + Counter(prior_counts or {})) if balance else None
+
+    vectorizer = pipeline.named_steps["hashing"]
+    classifier = pipeline.named_steps["clf"]
+    if hasattr(classifier, "coef_") and sparse.issparse(classifier.coef_):
+        classifier.densify()  # partial_fit needs dense weights; see finalize_for_serving
+    for _ in range(epochs):
+        for texts, labels in make_chunks():
+            sample_weight = np.array([weights[label] for label in labels]) if weights else None
+            classifier.partial_fit(vectorizer.transform(texts), labels, classes=classes, sample_weight=sample_weight)
+    return dict(counts)
+
+
+def finalize_for_serving(pipeline: Pipeline) -> Pipeline:
+    """Store the weights sparsely: only hashed features seen in training are non-zero.
+
+    This shrinks the artifact and avoids copying the dense ``n_features``-wide weight matrix on
+    every single-document prediction.
+    """
+    pipeline.named_steps["clf"].sparsify()
+    return pipeline
+
+
+def evaluate_stream(pipeline: Pipeline, chunks: Iterator[Chunk]) -> str:
+    expected: List[str] = []
+    predicted: List[str] = []
+    for texts, labels in chunks:
+        expected.extend(labels)
+        predicted.extend(pipeline.predict(texts))
+    return classification_report(expected, predicted, zero_division=0) if expected else "no holdout documents"
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", type=Path, help="CSV with text and triage_level columns")
+    parser.add_argument("--output", type=Path, default=settings.triage_model_path)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--n-features", type=int, default=DEFAULT_N_FEATURES)
+    parser.add_argument("--update", action="store_true", help="continue training the model at --output")
+    args = parser.parse_args(argv)
+
+    def source() -> Iterator[Chunk]:
+        if args.corpus:
+            return iter_corpus_chunks(args.corpus, args.chunk_size)
+        return _knowledge_base_chunks(args.chunk_size)
+
+    if args.update:
+        with open(args.output, "rb") as file:
+            pipeline = pickle.load(file)
+        if "hashing" not in pipeline.named_steps:
+            raise RuntimeError(f"{args.output} is not a streaming triage model; --update needs one.")
+        classifier = pipeline.named_steps["clf"]
+        prior_counts = getattr(classifier, "class_counts_", None)
+        if prior_counts is None:
+            # Balancing over the new documents alone would skew the weights; keep them neutral.
+            logging.warning("%s has no class counts; updating without class weights.", args.output)
+        counts = partial_fit_stream(
+            pipeline, source, args.epochs, list(classifier.classes_), prior_counts, balance=prior_counts is not None
+        )
+        logging.info("Updated model with %d documents: %s", sum(counts.values()), counts)
+        class_counts = dict(Counter(prior_counts) + Counter(counts)) if prior_counts is not None else None
+    else:
+        pipeline = build_streaming_pipeline(args.n_features)
+        counts = partial_fit_stream(pipeline, lambda: split_holdout(source(), holdout=False), args.epochs)
+        logging.info("Trained on %d documents: %s", sum(counts.values()), counts)
+        logging.info("Streaming triage model evaluation:\n%s", evaluate_stream(pipeline, split_holdout(source(), holdout=True)))
+        # Retrain on the whole corpus for the saved model, as the batch trainer does.
+        pipeline = build_streaming_pipeline(args.n_features)
+        class_counts = partial_fit_stream(pipeline, source, args.epochs)
+
+    if class_counts is not None:
+        pipeline.named_steps["clf"].class_counts_ = class_counts  # pickled with the model for --update
+    finalize_for_serving(pipeline)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "wb") as file:
+        pickle.dump(pipeline, file)
+    logging.info("Saved streaming triage model to %s", args.output)
+
+
+if __name__ == "__main__":
+    main()
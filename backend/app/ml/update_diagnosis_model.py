@@ -0,0 +1,265 @@
+"""Incrementally update the diagnosis forest with clinician feedback.
+
+Instead of retraining all trees from the CSV, this job grows the serving forest with
+``warm_start``: ``--new-trees`` trees are fitted on the recent feedback records (weighted by
+``--feedback-weight``) plus a per-class reservoir sample of ``dataset.csv``, so every class is
+present and the new trees do not forget the base data. The ``--retire`` oldest trees are then
+dropped so the forest keeps its size. ``--holdout-per-class`` distinct symptom sets per disease
+are kept out of that sample and score the forest before and after the update.
+
+The bundle is written to a candidate path by default (``SHADOW_MODEL_PATH`` if set, otherwise
+``<model>.candidate.pkl`` next to the serving model), where the shadow evaluator can compare it
+with the serving model on live traffic. Promote it with ``mv`` (``os.replace``) onto
+``DIAGNOSIS_MODEL_PATH`` in the same directory; workers poll that file and a plain copy could be
+read half-written. Alternatively pass ``--output`` with that path directly. When the serving model is the target, the job
+refuses to write a bundle whose held-out accuracy drops by more than
+``--max-holdout-accuracy-drop`` unless ``--force`` is given. The vocabulary, severity weights and
+classes are unchanged, so running API workers swap a promoted bundle in on their next reload
+check (``DIAGNOSIS_RELOAD_INTERVAL_SECONDS``) without a restart.
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import logging
+import pickle
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[3]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.append(str(ROOT_DIR))
+
+from backend.app.core.config import get_settings
+from backend.app.data import feedback_store, json_store
+from backend.app.data.runtime_data import iter_dataset_cases
+from backend.app.ml.preprocess import encode_symptoms
+
+
+def reservoir_sample(
+    cases: Iterable[Tuple[str, List[str]]], per_class: int, rng: random.Random
+) -> List[Tuple[str, List[str]]]:
+    """Uniform sample of up to ``per_class`` cases per disease in one pass."""
+    reservoirs: Dict[str, List[Tuple[str, List[str]]]] = {}
+    seen: Dict[str, int] = {}
+    for disease, symptoms in cases:
+        seen[disease] = seen.get(disease, 0) + 1
+        reservoir = reservoirs.setdefault(disease, [])
+        if len(reservoir) < per_class:
+            reservoir.append((disease, symptoms))
+        else:
+            slot = rng.randrange(seen[disease])
+            if slot < per_class:
+                reservoir[slot] = (disease, symptoms)
+    return [case for reservoir in reservoirs.values() for case in reservoir]
+
+
+def choose_holdout(
+    cases: Iterable[Tuple[str, List[str]]], per_class: int, rng: random.Random
+) -> List[Tuple[str, List[str]]]:
+    """Pick up to ``per_class`` distinct symptom sets per disease, always leaving one for fitting.
+
+    ``dataset.csv`` repeats each symptom set many times, so held-out cases are chosen among the
+    distinct sets; sampling rows instead would put copies of the fitted cases in the holdout.
+    """
+    distinct: Dict[str, Dict[frozenset, List[str]]] = {}
+    for disease, symptoms in cases:
+        distinct.setdefault(disease, {}).setdefault(frozenset(symptoms), symptoms)
+    holdout: List[Tuple[str, List[str]]] = []
+    for disease, sets in distinct.items():
+        ordered = sorted(sets.values(), key=sorted)  # independent of dataset order
+        holdout.extend((disease, symptoms) for symptoms in rng.sample(ordered, min(per_class, len(ordered) - 1)))
+    return holdout
+
+
+def update_forest(
+    bundle: Mapping[str, Any],
+    samples: Sequence[Tuple[str, List[str], float]],
+    new_trees: int,
+    retire: int,
+    seed: int,
+) -> Dict[str, Any]:
+    """Return a copy of ``bundle`` whose forest has ``new_trees`` trees fitted on ``samples``
+    (``(disease, symptoms, weight)``) and its ``retire`` oldest trees removed."""
+    model = bundle["model"]
+    labels = np.array([disease for disease, _, _ in samples])
+    missing = set(model.classes_) - set(labels)
+    if missing:
+        raise ValueError(f"Update samples must cover every class; missing {sorted(missing)}")
+    unknown = set(labels) - set(model.classes_)
+    if unknown:
+        raise ValueError(f"Unknown classes in update samples: {sorted(unknown)}")
+    if retire >= len(model.estimators_) + new_trees:
+        raise ValueError("Cannot retire every tree of the forest")
+
+    features = np.vstack(
+        [encode_symptoms(symptoms, bundle["symptom_to_index"], bundle["severity_map"]) for _, symptoms, _ in samples]
+    )
+    weights = np.array([weight for _, _, weight in samples], dtype=float)
+
+    updated = copy.copy(model)
+    updated.estimators_ = list(model.estimators_)  # warm_start extends this list in place
+    # "balanced" class weights would be computed from this small sample only; the per-class
+    # reservoir already balances it, so the new trees are fitted unweighted.
+    class_weight = model.get_params()["class_weight"]
+    updated.set_params(
+        warm_start=True, n_estimators=len(model.estimators_) + new_trees, random_state=seed, class_weight=None
+    )
+    updated.fit(features, labels, sample_weight=weights)
+    updated.estimators_ = updated.estimators_[retire:]
+    updated.set_params(warm_start=False, n_estimators=len(updated.estimators_), class_weight=class_weight)
+    return {**bundle, "model": updated}
+
+
+def _accuracy(model: Any, bundle: Mapping[str, Any], samples: Sequence[Tuple[str, List[str], float]]) -> float:
+    features = np.vstack(
+        [encode_symptoms(symptoms, bundle["symptom_to_index"], bundle["severity_map"]) for _, symptoms, _ in samples]
+    )
+    return float(np.mean(model.predict(features) == np.array([disease for disease, _, _ in samples])))
+
+
+def candidate_path() -> Path:
+    """Default output: the shadow candidate if one is configured, else a file next to the serving model."""
+    settings = get_settings()
+    serving = settings.diagnosis_model_path
+    return settings.shadow_model_path or serving.with_name(f"{serving.stem}.candidate{serving.suffix}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Add trees trained on clinician feedback to the diagnosis forest.")
+    parser.add_argument("--new-trees", type=int, default=50)
+    parser.add_argument("--retire", type=int, default=None, help="Oldest trees to drop (default: --new-trees)")
+    parser.add_argument("--base-per-class", type=int, default=20, help="Dataset cases sampled per disease")
+    parser.add_argument(
+        "--holdout-per-class", type=int, default=2, help="Distinct symptom sets per disease held out for scoring"
+    )
+    parser.add_argument("--feedback-days", type=float, default=90.0, help="Use feedback from the last N days")
+    parser.add_argument("--feedback-weight", type=float, default=3.0, help="Sample weight of a feedback record")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--input", type=Path, default=settings.diagnosis_model_path)
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="Where to write the bundle (default: SHADOW_MODEL_PATH, else <model>.candidate.pkl)",
+    )
+    parser.add_argument(
+        "--max-holdout-accuracy-drop",
+        type=float,
+        default=0.0,
+        help="Refuse to overwrite the serving model if held-out accuracy drops by more than this",
+    )
+    parser.add_argument("--force", action="store_true", help="Overwrite the serving model regardless of accuracy")
+    args = parser.parse_args(argv)
+    output = args.output or candidate_path()
+
+    start = time.perf_counter()
+    seed = args.seed if args.seed is not None else int(time.time())
+    rng = random.Random(seed)
+    with open(args.input, "rb") as file:
+        bundle = pickle.load(file)
+    model = bundle["model"]
+    classes = set(model.classes_)
+    vocabulary = bundle["symptom_to_index"]
+
+    feedback: List[Tuple[str, List[str], float]] = []
+    skipped = 0
+    for record in feedback_store.iter_records(since=time.time() - args.feedback_days * 86400):
+        symptoms = [symptom for symptom in record["symptoms"] if symptom in vocabulary]
+        if record["confirmed_disease"] in classes and symptoms:
+            feedback.append((record["confirmed_disease"], symptoms, args.feedback_weight))
+        else:
+            skipped += 1  # labelled against an older vocabulary or class set
+    if skipped:
+        logging.warning("Skipped %d feedback records that do not fit the current model", skipped)
+    if not feedback:
+        logging.info("No usable feedback in the last %.0f days; the model is unchanged.", args.feedback_days)
+        return 0
+
+    def base_cases() -> Iterable[Tuple[str, List[str]]]:
+        for disease, symptoms in iter_dataset_cases():
+            if disease in classes and any(symptom in vocabulary for symptom in symptoms):
+                yield disease, symptoms
+
+    holdout = [(disease, symptoms, 1.0) for disease, symptoms in choose_holdout(base_cases(), args.holdout_per_class, rng)]
+    held_out = {(disease, frozenset(symptoms)) for disease, symptoms, _ in holdout}
+    base = [
+        (disease, symptoms, 1.0)
+        for disease, symptoms in reservoir_sample(
+            ((disease, symptoms) for disease, symptoms in base_cases() if (disease, frozenset(symptoms)) not in held_out),
+            args.base_per_class,
+            rng,
+        )
+    ]
+    load_s = time.perf_counter() - start
+
+    fit_start = time.perf_counter()
+    retire = args.new_trees if args.retire is None else args.retire
+    updated = update_forest(bundle, base + feedback, args.new_trees, retire, seed)
+    fit_s = time.perf_counter() - fit_start
+    logging.info(
+        "Fitted %d trees on %d feedback records and %d base cases in %.2f s; retired %d (forest: %d trees)",
+        args.new_trees,
+        len(feedback),
+        len(base),
+        fit_s,
+        retire,
+        len(updated["model"].estimators_),
+    )
+    # The gate scores cases the new trees were not fitted on; the fitted base sample would be
+    # in-sample and too optimistic.
+    holdout_before, holdout_after = _accuracy(model, bundle, holdout), _accuracy(updated["model"], updated, holdout)
+    logging.info(
+        "Feedback accuracy %.3f -> %.3f; held-out accuracy %.3f -> %.3f (%d cases)",
+        _accuracy(model, bundle, feedback),
+        _accuracy(updated["model"], updated, feedback),
+        holdout_before,
+        holdout_after,
+        len(holdout),
+    )
+    serving = output.resolve() == settings.diagnosis_model_path.resolve()
+    if serving and holdout_before - holdout_after > args.max_holdout_accuracy_drop and not args.force:
+        logging.error(
+            "Held-out accuracy dropped from %.3f to %.3f; not overwriting the serving model %s. "
+            "Write a candidate and compare it with shadow evaluation, or pass --force.",
+            holdout_before,
+            holdout_after,
+            output,
+        )
+        return 1
+
+    updated["incremental_updates"] = [
+        *bundle.get("incremental_updates", []),
+        {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "feedback_records": len(feedback),
+            "base_cases": len(base),
+            "holdout_cases": len(holdout),
+            "new_trees": args.new_trees,
+            "retired_trees": retire,
+            "seed": seed,
+        },
+    ]
+    save_start = time.perf_counter()
+    # Replaced atomically: workers polling the file must never read a partial bundle.
+    json_store.write_bytes(output, pickle.dumps(updated, protocol=pickle.HIGHEST_PROTOCOL))
+    logging.info(
+        "Saved updated diagnosis model to %s (load %.2f s, fit %.2f s, save %.2f s)",
+        output,
+        load_s,
+        fit_s,
+        time.perf_counter() - save_start,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Population-level analytics over recorded prediction outcomes."""
+from __future__ import annotations
+
+import secrets
+from datetime import datetime, timezone
+from typing import Literal, Optional
+
+import numpy as np
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+
+from backend.app.core.config import get_settings
+from backend.app.data import event_store
+from backend.app.schemas.analytics import TriageAnalytics, TriageBucket, TrendingSymptom, TrendingSymptoms
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+_BUCKET_SECONDS = {"hour": 3600, "day": 86400}
+_MAX_BUCKETS = 10000
+
+
+def require_analytics_token(x_analytics_token: Optional[str] = Header(default=None)) -> None:
+    token = get_settings().analytics_token
+    if not token or not x_analytics_token or not secrets.compare_digest(x_analytics_token, token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Analytics token required")
+
+
+def _epoch(moment: datetime) -> int:
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+
+def _now_epoch() -> int:
+    # Query windows end exclusively, so include events recorded during the current second.
+    return int(datetime.now(timezone.utc).timestamp()) + 1
+
+
+def _utc(epoch: int) -> datetime:
+    return datetime.fromtimestamp(epoch, tz=timezone.utc)
+
+
+@router.get("/triage", response_model=TriageAnalytics, dependencies=[Depends(require_analytics_token)])
+def triage_analytics(
+    bucket: Literal["hour", "day"] = "hour",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> TriageAnalytics:
+    """Count predictions per triage level per hour or day; defaults to the last 30 days."""
+    width = _BUCKET_SECONDS[bucket]
+    end_epoch = _epoch(end) if end else _now_epoch()
+    start_epoch = _epoch(start) if start else end_epoch - 30 * 86400
+    start_epoch -= start_epoch % width  # align buckets to UTC hour/day boundaries
+    if end_epoch <= start_epoch:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    if (end_epoch - start_epoch) / width > _MAX_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"At most {_MAX_BUCKETS} buckets per query")
+
+    levels, counts = event_store.triage_counts(start_epoch, end_epoch, width)
+    return TriageAnalytics(
+        bucket=bucket,
+        start=_utc(start_epoch),
+        end=_utc(end_epoch),
+        totals={level: int(total) for level, total in zip(levels, counts.sum(axis=0)) if total},
+        buckets=[
+            TriageBucket(
+                bucket_start=_utc(start_epoch + index * width),
+                total=int(row.sum()),
+                counts={level: int(count) for level, count in zip(levels, row) if count},
+            )
+            for index, row in enumerate(counts)
+        ],
+    )
+
+
+@router.get("/symptoms/trending", response_model=TrendingSymptoms, dependencies=[Depends(require_analytics_token)])
+def trending_symptoms(
+    window_hours: float = Query(24, gt=0, le=24 * 30),
+    baseline_days: float = Query(7, gt=0, le=90),
+    min_count: int = Query(5, ge=1),
+    limit: int = Query(20, ge=1, le=200),
+) -> TrendingSymptoms:
+    """Rank symptoms whose share of predictions grew most in the recent window vs the baseline.
+
+    Symptoms are scored with a two-proportion z-test of their share of events in the last
+    ``window_hours`` against the preceding ``baseline_days``.
+    """
+    end = _now_epoch()
+    window_start = end - int(window_hours * 3600)
+    baseline_start = window_start - int(baseline_days * 86400)
+    names, events, counts = event_store.symptom_counts([(window_start, end), (baseline_start, window_start)])
+    recent_events, baseline_events = int(events[0]), int(events[1])
+
+    symptoms = []
+    if recent_events and baseline_events and names:
+        recent, baseline = counts[0].astype(float), counts[1].astype(float)
+        recent_share, baseline_share = recent / recent_events, baseline / baseline_events
+        pooled = (recent + baseline) / (recent_events + baseline_events)
+        stderr = np.sqrt(pooled * (1 - pooled) * (1 / recent_events + 1 / baseline_events))
+        z_scores = np.divide(recent_share - baseline_share, stderr, out=np.zeros_like(stderr), where=stderr > 0)
+        z_scores[recent < min_count] = -np.inf
+        for index in np.argsort(-z_scores, kind="stable")[:limit]:
+            if not np.isfinite(z_scores[index]) or z_scores[index] <= 0:
+                break
+            symptoms.append(
+                TrendingSymptom(
+                    symptom=names[index],
+                    recent_count=int(recent[index]),
+                    baseline_count=int(baseline[index]),
+                    recent_share=round(float(recent_share[index]), 6),
+                    baseline_share=round(float(baseline_share[index]), 6),
+                    z_score=round(float(z_scores[index]), 3),
+                )
+            )
+    return TrendingSymptoms(
+        window_start=_utc(window_start),
+        baseline_start=_utc(baseline_start),
+        end=_utc(end),
+        recent_events=recent_events,
+        baseline_events=baseline_events,
+        symptoms=symptoms,
+    )
@@ -1,16 +1,20 @@
-"""Authentication endpoints for signup and login."""
+"""Authentication endpoints for signup, login and logout."""
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends, HTTPException, status
 
 from backend.app.core import auth as auth_core
-from backend.app.data import user_store
+from backend.app.core.rate_limit import rate_limited
+from backend.app.data import session_store, user_store
 from backend.app.schemas.auth import AuthResponse, LoginRequest, SignupRequest, UserProfile
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+# Both hash a password with PBKDF2, so they draw on the smaller "expensive" budget as well.
+_expensive_budget = [Depends(rate_limited("expensive"))]
 
-@router.post("/signup", response_model=AuthResponse, status_code=201)
+
+@router.post("/signup", response_model=AuthResponse, status_code=201, dependencies=_expensive_budget)
 def signup(request: SignupRequest) -> AuthResponse:
     if not request.email.strip():
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email is required")
@@ -20,21 +24,35 @@ def signup(request: SignupRequest) -> AuthResponse:
         user = user_store.create_user(request.name, request.email, request.password)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
-    token = user_store.issue_token(user["id"])
+    token = session_store.create_session(user["id"])
     return AuthResponse(token=token, user=auth_core.to_user_profile(user))
 
 
-@router.post("/login", response_model=AuthResponse)
+@router.post("/login", response_model=AuthResponse, dependencies=_expensive_budget)
 def login(request: LoginRequest) -> AuthResponse:
     if not request.email.strip() or not request.password.strip():
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email and password are required")
     user = user_store.authenticate(request.email, request.password)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email or password")
-    token = user_store.issue_token(user["id"])
+    token = session_store.create_session(user["id"])
     return AuthResponse(token=token, user=auth_core.to_user_profile(user))
 
 
 @router.get("/me", response_model=UserProfile)
 def read_current_user(current_user=Depends(auth_core.get_current_user)) -> UserProfile:
     return auth_core.to_user_profile(current_user)
+
+
+@router.post("/logout", status_code=200)
+def logout(token: str = Depends(auth_core.get_current_token)) -> dict:
+    """Revoke the session used for this request."""
+    session_store.revoke(token)
+    return {"detail": "Logged out"}
+
+
+@router.post("/logout-all", status_code=200)
+def logout_all(current_user=Depends(auth_core.get_current_user)) -> dict:
+    """Revoke every active session of the current user."""
+    session_store.revoke_user(current_user["id"])
+    return {"detail": "All sessions revoked"}
@@ -0,0 +1,34 @@
+"""Similar reference case lookup."""
+from __future__ import annotations
+
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from backend.app.core.config import get_settings
+from backend.app.ml import similar_cases
+from backend.app.ml.preprocess import normalize_symptom
+from backend.app.schemas.response import SimilarCase, SimilarCasesResponse
+
+router = APIRouter(prefix="/cases", tags=["cases"])
+
+
+@router.get("/similar", response_model=SimilarCasesResponse)
+def similar(
+    symptoms: Optional[List[str]] = Query(None, description="Symptoms to match; repeat the parameter for each"),
+    limit: int = Query(5, ge=1, le=50),
+    max_candidates: Optional[int] = Query(
+        None, ge=1, le=100000, description="Re-rank at most this many LSH candidates; higher trades latency for recall"
+    ),
+) -> SimilarCasesResponse:
+    """Return the reference cases whose symptom sets are most similar (Jaccard) to ``symptoms``."""
+    normalized = list(dict.fromkeys(value for symptom in symptoms or [] if (value := normalize_symptom(symptom))))
+    if not normalized:
+        raise HTTPException(status_code=400, detail="No valid symptoms were provided.")
+    index = similar_cases.get_case_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Similar cases are unavailable: the case index has not been built.")
+    cases = index.query(
+        normalized, limit=limit, max_candidates=max_candidates or get_settings().similar_cases_max_candidates
+    )
+    return SimilarCasesResponse(symptoms=normalized, cases=[SimilarCase(**case) for case in cases])
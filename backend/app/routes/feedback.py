@@ -0,0 +1,47 @@
+"""Clinician feedback on predicted diagnoses."""
+from __future__ import annotations
+
+import secrets
+from typing import Dict, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+
+from backend.app.core.config import get_settings
+from backend.app.data import feedback_store
+from backend.app.ml import inference
+from backend.app.ml.preprocess import normalize_symptom
+from backend.app.schemas.request import FeedbackRequest
+from backend.app.schemas.response import FeedbackResponse
+
+router = APIRouter(prefix="/feedback", tags=["feedback"])
+
+
+def require_feedback_token(x_feedback_token: Optional[str] = Header(default=None)) -> None:
+    token = get_settings().feedback_token
+    if not token or not x_feedback_token or not secrets.compare_digest(x_feedback_token, token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Feedback token required")
+
+
+def _disease_names() -> Dict[str, str]:
+    return {name.strip().lower(): name for name in inference.get_diagnosis_bundle()["model"].classes_}
+
+
+def _known_disease(name: str) -> str:
+    disease = _disease_names().get(name.strip().lower())
+    if disease is None:
+        raise HTTPException(status_code=422, detail=f"Unknown disease: {name}")
+    return disease
+
+
+@router.post("", response_model=FeedbackResponse, status_code=201, dependencies=[Depends(require_feedback_token)])
+def submit_feedback(request: FeedbackRequest) -> FeedbackResponse:
+    """Record the diagnosis a clinician confirmed for a set of symptoms."""
+    normalized = list(dict.fromkeys(value for symptom in request.symptoms if (value := normalize_symptom(symptom))))
+    vocabulary = inference.get_diagnosis_bundle()["symptom_to_index"]
+    mapped = [symptom for symptom in normalized if symptom in vocabulary]
+    if not mapped:
+        raise HTTPException(status_code=422, detail="None of the provided symptoms could be mapped to the model vocabulary.")
+    confirmed = _known_disease(request.confirmed_disease)
+    predicted = _known_disease(request.predicted_disease) if request.predicted_disease else None
+    record = feedback_store.append(mapped, confirmed, predicted)
+    return FeedbackResponse(**record, unmapped_symptoms=[symptom for symptom in normalized if symptom not in vocabulary])
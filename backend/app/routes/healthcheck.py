@@ -1,7 +1,13 @@
-"""Healthcheck endpoint."""
+"""Healthcheck and readiness endpoints."""
 from __future__ import annotations
 
-from fastapi import APIRouter
+import secrets
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+
+from backend.app.core import rate_limit, warmup
+from backend.app.core.config import get_settings
 
 router = APIRouter(tags=["health"])
 
@@ -9,3 +15,26 @@ router = APIRouter(tags=["health"])
 @router.get("/health", summary="Service healthcheck")
 def healthcheck() -> dict[str, str]:
     return {"status": "ok"}
+
+
+@router.get("/ready", summary="Readiness probe, succeeds once warm-up has completed")
+def readiness(response: Response) -> dict[str, Any]:
+    warmup_status = warmup.get_status()
+    if warmup_status["status"] != "ready":
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"status": warmup_status["status"], "warmup": warmup_status}
+
+
+def require_rate_limit_token(x_rate_limit_token: Optional[str] = Header(default=None)) -> None:
+    token = get_settings().rate_limit_token
+    if not token or not x_rate_limit_token or not secrets.compare_digest(x_rate_limit_token, token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Rate limit token required")
+
+
+@router.get(
+    "/rate-limits",
+    summary="Throttled request counters per rate-limit budget",
+    dependencies=[Depends(require_rate_limit_token)],
+)
+def rate_limit_stats() -> dict[str, Any]:
+    return {"enabled": get_settings().rate_limit_enabled, "budgets": rate_limit.stats()}
@@ -2,41 +2,90 @@
 from __future__ import annotations
 
 import logging
-from typing import List
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from fastapi import APIRouter, HTTPException
+import numpy as np
+from fastapi import APIRouter, HTTPException, Response
 
-from backend.app.ml import inference
+from backend.app.core import serialization, warmup
+from backend.app.core.config import get_settings
+from backend.app.data import event_store
+from backend.app.ml import (
+    diagnosis_session,
+    inference,
+    recommender,
+    sensitivity,
+    shadow,
+    similar_cases,
+    spelling,
+    symptom_extraction,
+)
 from backend.app.ml.preprocess import normalize_symptom
-from backend.app.schemas.request import PredictionRequest
-from backend.app.schemas.response import PredictionResponse
+from backend.app.schemas.request import (
+    DiagnosisSessionRequest,
+    PredictionRequest,
+    SensitivityRequest,
+    SessionSymptomRequest,
+    SymptomDetail,
+    TextBatchPredictionRequest,
+    TextPredictionRequest,
+)
+from backend.app.schemas.response import (
+    DiagnosisSessionResponse,
+    ExtractedSymptom,
+    PredictionResponse,
+    SensitivityResponse,
+    SymptomCorrection,
+    TextBatchPredictionResponse,
+    TextPredictionResponse,
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["prediction"])
 
 
-@router.post("/predict", response_model=PredictionResponse)
-def predict(request: PredictionRequest) -> PredictionResponse:
-    normalized: List[str] = [normalize_symptom(symptom) for symptom in request.symptoms]
-    normalized = [symptom for symptom in normalized if symptom]
-    normalized = list(dict.fromkeys(normalized))  # preserve order but drop duplicates
-    if not normalized:
-        raise HTTPException(status_code=400, detail="No valid symptoms were provided.")
+def _apply_spelling_corrections(
+    normalized: List[str], severity_overrides: Dict[str, float]
+) -> Tuple[List[str], Dict[str, float], List[SymptomCorrection]]:
+    known = inference.get_symptom_index().ids  # model vocabulary plus red-flag and follow-up terms
+    corrected: List[str] = []
+    overrides = dict(severity_overrides)
+    corrections: List[SymptomCorrection] = []
+    for symptom in normalized:
+        correction = None if symptom in known else spelling.correct_symptom(symptom)
+        if correction is None:
+            corrected.append(symptom)
+            continue
+        corrections.append(SymptomCorrection(**correction._asdict()))
+        if not correction.applied:
+            corrected.append(symptom)
+            continue
+        corrected.append(correction.suggestion)
+        if symptom in overrides:
+            overrides.setdefault(correction.suggestion, overrides.pop(symptom))
+    return list(dict.fromkeys(corrected)), overrides, corrections
 
-    bundle = inference.get_diagnosis_bundle()
-    vocab = set(bundle["symptom_to_index"])
-    unmapped_symptoms = [symptom for symptom in normalized if symptom not in vocab]
 
-    severity_overrides = {}
-    if request.symptom_details:
-        for detail in request.symptom_details:
-            normalized_name = normalize_symptom(detail.name)
-            if normalized_name and detail.severity is not None:
-                severity_overrides[normalized_name] = float(detail.severity)
+def _predict_parts(
+    normalized: List[str],
+    severity_overrides: Dict[str, float],
+    corrections: List[SymptomCorrection] | None = None,
+    probabilities: Optional[np.ndarray] = None,
+    similar_limit: int = 0,
+    rule_symptoms: Optional[Sequence[str]] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, List[Any]]]:
+    """Return the disease results and the remaining ``PredictionResponse`` fields.
+
+    ``rule_symptoms``, if given, replace ``normalized`` for the red-flag and follow-up rules, so
+    rule terms outside the model vocabulary can drive them without becoming model input.
+    """
+    # Interned once; the steps below work on the bitset instead of re-hashing symptom names.
+    symptom_set = inference.intern_symptoms(normalized, severity_overrides, normalized=True)
+    unmapped_symptoms = list(symptom_set.unmapped)
 
     try:
-        results = inference.predict_diseases(normalized, severity_overrides=severity_overrides)
+        results = inference.predict_diseases(symptom_set, probabilities=probabilities)
     except ValueError as exc:  # input validation errors during encoding
         logger.warning("Prediction rejected: %s", exc)
         raise HTTPException(status_code=422, detail=str(exc)) from exc
@@ -44,13 +93,212 @@ def predict(request: PredictionRequest) -> PredictionResponse:
         logger.exception("Prediction failed")
         raise HTTPException(status_code=500, detail="Prediction failed.") from exc
 
-    red_flags = inference.detect_red_flags(normalized)
-    follow_up = inference.suggest_follow_up_questions(normalized)
+    # Only real requests the serving model actually scored are shadowed and recorded. Neither
+    # side effect may fail a prediction that was already computed.
+    if probabilities is None and not warmup.is_synthetic_request():
+        try:
+            shadow.submit(normalized, severity_overrides, results)
+        except Exception:
+            logger.exception("Shadow submission failed")
+        if get_settings().analytics_enabled:
+            try:
+                top = results[0]
+                mapped = [symptom for symptom in normalized if symptom not in symptom_set.unmapped]
+                event_store.record(top["disease"], top["triage_level"], top["severity_score"], mapped)
+            except Exception:
+                logger.exception("Recording the analytics event failed")
 
-    return PredictionResponse(
-        results=results,
-        normalized_symptoms=normalized,
-        unmapped_symptoms=unmapped_symptoms,
-        red_flags=red_flags,
-        follow_up_questions=follow_up,
+    rule_set = symptom_set if rule_symptoms is None else inference.intern_symptoms(rule_symptoms, normalized=True)
+    red_flags = inference.detect_red_flags(rule_set)
+    follow_up = inference.suggest_follow_up_questions(rule_set)
+    recommended = recommender.recommend_symptoms(
+        normalized, {result["disease"]: result["probability"] for result in results}
     )
+
+    return results, {
+        "normalized_symptoms": normalized,
+        "unmapped_symptoms": unmapped_symptoms,
+        "corrections": corrections or [],
+        "red_flags": red_flags,
+        "follow_up_questions": follow_up,
+        "recommended_symptoms": recommended,
+        "similar_cases": similar_cases.similar_cases(normalized, similar_limit) if similar_limit else [],
+    }
+
+
+def _run_prediction(
+    normalized: List[str],
+    severity_overrides: Dict[str, float],
+    corrections: List[SymptomCorrection] | None = None,
+    probabilities: Optional[np.ndarray] = None,
+    similar_limit: int = 0,
+    rule_symptoms: Optional[Sequence[str]] = None,
+) -> PredictionResponse:
+    results, fields = _predict_parts(normalized, severity_overrides, corrections, probabilities, similar_limit, rule_symptoms)
+    return PredictionResponse(results=results, **fields)
+
+
+def _predict_from_matches(matches: List[symptom_extraction.SymptomMatch]) -> TextPredictionResponse:
+    extracted = [ExtractedSymptom(**match._asdict()) for match in matches]
+    terms = list(dict.fromkeys(match.symptom for match in matches))
+    # Rule terms ("fever" next to mild_fever, "loss_of_consciousness") only drive red flags and
+    # follow-up questions, so they stay out of the model input, unmapped_symptoms and the
+    # severity score, just as if the caller had listed the model features.
+    index = inference.get_symptom_index()
+    rule_terms = [term for term in terms if index.ids.get(term, -1) >= index.n_features]
+    normalized = [term for term in terms if term not in rule_terms]
+    if not normalized:
+        if not rule_terms:
+            return TextPredictionResponse(results=[], extracted_symptoms=extracted)
+        # Only rule terms ("I passed out"): nothing to rank, but the red flags must still show.
+        rule_set = inference.intern_symptoms(rule_terms, normalized=True)
+        return TextPredictionResponse(
+            results=[],
+            red_flags=inference.detect_red_flags(rule_set),
+            follow_up_questions=inference.suggest_follow_up_questions(rule_set),
+            extracted_symptoms=extracted,
+        )
+    response = _run_prediction(normalized, {}, rule_symptoms=terms if rule_terms else None)
+    return TextPredictionResponse(**response.model_dump(), extracted_symptoms=extracted)
+
+
+def _normalize_request(
+    symptoms: List[str], symptom_details: List[SymptomDetail]
+) -> Tuple[List[str], Dict[str, float], List[SymptomCorrection]]:
+    normalized: List[str] = [normalize_symptom(symptom) for symptom in symptoms]
+    normalized = [symptom for symptom in normalized if symptom]
+    normalized = list(dict.fromkeys(normalized))  # preserve order but drop duplicates
+
+    severity_overrides = {}
+    for detail in symptom_details:
+        normalized_name = normalize_symptom(detail.name)
+        if normalized_name and detail.severity is not None:
+            severity_overrides[normalized_name] = float(detail.severity)
+
+    return _apply_spelling_corrections(normalized, severity_overrides)
+
+
+@router.post("/predict", response_model=PredictionResponse)
+def predict(request: PredictionRequest) -> PredictionResponse:
+    normalized, severity_overrides, corrections = _normalize_request(request.symptoms, request.symptom_details)
+    if not normalized:
+        raise HTTPException(status_code=400, detail="No valid symptoms were provided.")
+    similar_limit = request.similar_limit if request.include_similar else 0
+    if get_settings().fast_predict_serialization:
+        # Encoded once, bypassing response_model validation; the contract is checked by
+        # tests/test_predict_serialization.py and benchmark_predict_serialization.py.
+        results, fields = _predict_parts(normalized, severity_overrides, corrections, similar_limit=similar_limit)
+        return Response(content=serialization.prediction_body(results, fields), media_type="application/json")
+    return _run_prediction(normalized, severity_overrides, corrections, similar_limit=similar_limit)
+
+
+@router.post("/predict/sensitivity", response_model=SensitivityResponse)
+def predict_sensitivity(request: SensitivityRequest) -> SensitivityResponse:
+    """Show how the ranking shifts when each symptom is removed, a related one added or its severity changed."""
+    normalized, severity_overrides, corrections = _normalize_request(request.symptoms, request.symptom_details)
+    if not normalized:
+        raise HTTPException(status_code=400, detail="No valid symptoms were provided.")
+    try:
+        analysis = sensitivity.analyze(
+            normalized,
+            severity_overrides,
+            add_candidates=request.add_candidates,
+            severity_levels=request.severity_levels,
+        )
+    except ValueError as exc:
+        logger.warning("Sensitivity analysis rejected: %s", exc)
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    return SensitivityResponse(**analysis, normalized_symptoms=normalized, corrections=corrections)
+
+
+def _session_response(
+    session: diagnosis_session.DiagnosisSession, corrections: List[SymptomCorrection] | None = None
+) -> DiagnosisSessionResponse:
+    normalized = list(session.symptoms)
+    if session.has_mapped_symptoms():
+        response = _run_prediction(normalized, dict(session.severity_overrides), corrections, session.probabilities())
+    else:
+        response = PredictionResponse(
+            results=[],
+            normalized_symptoms=normalized,
+            unmapped_symptoms=normalized,
+            corrections=corrections or [],
+            red_flags=inference.detect_red_flags(normalized),
+            follow_up_questions=inference.suggest_follow_up_questions(normalized),
+        )
+    return DiagnosisSessionResponse(
+        **response.model_dump(), session_id=session.id, trees_rerouted=session.trees_rerouted
+    )
+
+
+def _get_session(session_id: str) -> diagnosis_session.DiagnosisSession:
+    session = diagnosis_session.get_session(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Diagnosis session not found or expired.")
+    return session
+
+
+@router.post("/predict/sessions", response_model=DiagnosisSessionResponse, status_code=201)
+def create_diagnosis_session(request: Optional[DiagnosisSessionRequest] = None) -> DiagnosisSessionResponse:
+    """Open an interactive session that re-scores incrementally as symptoms are added or removed."""
+    request = request or DiagnosisSessionRequest()
+    normalized, severity_overrides, corrections = _normalize_request(request.symptoms, request.symptom_details)
+    session = diagnosis_session.create_session()
+    with session.lock:
+        rerouted = session.trees_rerouted  # the initial full evaluation
+        for symptom in normalized:
+            rerouted += session.set_symptom(symptom, severity_overrides.get(symptom))
+        session.trees_rerouted = rerouted
+        return _session_response(session, corrections)
+
+
+@router.get("/predict/sessions/{session_id}", response_model=DiagnosisSessionResponse)
+def get_diagnosis_session(session_id: str) -> DiagnosisSessionResponse:
+    session = _get_session(session_id)
+    with session.lock:
+        return _session_response(session)
+
+
+@router.post("/predict/sessions/{session_id}/symptoms", response_model=DiagnosisSessionResponse)
+def add_session_symptom(session_id: str, request: SessionSymptomRequest) -> DiagnosisSessionResponse:
+    """Add a symptom to the session, or update its severity if it is already present."""
+    session = _get_session(session_id)
+    normalized = normalize_symptom(request.name)
+    if not normalized:
+        raise HTTPException(status_code=400, detail="No valid symptom was provided.")
+    overrides = {normalized: float(request.severity)} if request.severity is not None else {}
+    corrected, overrides, corrections = _apply_spelling_corrections([normalized], overrides)
+    with session.lock:
+        session.set_symptom(corrected[0], overrides.get(corrected[0]))
+        return _session_response(session, corrections)
+
+
+@router.delete("/predict/sessions/{session_id}/symptoms/{symptom}", response_model=DiagnosisSessionResponse)
+def remove_session_symptom(session_id: str, symptom: str) -> DiagnosisSessionResponse:
+    session = _get_session(session_id)
+    with session.lock:
+        if not session.remove_symptom(normalize_symptom(symptom)):
+            raise HTTPException(status_code=404, detail="Symptom is not part of this session.")
+        return _session_response(session)
+
+
+@router.delete("/predict/sessions/{session_id}", status_code=200)
+def close_diagnosis_session(session_id: str) -> dict:
+    if not diagnosis_session.close_session(session_id):
+        raise HTTPException(status_code=404, detail="Diagnosis session not found or expired.")
+    return {"detail": "Session closed"}
+
+
+@router.post("/predict/text", response_model=TextPredictionResponse)
+def predict_from_text(request: TextPredictionRequest) -> TextPredictionResponse:
+    matches = symptom_extraction.extract_symptoms([request.text])[0]
+    if not matches:
+        raise HTTPException(status_code=422, detail="No known symptoms were found in the provided text.")
+    return _predict_from_matches(matches)
+
+
+@router.post("/predict/text/batch", response_model=TextBatchPredictionResponse)
+def predict_from_text_batch(request: TextBatchPredictionRequest) -> TextBatchPredictionResponse:
+    # Notes without any recognizable symptom yield an empty result instead of failing the batch.
+    batch_matches = symptom_extraction.extract_symptoms(request.notes)
+    return TextBatchPredictionResponse(items=[_predict_from_matches(matches) for matches in batch_matches])
@@ -0,0 +1,43 @@
+"""Admin endpoints for captured request profiles."""
+from __future__ import annotations
+
+import io
+import pstats
+import secrets
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import FileResponse, PlainTextResponse
+
+from backend.app.core import profiling
+from backend.app.core.config import get_settings
+
+router = APIRouter(prefix="/admin/profiles", tags=["admin"])
+
+
+def require_profiling_token(x_profile_token: Optional[str] = Header(default=None)) -> None:
+    token = get_settings().profiling_token
+    if not token or not x_profile_token or not secrets.compare_digest(x_profile_token, token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Profiling token required")
+
+
+@router.get("", dependencies=[Depends(require_profiling_token)])
+def list_request_profiles() -> list[dict]:
+    return profiling.list_profiles()
+
+
+@router.get("/{profile_id}", dependencies=[Depends(require_profiling_token)])
+def download_request_profile(
+    profile_id: str,
+    format: Literal["pstats", "text"] = "pstats",
+    limit: int = Query(40, ge=1, le=500),
+):
+    """Download the raw ``pstats`` dump, or a text summary sorted by cumulative time."""
+    path = profiling.profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "pstats":
+        return FileResponse(path, media_type="application/octet-stream", filename=path.name)
+    buffer = io.StringIO()
+    pstats.Stats(str(path), stream=buffer).sort_stats("cumulative").print_stats(limit)
+    return PlainTextResponse(buffer.getvalue())
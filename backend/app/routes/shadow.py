@@ -0,0 +1,37 @@
+"""Admin endpoints for shadow evaluation of a candidate diagnosis model."""
+from __future__ import annotations
+
+import secrets
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+
+from backend.app.core.config import get_settings
+from backend.app.ml import shadow
+
+router = APIRouter(prefix="/admin/shadow", tags=["admin"])
+
+
+def require_shadow_token(x_shadow_token: Optional[str] = Header(default=None)) -> None:
+    token = get_settings().shadow_token
+    if not token or not x_shadow_token or not secrets.compare_digest(x_shadow_token, token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Shadow token required")
+
+
+def _get_evaluator() -> shadow.ShadowEvaluator:
+    evaluator = shadow.get_evaluator()
+    if evaluator is None:
+        raise HTTPException(status_code=404, detail="Shadow evaluation is not configured")
+    return evaluator
+
+
+@router.get("", dependencies=[Depends(require_shadow_token)])
+def shadow_report() -> Dict[str, Any]:
+    """Agreement and latency of the candidate model against the serving model so far."""
+    return _get_evaluator().report()
+
+
+@router.delete("", status_code=200, dependencies=[Depends(require_shadow_token)])
+def reset_shadow_report() -> dict:
+    _get_evaluator().reset()
+    return {"detail": "Shadow statistics reset"}
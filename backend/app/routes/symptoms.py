@@ -1,14 +1,49 @@
-"""Symptom metadata endpoints."""
+"""Symptom and disease metadata endpoints.
+
+Bodies are serialized and compressed once per model/data version (see ``core.http_cache``) and
+served with strong ETags, so repeat clients get ``304 Not Modified``.
+"""
 from __future__ import annotations
 
-from fastapi import APIRouter
+from functools import lru_cache
+from typing import Optional
+
+from fastapi import APIRouter, Query, Request, Response
 
-from backend.app.data.loader import get_symptom_vocabulary
-from backend.app.schemas.response import SymptomsResponse
+from backend.app.core.config import get_settings
+from backend.app.core.http_cache import CachedBody, content_version
+from backend.app.ml.inference import get_disease_metadata, get_symptom_vocabulary
+from backend.app.schemas.response import DiseaseInfo, DiseasesResponse, SymptomsResponse
 
 router = APIRouter(tags=["metadata"])
 
+_VERSION_QUERY = Query(None, description="Content version from X-Content-Version; a match makes the URL immutable")
+
+
+@lru_cache
+def symptoms_body() -> CachedBody:
+    vocabulary = get_symptom_vocabulary()
+    version = content_version(vocabulary)
+    return CachedBody(SymptomsResponse(symptoms=vocabulary, version=version).model_dump(), version)
+
+
+@lru_cache
+def diseases_body() -> CachedBody:
+    metadata = get_disease_metadata()
+    version = content_version(metadata)
+    diseases = [
+        DiseaseInfo(name=name, description=info.get("description") or None, precautions=info.get("precautions", []))
+        for name, info in sorted(metadata.items())
+    ]
+    return CachedBody(DiseasesResponse(diseases=diseases, version=version).model_dump(), version)
+
 
 @router.get("/symptoms", response_model=SymptomsResponse)
-def list_symptoms() -> SymptomsResponse:
-    return SymptomsResponse(symptoms=get_symptom_vocabulary())
+def list_symptoms(request: Request, v: Optional[str] = _VERSION_QUERY) -> Response:
+    return symptoms_body().response(request, get_settings().metadata_cache_max_age, v)
+
+
+@router.get("/diseases", response_model=DiseasesResponse)
+def list_diseases(request: Request, v: Optional[str] = _VERSION_QUERY) -> Response:
+    """Disease catalog with descriptions and precautions."""
+    return diseases_body().response(request, get_settings().metadata_cache_max_age, v)
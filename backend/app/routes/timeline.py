@@ -1,33 +1,145 @@
 """Timeline management endpoints."""
 from __future__ import annotations
 
+import base64
+import binascii
+import hashlib
+import json
 import uuid
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterator, List, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
 
 from backend.app.core.auth import get_current_user
+from backend.app.core.config import get_settings
 from backend.app.data import timeline_store
-from backend.app.schemas.timeline import TimelineCreateRequest, TimelineEntry
+from backend.app.schemas.timeline import (
+    TimelineChanges,
+    TimelineCreateRequest,
+    TimelineEntry,
+    TimelineImportEntry,
+    TimelineImportError,
+    TimelineImportResult,
+    TimelinePage,
+    TimelineTrends,
+    TrendPoint,
+)
 
 router = APIRouter(prefix="/timeline", tags=["timeline"])
 
+_EXPORT_CHUNK_BYTES = 64 * 1024
+_MAX_REPORTED_IMPORT_ERRORS = 100
+
+
+def _encode_cursor(key: timeline_store.SortKey) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> timeline_store.SortKey:
+    try:
+        occurred_at, entry_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(occurred_at), str(entry_id)
+    except (binascii.Error, ValueError, TypeError, UnicodeError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+
+
+def _conditional(request: Request, response: Response, user_id: str, view: str) -> Optional[Response]:
+    """Set validators on ``response``; return a 304 response if the client copy is current.
+
+    ``view`` names the route and its normalized query parameters, so each page or delta gets its
+    own tag and a 304 never confirms a different view than the one the client cached.
+    """
+    view_hash = hashlib.sha256(view.encode("utf-8")).hexdigest()[:16]
+    etag = f'"tl-{timeline_store.user_version(user_id)}-{view_hash}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in {tag.strip() for tag in if_none_match.split(",")}:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
 
 @router.get("", response_model=list[TimelineEntry])
-def list_timeline_entries(current_user=Depends(get_current_user)) -> list[TimelineEntry]:
+def list_timeline_entries(request: Request, response: Response, current_user=Depends(get_current_user)):
+    not_modified = _conditional(request, response, current_user["id"], "all")
+    if not_modified is not None:
+        return not_modified
     entries = timeline_store.list_entries(current_user["id"])
     return [TimelineEntry(**entry) for entry in entries]
 
 
-@router.post("", response_model=TimelineEntry, status_code=201)
-def create_timeline_entry(request: TimelineCreateRequest, current_user=Depends(get_current_user)) -> TimelineEntry:
+@router.get("/page", response_model=TimelinePage)
+def list_timeline_page(
+    request: Request,
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    current_user=Depends(get_current_user),
+):
+    """Return entries newest first, paginated on ``(occurred_at, id)``."""
+    key = _decode_cursor(cursor) if cursor else None
+    not_modified = _conditional(request, response, current_user["id"], f"page:{limit}:{json.dumps(key)}")
+    if not_modified is not None:
+        return not_modified
+    entries, next_key = timeline_store.list_page(current_user["id"], limit, key)
+    return TimelinePage(
+        entries=[TimelineEntry(**entry) for entry in entries],
+        next_cursor=_encode_cursor(next_key) if next_key else None,
+        version=timeline_store.user_version(current_user["id"]),
+    )
+
+
+@router.get("/changes", response_model=TimelineChanges)
+def list_timeline_changes(
+    request: Request,
+    response: Response,
+    since: int = Query(..., ge=0),
+    current_user=Depends(get_current_user),
+):
+    """Return entries added and ids deleted after timeline version ``since``."""
+    not_modified = _conditional(request, response, current_user["id"], f"changes:{since}")
+    if not_modified is not None:
+        return not_modified
+    try:
+        delta = timeline_store.changes_since(current_user["id"], since)
+    except timeline_store.ChangesExpired as exc:
+        raise HTTPException(status_code=410, detail=f"{exc}; reload the full timeline") from exc
+    return TimelineChanges(
+        entries=[TimelineEntry(**entry) for entry in delta.upserted],
+        deleted_ids=delta.deleted_ids,
+        version=delta.version,
+    )
+
+
+@router.get("/trends", response_model=TimelineTrends)
+def get_timeline_trends(
+    granularity: Literal["day", "week"] = "day",
+    entry_type: Optional[Literal["case", "tracker"]] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current_user=Depends(get_current_user),
+) -> TimelineTrends:
+    """Return min/max/mean/count of severity scores and per-symptom severities per bucket."""
+    series = timeline_store.trends(current_user["id"], granularity, entry_type, start, end)
+    return TimelineTrends(
+        granularity=granularity,
+        severity=[TrendPoint(**point) for point in series.pop(None, [])],
+        symptoms={symptom: [TrendPoint(**point) for point in points] for symptom, points in series.items()},
+    )
+
+
+def _build_entry(request: TimelineCreateRequest, user_id: str, entry_id: Optional[str] = None) -> Dict[str, Any]:
     occurred_at = request.occurred_at or datetime.now(timezone.utc)
     entry = {
-        "id": str(uuid.uuid4()),
+        "id": entry_id or str(uuid.uuid4()),
         "symptoms": request.symptoms,
         "notes": request.notes,
         "occurred_at": occurred_at.isoformat(),
-        "user_id": current_user["id"],
+        "user_id": user_id,
         "entry_type": request.entry_type or "case",
     }
     if request.top_prediction:
@@ -38,8 +150,114 @@ def create_timeline_entry(request: TimelineCreateRequest, current_user=Depends(g
         entry["severity_score"] = request.severity_score
     if request.symptom_severity is not None:
         entry["symptom_severity"] = request.symptom_severity
-    timeline_store.add_entry(entry, current_user["id"])
-    return TimelineEntry(**entry)
+    return entry
+
+
+@router.get("/export")
+def export_timeline(current_user=Depends(get_current_user)) -> StreamingResponse:
+    """Stream the user's timeline as NDJSON, newest entry first."""
+    user_id = current_user["id"]
+
+    def _lines() -> Iterator[bytes]:
+        buffer: List[str] = []
+        size = 0
+        for entry in timeline_store.iter_entries(user_id):
+            line = json.dumps(entry, ensure_ascii=False) + "\n"
+            buffer.append(line)
+            size += len(line)
+            if size >= _EXPORT_CHUNK_BYTES:
+                yield "".join(buffer).encode("utf-8")
+                buffer, size = [], 0
+        if buffer:
+            yield "".join(buffer).encode("utf-8")
+
+    return StreamingResponse(
+        _lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="timeline.ndjson"'},
+    )
+
+
+@router.post("/import", response_model=TimelineImportResult)
+async def import_timeline(request: Request, current_user=Depends(get_current_user)) -> TimelineImportResult:
+    """Import NDJSON timeline entries, committing one store write per batch.
+
+    Lines that fail validation are reported and skipped; entries whose id already exists in the
+    user's timeline are skipped so re-importing an export is idempotent, and entries whose id is
+    used by another user are stored under a new id. A line longer than
+    ``TIMELINE_IMPORT_MAX_LINE_BYTES`` aborts the import with 413; batches committed before it
+    are kept.
+    """
+    user_id = current_user["id"]
+    settings = get_settings()
+    batch_size = max(settings.timeline_import_batch_size, 1)
+    max_line = settings.timeline_import_max_line_bytes
+    known_ids = await run_in_threadpool(timeline_store.existing_ids, user_id)
+    result = TimelineImportResult(imported=0, skipped=0, failed=0, batches=0)
+    batch: List[Dict[str, Any]] = []
+    line_number = 0
+
+    async def _commit() -> None:
+        if batch:
+            stored = await run_in_threadpool(timeline_store.add_entries, list(batch), user_id)
+            result.reissued += sum(entry["id"] != requested["id"] for entry, requested in zip(stored, batch))
+            result.imported += len(batch)
+            result.batches += 1
+            batch.clear()
+
+    def _consume(raw: bytes) -> None:
+        nonlocal line_number
+        line_number += 1
+        if not raw.strip():
+            return
+        try:
+            item = TimelineImportEntry.model_validate_json(raw)
+        except ValidationError as exc:
+            result.failed += 1
+            if len(result.errors) < _MAX_REPORTED_IMPORT_ERRORS:
+                result.errors.append(TimelineImportError(line=line_number, detail=str(exc.errors()[0]["msg"])))
+            return
+        if item.id and item.id in known_ids:
+            result.skipped += 1
+            return
+        entry = _build_entry(item, user_id, item.id)
+        known_ids.add(entry["id"])
+        batch.append(entry)
+
+    def _too_long() -> HTTPException:
+        return HTTPException(
+            status_code=413,
+            detail=f"Line {line_number + 1} exceeds {max_line} bytes; {result.imported} entries before it were imported",
+        )
+
+    # Only the bytes of the unfinished line are kept, and each chunk is scanned once for newlines.
+    pending = bytearray()
+    async for chunk in request.stream():
+        scan_from = len(pending)
+        pending += chunk
+        line_start = 0
+        while (newline := pending.find(b"\n", scan_from)) != -1:
+            if newline - line_start > max_line:
+                await _commit()
+                raise _too_long()
+            _consume(bytes(pending[line_start:newline]))
+            if len(batch) >= batch_size:
+                await _commit()
+            line_start = scan_from = newline + 1
+        del pending[:line_start]
+        if len(pending) > max_line:
+            await _commit()
+            raise _too_long()
+    if pending:
+        _consume(bytes(pending))
+    await _commit()
+    return result
+
+
+@router.post("", response_model=TimelineEntry, status_code=201)
+def create_timeline_entry(request: TimelineCreateRequest, current_user=Depends(get_current_user)) -> TimelineEntry:
+    stored = timeline_store.add_entry(_build_entry(request, current_user["id"]), current_user["id"])
+    return TimelineEntry(**stored)
 
 
 @router.delete("/{entry_id}", status_code=200)
@@ -0,0 +1,39 @@
+"""Population analytics schemas."""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict, List, Literal
+
+from pydantic import BaseModel, Field
+
+
+class TriageBucket(BaseModel):
+    bucket_start: datetime
+    total: int
+    counts: Dict[str, int] = Field(default_factory=dict)
+
+
+class TriageAnalytics(BaseModel):
+    bucket: Literal["hour", "day"]
+    start: datetime
+    end: datetime
+    totals: Dict[str, int] = Field(default_factory=dict)
+    buckets: List[TriageBucket] = Field(default_factory=list)
+
+
+class TrendingSymptom(BaseModel):
+    symptom: str
+    recent_count: int
+    baseline_count: int
+    recent_share: float
+    baseline_share: float
+    z_score: float
+
+
+class TrendingSymptoms(BaseModel):
+    window_start: datetime
+    baseline_start: datetime
+    end: datetime
+    recent_events: int
+    baseline_events: int
+    symptoms: List[TrendingSymptom] = Field(default_factory=list)
@@ -23,7 +23,7 @@ class SymptomDetail(BaseModel):
     )
 
 
-class PredictionRequest(BaseModel):
+class SymptomsRequest(BaseModel):
     """Symptoms payload."""
 
     symptoms: List[str] = Field(..., min_length=1, description="List of symptoms to evaluate")
@@ -31,7 +31,6 @@ class PredictionRequest(BaseModel):
         default_factory=list,
         description="Optional per-symptom duration and severity context",
     )
-
     @field_validator("symptoms", mode="before")
     @classmethod
     def _ensure_non_empty(cls, values: List[str]):
@@ -41,3 +40,75 @@ class PredictionRequest(BaseModel):
         if not cleaned:
             raise ValueError("All provided symptoms are empty")
         return cleaned
+
+
+class PredictionRequest(SymptomsRequest):
+    """Symptoms payload for ``/predict``."""
+
+    include_similar: bool = Field(default=False, description="Also return the most similar reference cases")
+    similar_limit: int = Field(default=5, ge=1, le=50, description="How many similar cases to return")
+
+
+class TextPredictionRequest(BaseModel):
+    """Free-text note to extract symptoms from."""
+
+    text: str = Field(..., min_length=1, max_length=5000, description="Free-text symptom description")
+
+
+class TextBatchPredictionRequest(BaseModel):
+    """Batch of free-text notes."""
+
+    notes: List[str] = Field(..., min_length=1, max_length=100, description="Free-text notes to evaluate")
+
+
+class DiagnosisSessionRequest(BaseModel):
+    """Optional initial symptoms for an interactive diagnosis session."""
+
+    symptoms: List[str] = Field(default_factory=list, description="Symptoms to start the session with")
+    symptom_details: List[SymptomDetail] = Field(
+        default_factory=list,
+        description="Optional per-symptom duration and severity context",
+    )
+
+
+class SessionSymptomRequest(BaseModel):
+    """A symptom to add to a diagnosis session, or whose severity should change."""
+
+    name: str = Field(..., min_length=1)
+    severity: Optional[int] = Field(
+        default=None,
+        ge=0,
+        le=10,
+        description="User-perceived severity on a 0-10 scale",
+    )
+
+
+class SensitivityRequest(SymptomsRequest):
+    """Symptoms payload plus the perturbations to evaluate."""
+
+    add_candidates: int = Field(
+        default=5,
+        ge=0,
+        le=20,
+        description="How many frequently co-occurring symptoms to try adding one at a time",
+    )
+    severity_levels: List[int] = Field(
+        default_factory=lambda: [0, 5, 10],
+        max_length=11,
+        description="Severity values (0-10) to try for each symptom",
+    )
+
+    @field_validator("severity_levels")
+    @classmethod
+    def _check_levels(cls, values: List[int]):
+        if any(value < 0 or value > 10 for value in values):
+            raise ValueError("Severity levels must be between 0 and 10")
+        return list(dict.fromkeys(values))
+
+
+class FeedbackRequest(BaseModel):
+    """A diagnosis confirmed or corrected by a clinician."""
+
+    symptoms: List[str] = Field(..., min_length=1, description="Symptoms of the case")
+    confirmed_disease: str = Field(..., min_length=1, description="Diagnosis confirmed by the clinician")
+    predicted_disease: Optional[str] = Field(default=None, description="Top prediction shown for the case, if any")
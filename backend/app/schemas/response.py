@@ -1,7 +1,7 @@
 """Response schemas."""
 from __future__ import annotations
 
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -15,13 +15,111 @@ class DiseasePrediction(BaseModel):
     description: Optional[str] = None
 
 
+class SymptomCorrection(BaseModel):
+    original: str
+    suggestion: str
+    distance: int
+    confidence: float = Field(ge=0.0, le=1.0)
+    applied: bool
+
+
+class SymptomRecommendation(BaseModel):
+    symptom: str
+    information_gain: float = Field(ge=0.0, description="Expected entropy reduction over the top diseases, in bits")
+    probability: float = Field(ge=0.0, le=1.0, description="Chance the symptom is present under the current ranking")
+
+
+class SimilarCase(BaseModel):
+    disease: str
+    symptoms: List[str]
+    similarity: float = Field(ge=0.0, le=1.0, description="Jaccard similarity to the query symptoms")
+    source: str = Field(description="Where the case comes from: dataset or timeline")
+    count: int = Field(ge=1, description="How many identical cases the entry stands for")
+
+
+class SimilarCasesResponse(BaseModel):
+    symptoms: List[str]
+    cases: List[SimilarCase]
+
+
 class PredictionResponse(BaseModel):
     results: List[DiseasePrediction]
     normalized_symptoms: List[str] = Field(default_factory=list)
     unmapped_symptoms: List[str] = Field(default_factory=list)
+    corrections: List[SymptomCorrection] = Field(default_factory=list)
     red_flags: List[str] = Field(default_factory=list)
     follow_up_questions: List[str] = Field(default_factory=list)
+    recommended_symptoms: List[SymptomRecommendation] = Field(default_factory=list)
+    similar_cases: List[SimilarCase] = Field(default_factory=list)
+
+
+class ExtractedSymptom(BaseModel):
+    symptom: str
+    phrase: str
+    start: int
+    end: int
+
+
+class TextPredictionResponse(PredictionResponse):
+    extracted_symptoms: List[ExtractedSymptom] = Field(default_factory=list)
+
+
+class TextBatchPredictionResponse(BaseModel):
+    items: List[TextPredictionResponse]
+
+
+class DiagnosisSessionResponse(PredictionResponse):
+    session_id: str
+    trees_rerouted: int = Field(ge=0, description="Trees re-evaluated by the last change to the session")
+
+
+class RankedDisease(BaseModel):
+    disease: str
+    probability: float = Field(ge=0.0, le=1.0)
+    rank: int = Field(ge=1)
+
+
+class DiseaseDelta(RankedDisease):
+    probability_delta: float
+    rank_delta: int = Field(description="Positive when the disease moved down the ranking")
+
+
+class PerturbationResult(BaseModel):
+    kind: Literal["remove", "add", "severity"]
+    symptom: str
+    severity: Optional[float] = None
+    top: List[RankedDisease]
+    deltas: List[DiseaseDelta] = Field(description="Change for each disease in the baseline top ranking")
+    top_changed: bool
+
+
+class SensitivityResponse(BaseModel):
+    baseline: List[RankedDisease]
+    normalized_symptoms: List[str] = Field(default_factory=list)
+    corrections: List[SymptomCorrection] = Field(default_factory=list)
+    perturbations: List[PerturbationResult]
 
 
 class SymptomsResponse(BaseModel):
     symptoms: List[str]
+    version: Optional[str] = None
+
+
+class DiseaseInfo(BaseModel):
+    name: str
+    description: Optional[str] = None
+    precautions: List[str] = Field(default_factory=list)
+
+
+class DiseasesResponse(BaseModel):
+    diseases: List[DiseaseInfo]
+    version: Optional[str] = None
+
+
+class FeedbackResponse(BaseModel):
+    id: str
+    created_at: float
+    symptoms: List[str]
+    unmapped_symptoms: List[str] = Field(default_factory=list)
+    confirmed_disease: str
+    predicted_disease: Optional[str] = None
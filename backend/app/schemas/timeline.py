@@ -1,7 +1,7 @@
 """Timeline and privacy schemas."""
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime
 from typing import List, Optional, Literal
 
 from pydantic import BaseModel, Field, field_validator
@@ -18,6 +18,34 @@ class TimelineEntry(BaseModel):
     symptom_severity: Optional[dict[str, float]] = None
     user_id: Optional[str] = None
     entry_type: Literal["case", "tracker"] = "case"
+    version: Optional[int] = None
+    summary: Optional[dict] = None
+
+
+class TimelinePage(BaseModel):
+    entries: List[TimelineEntry]
+    next_cursor: Optional[str] = None
+    version: int
+
+
+class TimelineChanges(BaseModel):
+    entries: List[TimelineEntry]
+    deleted_ids: List[str] = Field(default_factory=list)
+    version: int
+
+
+class TrendPoint(BaseModel):
+    bucket: date
+    count: int
+    mean: float
+    min: float
+    max: float
+
+
+class TimelineTrends(BaseModel):
+    granularity: Literal["day", "week"]
+    severity: List[TrendPoint] = Field(default_factory=list)
+    symptoms: dict[str, List[TrendPoint]] = Field(default_factory=dict)
 
 
 class TimelineCreateRequest(BaseModel):
@@ -44,3 +72,21 @@ class PrivacySummary(BaseModel):
     stored_categories: List[str]
     has_data: bool
     last_entry_at: Optional[datetime] = None
+
+
+class TimelineImportEntry(TimelineCreateRequest):
+    id: Optional[str] = Field(default=None, min_length=1, max_length=100)
+
+
+class TimelineImportError(BaseModel):
+    line: int
+    detail: str
+
+
+class TimelineImportResult(BaseModel):
+    imported: int
+    reissued: int = Field(default=0, description="Imported entries stored under a new id because theirs was taken")
+    skipped: int
+    failed: int
+    batches: int
+    errors: List[TimelineImportError] = Field(default_factory=list)
@@ -0,0 +1,56 @@
+"""Shared fixtures: the API runs against throwaway stores so tests never touch ``backend/app/data``."""
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import uuid
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.append(str(ROOT_DIR))
+
+# Settings are read once (lru_cache), so the environment must be in place before the app is imported.
+_STORE_DIR = Path(tempfile.mkdtemp(prefix="triage-tests-"))
+os.environ.update(
+    {
+        "USER_STORE_PATH": str(_STORE_DIR / "users.json"),
+        "SESSION_STORE_PATH": str(_STORE_DIR / "sessions.log"),
+        "TIMELINE_LOG_PATH": str(_STORE_DIR / "timeline_log.json"),
+        "FEEDBACK_LOG_PATH": str(_STORE_DIR / "feedback.log"),
+        "ANALYTICS_DIR": str(_STORE_DIR / "analytics"),
+        "PROFILING_DIR": str(_STORE_DIR / "profiles"),
+        "SESSION_SWEEP_INTERVAL_MINUTES": "0",
+        "TIMELINE_COMPACTION_INTERVAL_HOURS": "0",
+        "DIAGNOSIS_RELOAD_INTERVAL_SECONDS": "0",
+        "RATE_LIMIT_ENABLED": "false",
+        "ANALYTICS_ENABLED": "false",
+    }
+)
+
+
+@pytest.fixture(scope="session")
+def store_dir() -> Path:
+    return _STORE_DIR
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    from backend.app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def auth_headers(client) -> dict:
+    """Authorization headers of a freshly signed-up user."""
+    email = f"{uuid.uuid4().hex}@example.com"
+    response = client.post("/auth/signup", json={"name": "Test User", "email": email, "password": "s3cret-pass"})
+    assert response.status_code == 201, response.text
+    return {"Authorization": f"Bearer {response.json()['token']}"}
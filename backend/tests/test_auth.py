@@ -0,0 +1,33 @@
+"""Legacy ``auth_token`` migration into the session log."""
+from __future__ import annotations
+
+import uuid
+
+from backend.app.data import json_store, session_store, user_store
+
+
+def test_legacy_tokens_are_migrated_into_sessions(client):
+    path = user_store.get_settings().user_store_path
+    token = uuid.uuid4().hex
+    legacy_user = {
+        "id": str(uuid.uuid4()),
+        "name": "legacy",
+        "email": f"{uuid.uuid4().hex}@example.com",
+        "salt": "00",
+        "password_hash": "00",
+        "created_at": "2025-12-23T14:54:18.985726+00:00",
+        "auth_token": token,
+    }
+    with json_store.locked(path):
+        json_store.write_list(path, [*json_store.read_list(path), legacy_user])
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/auth/me", headers=headers).status_code == 401
+
+    assert user_store.migrate_legacy_tokens(session_store.adopt_token) == 1
+    assert client.get("/auth/me", headers=headers).json()["id"] == legacy_user["id"]
+    assert all("auth_token" not in user for user in json_store.read_list(path))
+    assert user_store.migrate_legacy_tokens(session_store.adopt_token) == 0
+
+    # Migrated tokens are ordinary sessions: logout revokes them.
+    assert client.post("/auth/logout", headers=headers).status_code == 200
+    assert client.get("/auth/me", headers=headers).status_code == 401
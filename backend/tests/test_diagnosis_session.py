@@ -0,0 +1,67 @@
+"""Incremental session updates must match a full ``predict_proba`` on the same vector."""
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+
+from backend.app.ml import inference
+from backend.app.ml.diagnosis_session import DiagnosisSession
+from backend.app.ml.forest import get_flat_forest
+from backend.app.ml.preprocess import encode_symptoms
+
+
+def _expected(session: DiagnosisSession) -> Tuple[np.ndarray, np.ndarray]:
+    bundle = inference.get_diagnosis_bundle()
+    vector = encode_symptoms(
+        session.symptoms, bundle["symptom_to_index"], bundle["severity_map"], session.severity_overrides
+    )
+    return vector, bundle["model"].predict_proba(vector.reshape(1, -1))[0]
+
+
+def _trees_testing(vector: np.ndarray, feature: int) -> int:
+    """Trees whose decision path for ``vector`` tests ``feature``, per sklearn."""
+    model = inference.get_diagnosis_bundle()["model"]
+    row = vector.reshape(1, -1).astype(np.float32)
+    return sum(
+        int(np.any(estimator.tree_.feature[estimator.decision_path(row).indices] == feature))
+        for estimator in model.estimators_
+    )
+
+
+def test_incremental_updates_match_predict_proba():
+    symptom_to_index = inference.get_diagnosis_bundle()["symptom_to_index"]
+    session = DiagnosisSession(get_flat_forest())
+    vector, _ = _expected(session)
+
+    steps = [
+        ("set", "itching", None),
+        ("set", "skin_rash", None),
+        ("set", "nodal_skin_eruptions", None),
+        ("set", "skin_rash", 9),
+        ("remove", "itching", None),
+        ("set", "itching", 2),
+        ("remove", "nodal_skin_eruptions", None),
+    ]
+    for action, symptom, severity in steps:
+        rerouted = _trees_testing(vector, symptom_to_index[symptom])
+        if action == "set":
+            session.set_symptom(symptom, severity)
+        else:
+            assert session.remove_symptom(symptom)
+        vector, expected = _expected(session)
+
+        assert session.trees_rerouted == rerouted
+        assert 0 < session.trees_rerouted < get_flat_forest().n_trees
+        np.testing.assert_allclose(session.probabilities(), expected, atol=1e-12)
+
+
+def test_unchanged_weight_reroutes_nothing():
+    session = DiagnosisSession(get_flat_forest())
+    session.set_symptom("itching", 5)
+    before = session.probabilities()
+
+    assert session.set_symptom("itching", 5) == 0
+    assert session.remove_symptom("headache") is False
+    assert session.set_symptom("not_a_symptom") == 0
+    np.testing.assert_array_equal(session.probabilities(), before)
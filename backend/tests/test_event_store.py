@@ -0,0 +1,82 @@
+"""Analytics event log: full buffers go to the flush job and the chunk cache stays bounded."""
+from __future__ import annotations
+
+import pytest
+
+from backend.app.core.config import get_settings
+from backend.app.data import event_store
+
+START = 1_700_000_000
+
+
+@pytest.fixture
+def events_dir(tmp_path, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "analytics_dir", tmp_path)
+    monkeypatch.setattr(settings, "analytics_chunk_size", 4)
+    event_store.flush()
+    event_store.clear_cache()
+    event_store.wait_for_pending(0)
+    yield tmp_path
+    event_store.flush()
+    event_store.clear_cache()
+
+
+def _record(count: int, offset: int = 0) -> None:
+    for index in range(offset, offset + count):
+        event_store.record("Malaria", "urgent", 5.0, ["chills", "high_fever"], timestamp=START + index)
+
+
+def _chunk_files(directory):
+    return sorted(directory.glob("events-*.npz"))
+
+
+def test_full_buffer_is_handed_to_the_flush_job(events_dir):
+    _record(5)
+    assert _chunk_files(events_dir) == []  # nothing written on the request path
+    assert event_store.wait_for_pending(0)
+    _, counts = event_store.triage_counts(START, START + 60, 60)
+    assert counts.sum() == 5  # pending and buffered events are still queryable
+
+    assert event_store.flush() == 5
+    assert len(_chunk_files(events_dir)) == 2
+    assert not event_store.wait_for_pending(0)
+    _, counts = event_store.triage_counts(START, START + 60, 60)
+    assert counts.sum() == 5
+
+
+def test_record_writes_only_when_the_flush_job_falls_behind(events_dir):
+    _record(4 * event_store._MAX_PENDING)
+    assert _chunk_files(events_dir) == []
+    _record(4, offset=100)
+    assert len(_chunk_files(events_dir)) == 1
+    assert event_store.flush() == 4 * event_store._MAX_PENDING
+
+
+def test_chunk_cache_is_bounded_by_bytes(events_dir, monkeypatch):
+    _record(4 * 6)
+    event_store.flush()
+    chunk_bytes = event_store._load_chunk(_chunk_files(events_dir)[0]).nbytes
+    monkeypatch.setattr(get_settings(), "analytics_chunk_cache_bytes", 2 * chunk_bytes)
+
+    _, counts = event_store.triage_counts(START, START + 60, 60)
+    assert counts.sum() == 24
+    assert len(event_store._CHUNKS) == 2
+    assert event_store._CACHE_BYTES == sum(chunk.nbytes for chunk in event_store._CHUNKS.values())
+
+    for path in _chunk_files(events_dir):
+        path.unlink()
+    event_store.triage_counts(START, START + 60, 60)
+    assert len(event_store._CHUNKS) == 0
+    assert event_store._CACHE_BYTES == 0
+
+
+def test_failed_event_write_does_not_fail_the_prediction(client, monkeypatch):
+    def failing_record(*args, **kwargs):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(get_settings(), "analytics_enabled", True)
+    monkeypatch.setattr(event_store, "record", failing_record)
+    response = client.post("/predict", json={"symptoms": ["itching", "skin_rash"]})
+    assert response.status_code == 200, response.text
+    assert response.json()["results"]
@@ -0,0 +1,46 @@
+"""Writers in separate processes must not lose updates, and readers never see a partial file."""
+from __future__ import annotations
+
+import multiprocessing
+from pathlib import Path
+
+import pytest
+
+from backend.app.data import json_store
+
+WRITERS = 4
+APPENDS = 25
+
+
+def _append_records(path: str, writer: int) -> None:
+    store = Path(path)
+    for sequence in range(APPENDS):
+        with json_store.locked(store):
+            records = json_store.read_list(store)
+            json_store.write_list(store, [*records, {"writer": writer, "sequence": sequence}])
+
+
+@pytest.mark.skipif(json_store.fcntl is None, reason="cross-process locking needs fcntl")
+def test_concurrent_writer_processes_lose_no_updates(tmp_path):
+    store = tmp_path / "records.json"
+    context = multiprocessing.get_context("spawn")  # fresh interpreters: no in-process lock is shared
+    processes = [context.Process(target=_append_records, args=(str(store), writer)) for writer in range(WRITERS)]
+    for process in processes:
+        process.start()
+
+    snapshots = 0
+    while any(process.is_alive() for process in processes):
+        records = json_store.read_list(store)  # raises on a partially written file
+        assert isinstance(records, list)
+        snapshots += 1
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+
+    records = json_store.read_list(store)
+    assert len(records) == WRITERS * APPENDS
+    for writer in range(WRITERS):
+        # each writer's appends stay in order, so none overwrote another's read-modify-write
+        assert [record["sequence"] for record in records if record["writer"] == writer] == list(range(APPENDS))
+    assert snapshots > 0
+    assert not list(tmp_path.glob(".records.json.*.tmp"))
@@ -0,0 +1,43 @@
+"""The fast ``/predict`` body skips ``response_model`` validation, so it is checked against the standard path here."""
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from backend.app.core.config import get_settings
+from backend.app.schemas.response import PredictionResponse
+
+REQUESTS = [
+    {"symptoms": ["itching", "skin_rash", "nodal_skin_eruptions"]},
+    {"symptoms": ["fever", "stiff_neck", "headache"], "include_similar": True},
+    {
+        "symptoms": ["chills", "vomiting", "high_fever", "sweating"],
+        "symptom_details": [{"name": "high_fever", "severity": 8}],
+        "include_similar": True,
+        "similar_limit": 3,
+    },
+    {"symptoms": ["headach", "nausia", "not_a_symptom"]},
+]
+
+
+def _post(client, monkeypatch, body: dict, fast: bool) -> bytes:
+    monkeypatch.setattr(get_settings(), "fast_predict_serialization", fast)
+    response = client.post("/predict", json=body)
+    assert response.status_code == 200, response.text
+    return response.content
+
+
+@pytest.mark.parametrize("body", REQUESTS)
+def test_fast_body_matches_standard_body(client, monkeypatch, body):
+    fast = json.loads(_post(client, monkeypatch, body, fast=True))
+    standard = json.loads(_post(client, monkeypatch, body, fast=False))
+    assert fast == standard
+    assert PredictionResponse.model_validate(fast).model_dump(mode="json") == fast
+
+
+def test_fast_body_carries_similar_cases(client, monkeypatch):
+    body = _post(client, monkeypatch, REQUESTS[2], fast=True)
+    document = PredictionResponse.model_validate_json(body)
+    assert document.similar_cases
+    assert len(document.similar_cases) <= REQUESTS[2]["similar_limit"]
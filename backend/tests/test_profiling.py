@@ -0,0 +1,65 @@
+"""Request profiling never corrupts or fails concurrent requests."""
+from __future__ import annotations
+
+import cProfile
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.app.core import profiling
+from backend.app.core.config import get_settings
+
+HEADERS = {"X-Profile": "profile-token"}
+
+
+@pytest.fixture
+def profiled_client(tmp_path, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "profiling_token", "profile-token")
+    monkeypatch.setattr(settings, "profiling_dir", tmp_path)
+
+    app = FastAPI()
+
+    @app.get("/sync")
+    def sync_endpoint() -> dict:
+        return {"total": sum(range(1000))}
+
+    @app.get("/async")
+    async def async_endpoint() -> dict:
+        return {"total": sum(range(1000))}
+
+    profiling.instrument_routes(app)
+    app.add_middleware(profiling.ProfilingMiddleware)
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.mark.parametrize("path", ["/sync", "/async"])
+def test_selected_request_is_profiled(profiled_client, path):
+    response = profiled_client.get(path, headers=HEADERS)
+    assert response.status_code == 200
+    profile_id = response.headers["X-Profile-Id"]
+    assert profiling.profile_path(profile_id) is not None
+
+
+def test_request_runs_unprofiled_while_another_is_profiled(profiled_client):
+    assert profiling._PROFILING_SLOT.acquire(blocking=False)
+    try:
+        response = profiled_client.get("/sync", headers=HEADERS)
+    finally:
+        profiling._PROFILING_SLOT.release()
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+    assert profiling.list_profiles() == []
+
+
+@pytest.mark.parametrize("path", ["/sync", "/async"])
+def test_unavailable_profiler_does_not_fail_the_request(profiled_client, monkeypatch, path):
+    def busy(self):
+        raise ValueError("Another profiling tool is already active")
+
+    monkeypatch.setattr(cProfile.Profile, "enable", busy)
+    response = profiled_client.get(path, headers=HEADERS)
+    assert response.status_code == 200
+    assert response.json() == {"total": 499500}
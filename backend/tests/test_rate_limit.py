@@ -0,0 +1,33 @@
+"""Rate-limit budgets: refunds across budgets and the protected counters endpoint."""
+from __future__ import annotations
+
+from backend.app.core import rate_limit
+from backend.app.core.config import get_settings
+
+LOGIN = {"email": "nobody@example.com", "password": "wrong-password"}
+
+
+def test_login_rejected_by_expensive_budget_is_not_charged_to_standard(client, monkeypatch):
+    limiters = {
+        "standard": rate_limit.RateLimiter("standard", per_minute=1.0, burst=3, max_keys=100),
+        "expensive": rate_limit.RateLimiter("expensive", per_minute=1.0, burst=1, max_keys=100),
+    }
+    monkeypatch.setattr(rate_limit, "get_limiters", lambda: limiters)
+
+    assert client.post("/auth/login", json=LOGIN).status_code == 401
+    for _ in range(3):
+        assert client.post("/auth/login", json=LOGIN).status_code == 429
+    # Only the first login was charged to the standard budget, so two more calls fit its burst.
+    assert client.get("/symptoms").status_code == 200
+    assert client.get("/symptoms").status_code == 200
+    assert client.get("/symptoms").status_code == 429
+    assert limiters["expensive"].stats()["throttled"] == 3
+
+
+def test_rate_limit_counters_require_token(client, monkeypatch):
+    assert client.get("/rate-limits").status_code == 403
+    monkeypatch.setattr(get_settings(), "rate_limit_token", "limits-token")
+    assert client.get("/rate-limits", headers={"X-Rate-Limit-Token": "wrong"}).status_code == 403
+    response = client.get("/rate-limits", headers={"X-Rate-Limit-Token": "limits-token"})
+    assert response.status_code == 200
+    assert response.json()["enabled"] is False
@@ -0,0 +1,34 @@
+"""Sensitivity rows must be real perturbations and rank diseases like ``predict_diseases``."""
+from __future__ import annotations
+
+import numpy as np
+
+from backend.app.ml import inference, sensitivity
+from backend.app.ml.preprocess import encode_symptoms
+
+SYMPTOMS = ["itching", "skin_rash"]
+
+
+def test_no_severity_row_repeats_the_baseline():
+    report = sensitivity.analyze(SYMPTOMS, severity_overrides={"skin_rash": 5}, severity_levels=(0, 5, 10))
+    swept = {(row["symptom"], row["severity"]) for row in report["perturbations"] if row["kind"] == "severity"}
+    # itching has no override, so level 0 is its base weight; skin_rash is already at 5.
+    assert swept == {("itching", 5.0), ("itching", 10.0), ("skin_rash", 0.0), ("skin_rash", 10.0)}
+
+
+def test_baseline_ranking_matches_predict_diseases_with_ties():
+    top_k = 10
+    bundle = inference.get_diagnosis_bundle()
+    vector = encode_symptoms(SYMPTOMS, bundle["symptom_to_index"], bundle["severity_map"])
+    probabilities = bundle["model"].predict_proba(vector.reshape(1, -1))[0]
+    assert len(np.unique(probabilities[inference.rank_classes(probabilities)[:top_k]])) < top_k
+
+    report = sensitivity.analyze(SYMPTOMS, top_k=top_k)
+    expected = [result["disease"] for result in inference.predict_diseases(SYMPTOMS, top_k=top_k)]
+    assert [row["disease"] for row in report["baseline"]] == expected
+
+
+def test_sensitivity_request_has_no_similar_case_fields(client):
+    schemas = client.get("/openapi.json").json()["components"]["schemas"]
+    assert {"include_similar", "similar_limit"} <= set(schemas["PredictionRequest"]["properties"])
+    assert not {"include_similar", "similar_limit"} & set(schemas["SensitivityRequest"]["properties"])
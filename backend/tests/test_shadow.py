@@ -0,0 +1,65 @@
+"""The shadow evaluator holds only the current candidate and picks up a replaced file."""
+from __future__ import annotations
+
+import os
+import pickle
+
+from backend.app.core.config import get_settings
+from backend.app.ml import inference
+from backend.app.ml.shadow import ShadowEvaluator, ShadowRequest
+
+
+def _write_candidate(path, mtime_ns: int) -> None:
+    bundle = inference.get_diagnosis_bundle()
+    path.write_bytes(pickle.dumps({key: bundle[key] for key in ("model", "symptom_to_index", "severity_map")}))
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def _request() -> ShadowRequest:
+    results = inference.predict_diseases(["itching", "skin_rash"])
+    return ShadowRequest(("itching", "skin_rash"), {}, tuple(r["disease"] for r in results), results[0]["triage_level"])
+
+
+def test_candidate_is_reloaded_when_the_file_changes(tmp_path):
+    path = tmp_path / "candidate.pkl"
+    _write_candidate(path, 1_000_000_000)
+    evaluator = ShadowEvaluator(path, sample_rate=1.0, queue_size=10, latency_window=10)
+
+    evaluator.evaluate(_request())
+    first = evaluator._load_candidate()
+    assert evaluator._load_candidate() is first  # unchanged file is not read again
+    assert evaluator.report()["evaluated"] == 1
+    assert evaluator.report()["top1_agreement"] == 1.0
+
+    _write_candidate(path, 2_000_000_000)
+    evaluator.evaluate(_request())
+    assert evaluator._load_candidate() is not first
+    assert evaluator.report()["evaluated"] == 1  # statistics restarted with the new candidate
+
+
+def test_serving_bundle_path_is_not_cached_by_the_reader():
+    path = get_settings().diagnosis_model_path
+    first, stat = inference.read_diagnosis_bundle(path)
+    second, _ = inference.read_diagnosis_bundle(path)
+    assert first is not second
+    assert stat == (os.stat(path).st_ino, os.stat(path).st_size, os.stat(path).st_mtime_ns)
+
+
+def test_both_models_are_timed_uncached(tmp_path, monkeypatch):
+    path = tmp_path / "candidate.pkl"
+    _write_candidate(path, 1_000_000_000)
+    evaluator = ShadowEvaluator(path, sample_rate=1.0, queue_size=10, latency_window=10)
+    request = _request()
+    predict_diseases = inference.predict_diseases
+    bundles = []
+
+    def spy(*args, **kwargs):
+        bundles.append(kwargs.get("bundle"))
+        return predict_diseases(*args, **kwargs)
+
+    monkeypatch.setattr(inference, "predict_diseases", spy)
+    evaluator.evaluate(request)
+    # Passing a bundle bypasses the probability cache for the serving model as well.
+    assert bundles == [evaluator._load_candidate(), inference.get_diagnosis_bundle()]
+    latency = evaluator.report()["latency"]
+    assert latency["primary"]["count"] == latency["candidate"]["count"] == 1
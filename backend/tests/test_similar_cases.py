@@ -0,0 +1,41 @@
+"""The case index is reloaded when ``build_case_index.py`` replaces the file."""
+from __future__ import annotations
+
+import os
+
+from backend.app.core.config import get_settings
+from backend.app.ml import similar_cases
+
+CASES = [
+    ("dataset", "Malaria", ["chills", "high_fever", "sweating"]),
+    ("dataset", "Fungal infection", ["itching", "skin_rash"]),
+]
+
+
+def _write(path, cases, mtime_ns: int) -> None:
+    similar_cases.write_case_index(similar_cases.build_case_index(cases), path)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_rebuilt_index_is_swapped_in(tmp_path, monkeypatch):
+    path = tmp_path / "case_index.npz"
+    monkeypatch.setattr(get_settings(), "case_index_path", path)
+    monkeypatch.setattr(similar_cases, "_INDEX", {})
+
+    assert similar_cases.get_case_index() is None
+    assert not similar_cases.reload_case_index()
+
+    _write(path, CASES, 1_000_000_000)
+    assert similar_cases.reload_case_index()
+    first = similar_cases.get_case_index()
+    assert first.n_cases == 2
+    assert not similar_cases.reload_case_index()
+
+    _write(path, CASES + [("timeline", "Migraine", ["headache", "vision_blurring"])], 2_000_000_000)
+    assert similar_cases.reload_case_index()
+    assert similar_cases.get_case_index().n_cases == 3
+    assert similar_cases.similar_cases(["headache"], limit=1)[0]["disease"] == "Migraine"
+
+    path.unlink()
+    assert similar_cases.reload_case_index()
+    assert similar_cases.get_case_index() is None
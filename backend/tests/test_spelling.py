@@ -0,0 +1,46 @@
+"""Misspelled symptoms are corrected only when the suggestion is confident and unambiguous."""
+from __future__ import annotations
+
+from backend.app.core.config import get_settings
+from backend.app.ml import inference, spelling
+
+
+def test_misspelling_is_corrected(client):
+    body = client.post("/predict", json={"symptoms": ["itchng", "skin_rash"]}).json()
+    assert body["corrections"] == [
+        {"original": "itchng", "suggestion": "itching", "distance": 1, "confidence": 0.8571, "applied": True}
+    ]
+    expected = inference.predict_diseases(["itching", "skin_rash"])
+    assert [result["disease"] for result in body["results"]] == [result["disease"] for result in expected]
+
+
+def test_suggestion_below_min_confidence_is_not_applied(client):
+    correction = spelling.correct_symptom("chilz")
+    assert correction.suggestion == "chills"
+    assert correction.confidence < get_settings().spelling_min_confidence
+    assert not correction.applied
+
+    body = client.post("/predict", json={"symptoms": ["chilz", "vomiting"]}).json()
+    assert body["corrections"] == [correction._asdict()]
+    expected = inference.predict_diseases(["vomiting"])
+    assert [result["disease"] for result in body["results"]] == [result["disease"] for result in expected]
+
+
+def test_checker_respects_min_confidence():
+    checker = spelling.SymptomSpellChecker(["itching", "skin_rash"])
+    assert checker.correct("itchng", min_confidence=0.8).applied
+    assert not checker.correct("itchng", min_confidence=0.9).applied
+
+
+def test_rule_terms_are_not_spell_checked(client, monkeypatch):
+    checked = []
+
+    def correct_symptom(symptom):
+        checked.append(symptom)
+        return spelling.Correction(symptom, "stiff_neck", 1, 0.9, True)
+
+    monkeypatch.setattr(spelling, "correct_symptom", correct_symptom)
+    body = client.post("/predict", json={"symptoms": ["fever", "stiff_neck"]}).json()
+    assert "fever" not in checked  # the warm-up thread may spell-check its own sample meanwhile
+    assert body["corrections"] == []
+    assert body["red_flags"] == inference.detect_red_flags(["fever", "stiff_neck"])
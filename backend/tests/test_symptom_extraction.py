@@ -0,0 +1,66 @@
+"""Free-text extraction must raise the same red flags as the equivalent symptom list."""
+from __future__ import annotations
+
+import pytest
+
+from backend.app.ml import inference, symptom_extraction
+
+TEXT_AND_LIST = [
+    ("fever and stiff neck since morning", ["fever", "stiff_neck"]),
+    ("I passed out and have a fever", ["loss_of_consciousness", "fever"]),
+    ("fainted this morning", ["loss_of_consciousness"]),
+    ("chest pain and shortness of breath", ["chest_pain", "shortness_of_breath"]),
+    ("chest hurts and I'm short of breath", ["chest_pain", "shortness_of_breath"]),
+    ("high temperature and a stiff neck", ["fever", "stiff_neck"]),
+    ("coughing up blood", ["blood_in_sputum", "coughing"]),
+    ("severe headache with blurred vision", ["severe_headache", "vision_blurring"]),
+    ("feeling confused", ["confusion"]),
+]
+
+
+@pytest.mark.parametrize("text,symptoms", TEXT_AND_LIST)
+def test_text_red_flags_match_list_input(client, text, symptoms):
+    from_text = client.post("/predict/text", json={"text": text})
+    assert from_text.status_code == 200, from_text.text
+    expected = inference.detect_red_flags(symptoms)
+    assert expected
+    assert from_text.json()["red_flags"] == expected
+
+
+def test_text_red_flags_match_predict_endpoint(client):
+    from_text = client.post("/predict/text", json={"text": "fever and stiff neck since morning"}).json()
+    from_list = client.post("/predict", json={"symptoms": ["fever", "stiff_neck"]}).json()
+    assert from_text["red_flags"] == from_list["red_flags"]
+
+
+def test_fever_keeps_model_feature_and_rule_term():
+    symptoms = [match.symptom for match in symptom_extraction.extract_symptoms(["a fever"])[0]]
+    assert symptoms == ["mild_fever", "fever"]
+
+
+def test_passed_out_is_not_mapped_to_coma():
+    symptoms = [match.symptom for match in symptom_extraction.extract_symptoms(["I passed out"])[0]]
+    assert symptoms == ["loss_of_consciousness"]
+
+
+def test_rule_only_text_returns_red_flags_without_ranking(client):
+    response = client.post("/predict/text", json={"text": "I passed out"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["results"] == []
+    assert body["red_flags"] == ["Loss of consciousness requires emergency care."]
+
+
+def test_batch_notes_raise_the_same_red_flags(client):
+    notes = [text for text, _ in TEXT_AND_LIST]
+    items = client.post("/predict/text/batch", json={"notes": notes}).json()["items"]
+    assert [item["red_flags"] for item in items] == [inference.detect_red_flags(symptoms) for _, symptoms in TEXT_AND_LIST]
+
+
+def test_rule_terms_stay_out_of_the_text_prediction(client):
+    from_text = client.post("/predict/text", json={"text": "I have a fever and a headache"}).json()
+    from_list = client.post("/predict", json={"symptoms": ["mild_fever", "headache"]}).json()
+    assert from_text["normalized_symptoms"] == ["mild_fever", "headache"]
+    assert from_text["unmapped_symptoms"] == []
+    assert from_text["results"] == from_list["results"]
+    assert from_text["follow_up_questions"] == inference.suggest_follow_up_questions(["mild_fever", "fever", "headache"])
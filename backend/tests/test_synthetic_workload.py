@@ -0,0 +1,23 @@
+"""Synthetic workloads depend only on their seed and parameters."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from backend.app.ml.synthetic_workload import TIMELINE_START, WorkloadModel, generate_timelines
+
+
+def test_timelines_are_reproducible():
+    model = WorkloadModel.from_dataset()
+    first = list(generate_timelines(model, 20, seed=3))
+    assert first == list(generate_timelines(model, 20, seed=3))
+    assert first != list(generate_timelines(model, 20, seed=4))
+
+    cases = [entry for entries in first for entry in entries if entry["entry_type"] == "case"]
+    assert all(TIMELINE_START <= datetime.fromisoformat(entry["occurred_at"]) < TIMELINE_START + timedelta(days=365) for entry in cases)
+
+
+def test_timelines_start_at_the_given_day():
+    start = datetime(2025, 6, 1, tzinfo=timezone.utc)
+    model = WorkloadModel.from_dataset()
+    entries = [entry for entries in generate_timelines(model, 5, start=start, days=10) for entry in entries]
+    assert all(start <= datetime.fromisoformat(entry["occurred_at"]) for entry in entries)
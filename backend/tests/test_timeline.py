@@ -0,0 +1,141 @@
+"""Timeline ETags and tombstone pruning."""
+from __future__ import annotations
+
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from backend.app.data import timeline_store
+
+
+def _add_tracker(client, headers, count: int) -> None:
+    for minute in range(count):
+        occurred_at = (datetime.now(timezone.utc) - timedelta(minutes=minute)).isoformat()
+        response = client.post(
+            "/timeline",
+            json={"symptoms": ["headache"], "entry_type": "tracker", "occurred_at": occurred_at, "severity_score": 3},
+            headers=headers,
+        )
+        assert response.status_code in (200, 201), response.text
+
+
+def test_etag_differs_per_view(client, auth_headers):
+    headers = auth_headers
+    _add_tracker(client, headers, 3)
+    first = client.get("/timeline/page", params={"limit": 1}, headers=headers)
+    cursor = first.json()["next_cursor"]
+    second = client.get("/timeline/page", params={"limit": 1, "cursor": cursor}, headers=headers)
+    tags = {
+        first.headers["etag"],
+        second.headers["etag"],
+        client.get("/timeline/page", params={"limit": 2}, headers=headers).headers["etag"],
+        client.get("/timeline", headers=headers).headers["etag"],
+        client.get("/timeline/changes", params={"since": 0}, headers=headers).headers["etag"],
+        client.get("/timeline/changes", params={"since": 1}, headers=headers).headers["etag"],
+    }
+    assert len(tags) == 6
+
+    # The tag of one page must not validate another page.
+    stale = client.get(
+        "/timeline/page", params={"limit": 1, "cursor": cursor}, headers={**headers, "If-None-Match": first.headers["etag"]}
+    )
+    assert stale.status_code == 200
+    current = client.get(
+        "/timeline/page", params={"limit": 1}, headers={**headers, "If-None-Match": first.headers["etag"]}
+    )
+    assert current.status_code == 304
+
+
+def test_compaction_prunes_old_tombstones(client, auth_headers):
+    headers = auth_headers
+    _add_tracker(client, headers, 2)
+    entry_id = client.get("/timeline", headers=headers).json()[0]["id"]
+    since = client.get("/timeline/page", headers=headers).json()["version"]
+    assert client.delete(f"/timeline/{entry_id}", headers=headers).status_code in (200, 204)
+    assert entry_id in client.get("/timeline/changes", params={"since": since}, headers=headers).json()["deleted_ids"]
+
+    report = timeline_store.compact(retention_days=30, now=datetime.now(timezone.utc) + timedelta(days=31))
+    assert report["tombstones_pruned"] >= 1
+    path = timeline_store._tombstone_path(timeline_store.get_settings().timeline_log_path)
+    assert entry_id not in {record.get("id") for record in timeline_store.json_store.read_list(path)}
+
+    expired = client.get("/timeline/changes", params={"since": since}, headers=headers)
+    assert expired.status_code == 410
+    latest = client.get("/timeline/page", headers=headers).json()["version"]
+    assert client.get("/timeline/changes", params={"since": latest}, headers=headers).status_code == 200
+
+
+def test_compaction_keeps_notes_and_runs_once_per_interval(client, auth_headers):
+    occurred = datetime.now(timezone.utc) - timedelta(days=40)
+    for offset, note in enumerate(["woke up dizzy", None, "after lunch"]):
+        response = client.post(
+            "/timeline",
+            json={
+                "symptoms": ["dizziness"],
+                "entry_type": "tracker",
+                "occurred_at": (occurred + timedelta(minutes=offset)).isoformat(),
+                "severity_score": 2,
+                "notes": note,
+            },
+            headers=auth_headers,
+        )
+        assert response.status_code == 201, response.text
+
+    marker = timeline_store._compaction_marker_path(timeline_store.get_settings().timeline_log_path)
+    marker.unlink(missing_ok=True)  # earlier tests compacted the shared store
+    report = timeline_store.compact(retention_days=30, min_interval_seconds=3600)
+    assert not report["skipped"]
+    [summary] = client.get("/timeline", headers=auth_headers).json()
+    assert [note["text"] for note in summary["summary"]["notes"]] == ["woke up dizzy", "after lunch"]
+
+    assert timeline_store.compact(retention_days=30, min_interval_seconds=3600)["skipped"]
+    assert not timeline_store.compact(retention_days=30)["skipped"]
+
+
+def _ndjson(*items) -> bytes:
+    return b"".join(json.dumps(item).encode("utf-8") + b"\n" for item in items)
+
+
+def test_import_reissues_ids_taken_by_another_user(client, auth_headers):
+    other_headers = {"Authorization": auth_headers["Authorization"]}
+    first = client.post("/timeline", json={"symptoms": ["cough"]}, headers=other_headers).json()
+
+    email = f"{uuid.uuid4().hex}@example.com"
+    token = client.post("/auth/signup", json={"name": "Second", "email": email, "password": "pw-12345"}).json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    body = _ndjson({"id": first["id"], "symptoms": ["fever"]}, {"id": "own-entry", "symptoms": ["nausea"]})
+    result = client.post("/timeline/import", content=body, headers=headers).json()
+    assert result["imported"] == 2 and result["reissued"] == 1
+
+    mine = client.get("/timeline", headers=headers).json()
+    assert first["id"] not in {entry["id"] for entry in mine}
+    assert [entry["symptoms"] for entry in client.get("/timeline", headers=other_headers).json()] == [["cough"]]
+
+    # Re-importing the same file is still idempotent for the caller's own ids.
+    again = client.post("/timeline/import", content=_ndjson({"id": "own-entry", "symptoms": ["nausea"]}), headers=headers)
+    assert again.json()["skipped"] == 1
+
+
+def test_import_rejects_overlong_lines(client, auth_headers):
+    max_line = timeline_store.get_settings().timeline_import_max_line_bytes
+    valid = _ndjson({"symptoms": ["fever"]})
+
+    def chunks():
+        yield valid
+        for _ in range(max_line // 1024 + 2):
+            yield b"x" * 1024  # no newline
+
+    response = client.post("/timeline/import", content=chunks(), headers=auth_headers)
+    assert response.status_code == 413
+    assert "1 entries before it were imported" in response.json()["detail"]
+
+    long_line = b'{"symptoms": ["fever"], "notes": "' + b"a" * max_line + b'"}\n'
+    assert client.post("/timeline/import", content=valid + long_line, headers=auth_headers).status_code == 413
+
+
+def test_import_splits_lines_across_chunks(client, auth_headers):
+    body = _ndjson(*({"symptoms": ["fever"], "notes": str(index)} for index in range(50)))
+    response = client.post("/timeline/import", content=(body[i : i + 7] for i in range(0, len(body), 7)), headers=auth_headers)
+    assert response.json()["imported"] == 50
+    notes = sorted(int(entry["notes"]) for entry in client.get("/timeline", headers=auth_headers).json())
+    assert notes == list(range(50))
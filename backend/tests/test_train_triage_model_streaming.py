@@ -0,0 +1,91 @@
+"""The streaming trainer keeps class counts so ``--update`` balances over every corpus seen."""
+from __future__ import annotations
+
+import csv
+import pickle
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+
+from backend.app.ml import train_triage_model_streaming as streaming
+
+ARGS = ["--epochs", "2", "--n-features", "1024", "--chunk-size", "8"]
+
+
+def _write_corpus(path: Path, rows: List[Tuple[str, str]]) -> Path:
+    with path.open("w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["text", "triage_level"])
+        writer.writerows(rows)
+    return path
+
+
+def _rows(label: str, text: str, count: int) -> List[Tuple[str, str]]:
+    return [(f"{text} case {index}", label) for index in range(count)]
+
+
+@pytest.fixture
+def recorded_weights(monkeypatch):
+    """Sample weights passed to ``SGDClassifier.partial_fit``, per label."""
+    weights = {}
+    partial_fit = streaming.SGDClassifier.partial_fit
+
+    def recording(self, X, y, classes=None, sample_weight=None):
+        for label, weight in zip(y, sample_weight if sample_weight is not None else [None] * len(y)):
+            weights[label] = weight
+        return partial_fit(self, X, y, classes=classes, sample_weight=sample_weight)
+
+    monkeypatch.setattr(streaming.SGDClassifier, "partial_fit", recording)
+    return weights
+
+
+def test_update_balances_over_the_original_and_new_counts(tmp_path, recorded_weights):
+    output = tmp_path / "triage_model.pkl"
+    base = _rows("emergency", "crushing chest pain", 30) + _rows("self_care", "mild runny nose", 10)
+    streaming.main(["--corpus", str(_write_corpus(tmp_path / "base.csv", base)), "--output", str(output), *ARGS])
+    with open(output, "rb") as file:
+        assert pickle.load(file).named_steps["clf"].class_counts_ == {"emergency": 30, "self_care": 10}
+
+    recorded_weights.clear()
+    update = _rows("self_care", "sore throat at home", 10)
+    streaming.main(
+        ["--corpus", str(_write_corpus(tmp_path / "new.csv", update)), "--output", str(output), "--update", *ARGS]
+    )
+    # balanced over 30 emergency + 20 self_care documents, not over the 10 new ones alone (weight 1.0)
+    assert recorded_weights == {"self_care": pytest.approx(50 / (2 * 20))}
+    with open(output, "rb") as file:
+        pipeline = pickle.load(file)
+    assert pipeline.named_steps["clf"].class_counts_ == {"emergency": 30, "self_care": 20}
+    assert pipeline.predict(["crushing chest pain"])[0] == "emergency"
+
+
+def test_update_without_counts_fits_unweighted(tmp_path, recorded_weights):
+    output = tmp_path / "triage_model.pkl"
+    base = _rows("emergency", "crushing chest pain", 30) + _rows("self_care", "mild runny nose", 10)
+    streaming.main(["--corpus", str(_write_corpus(tmp_path / "base.csv", base)), "--output", str(output), *ARGS])
+    with open(output, "rb") as file:
+        pipeline = pickle.load(file)
+    del pipeline.named_steps["clf"].class_counts_  # a model saved before counts were kept
+    with open(output, "wb") as file:
+        pickle.dump(pipeline, file)
+
+    recorded_weights.clear()
+    update = _rows("self_care", "sore throat at home", 10)
+    streaming.main(
+        ["--corpus", str(_write_corpus(tmp_path / "new.csv", update)), "--output", str(output), "--update", *ARGS]
+    )
+    assert recorded_weights == {"self_care": None}
+    with open(output, "rb") as file:
+        assert not hasattr(pickle.load(file).named_steps["clf"], "class_counts_")
+
+
+def test_update_rejects_unknown_labels(tmp_path):
+    output = tmp_path / "triage_model.pkl"
+    base = _rows("emergency", "crushing chest pain", 10) + _rows("self_care", "mild runny nose", 10)
+    streaming.main(["--corpus", str(_write_corpus(tmp_path / "base.csv", base)), "--output", str(output), *ARGS])
+    update = _rows("urgent", "deep cut on hand", 5)
+    with pytest.raises(ValueError, match="urgent"):
+        streaming.main(
+            ["--corpus", str(_write_corpus(tmp_path / "new.csv", update)), "--output", str(output), "--update", *ARGS]
+        )
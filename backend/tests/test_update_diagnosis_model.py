@@ -0,0 +1,98 @@
+"""The incremental update keeps the forest's shape, writes a candidate by default and guards the serving model."""
+from __future__ import annotations
+
+import random
+import shutil
+import time
+
+import pytest
+
+from backend.app.core.config import get_settings
+from backend.app.data import feedback_store
+from backend.app.data.runtime_data import iter_dataset_cases
+from backend.app.ml import inference, update_diagnosis_model
+
+FEEDBACK = [
+    {"symptoms": ["itching", "skin_rash"], "confirmed_disease": "Fungal infection", "created_at": time.time()},
+    {"symptoms": ["chills", "high_fever", "sweating"], "confirmed_disease": "Malaria", "created_at": time.time()},
+]
+
+
+@pytest.fixture
+def serving_model(tmp_path, monkeypatch):
+    settings = get_settings()
+    path = tmp_path / "diagnosis_model.pkl"
+    shutil.copyfile(settings.diagnosis_model_path, path)
+    monkeypatch.setattr(settings, "diagnosis_model_path", path)
+    monkeypatch.setattr(settings, "shadow_model_path", None)
+    monkeypatch.setattr(feedback_store, "iter_records", lambda since=None, path=None: iter(FEEDBACK))
+    return path
+
+
+def _run(*extra: str) -> int:
+    return update_diagnosis_model.main(["--new-trees", "2", "--base-per-class", "2", "--seed", "7", *extra])
+
+
+def test_default_output_is_a_candidate(serving_model):
+    before = serving_model.read_bytes()
+    assert _run() == 0
+    assert serving_model.read_bytes() == before
+    assert (serving_model.parent / "diagnosis_model.candidate.pkl").exists()
+
+
+def test_serving_model_is_not_overwritten_when_base_accuracy_drops(serving_model, monkeypatch):
+    update_forest = update_diagnosis_model.update_forest
+    updated_models = set()
+
+    def tracked_update_forest(*args, **kwargs):
+        updated = update_forest(*args, **kwargs)
+        updated_models.add(id(updated["model"]))
+        return updated
+
+    # The serving forest scores 1.0 on the base sample and the updated one 0.9.
+    monkeypatch.setattr(update_diagnosis_model, "update_forest", tracked_update_forest)
+    monkeypatch.setattr(
+        update_diagnosis_model, "_accuracy", lambda model, bundle, samples: 0.9 if id(model) in updated_models else 1.0
+    )
+    before = serving_model.read_bytes()
+    assert _run("--output", str(serving_model)) == 1
+    assert serving_model.read_bytes() == before
+    assert _run("--output", str(serving_model), "--max-holdout-accuracy-drop", "0.2") == 0
+    assert serving_model.read_bytes() != before
+
+
+def test_update_forest_replaces_the_oldest_trees():
+    bundle = inference.get_diagnosis_bundle()
+    model = bundle["model"]
+    rng = random.Random(3)
+    cases = update_diagnosis_model.reservoir_sample(iter_dataset_cases(), 2, rng)
+    samples = [(disease, symptoms, 1.0) for disease, symptoms in cases]
+
+    updated = update_diagnosis_model.update_forest(bundle, samples, new_trees=3, retire=3, seed=3)["model"]
+    assert len(updated.estimators_) == len(model.estimators_)
+    assert updated.n_estimators == model.n_estimators
+    assert updated.estimators_[:-3] == model.estimators_[3:]  # the three oldest are gone
+    assert not any(tree in model.estimators_ for tree in updated.estimators_[-3:])
+    assert list(updated.classes_) == list(model.classes_)
+    assert model.estimators_ is not updated.estimators_ and len(model.estimators_) == model.n_estimators
+
+
+def test_gate_scores_cases_outside_the_fitted_sample(serving_model, monkeypatch):
+    update_forest = update_diagnosis_model.update_forest
+    fitted, scored = [], []
+
+    def tracked_update_forest(bundle, samples, *args, **kwargs):
+        fitted.extend(samples)
+        return update_forest(bundle, samples, *args, **kwargs)
+
+    def tracked_accuracy(model, bundle, samples):
+        scored.append(samples)
+        return 1.0
+
+    monkeypatch.setattr(update_diagnosis_model, "update_forest", tracked_update_forest)
+    monkeypatch.setattr(update_diagnosis_model, "_accuracy", tracked_accuracy)
+    assert _run("--base-per-class", "20") == 0
+    holdout = scored[0]  # scored before the feedback
+    assert holdout
+    fitted_sets = {(disease, frozenset(symptoms)) for disease, symptoms, _ in fitted}
+    assert not any((disease, frozenset(symptoms)) in fitted_sets for disease, symptoms, _ in holdout)